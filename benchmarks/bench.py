@@ -0,0 +1,282 @@
+"""
+Benchmarks of compile time and circuit quality.
+
+Every workload is built several times, the best wall time is recorded
+together with the peak memory, qubits, gate counts and depth of the circuit.
+
+Usage:
+    python benchmarks/bench.py --save baseline.json
+    python benchmarks/bench.py --compare baseline.json
+"""
+
+from typing import Any, Callable, Dict, List
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from qiskit.circuit import QuantumCircuit
+
+from quantpiler import compiler
+from quantpiler.adder import new_adder, new_inplace_adder
+from quantpiler.oracle import new_multi_oracle_checker, new_oracle_checker
+from quantpiler.qram import new_gray_qram, new_qram
+from quantpiler.qrom import new_qrom
+
+# Metrics compared with the baseline, larger is worse
+QUALITY_METRICS = ["qubits", "gates", "depth"]
+
+
+def chain_source(op: str, size: int, count: int) -> str:
+    args = ", ".join(f"a{i}: {size}" for i in range(count))
+    expr = f" {op} ".join(f"a{i}" for i in range(count))
+    return f"def chain({args}) -> {size}:\n    return {expr}\n"
+
+
+def shifts_source(size: int) -> str:
+    return (
+        f"def shifts(a: {size}, b: {size}) -> {size}:\n"
+        f"    c: {size} = (a << 3) ^ (b >> 5)\n"
+        f"    d: {size} = (c << 1) | (a >> 1)\n"
+        f"    return d ^ (c >> 7)\n"
+    )
+
+
+def nested_ifs_source(size: int, depth: int) -> str:
+    lines = [f"def nested(a: {size}, b: {size}, c: {size}) -> {size}:"]
+    lines.append("    d = a ^ b")
+    for level in range(depth):
+        indent = "    " * (level + 1)
+        lines.append(f"{indent}if (a >> {level}) & b:")
+        lines.append(f"{indent}    d = (d & c) ^ b")
+    lines.append("    return d")
+    return "\n".join(lines) + "\n"
+
+
+def arx_source(size: int, rounds: int) -> str:
+    # Rotations and XOR mixing of the state, as in ARX hash functions
+    lines = [f"def arx(a: {size}, b: {size}) -> {size}:"]
+    for i in range(rounds):
+        left = 7 + 2 * i
+        lines.append(
+            f"    r: {size} = (a << {left % size}) | (a >> {size - left % size})"
+        )
+        lines.append(f"    b = b ^ r ^ (a & b)")
+        lines.append(f"    a = a ^ (b >> 3)")
+    lines.append("    return a ^ b")
+    return "\n".join(lines) + "\n"
+
+
+def compile_source(source: str, **options) -> QuantumCircuit:
+    comp = compiler.Compiler(**options)
+    comp.assemble_source(source)
+    return comp.get_qc()
+
+
+def get_workloads(quick: bool = False) -> Dict[str, Callable[[], QuantumCircuit]]:
+    """Get the benchmarked workloads.
+
+    Args:
+        quick (bool, optional): Use only the small sizes. Defaults to False.
+
+    Returns:
+        Dict[str, Callable[[], QuantumCircuit]]: Circuit builders by workload name.
+    """
+    sizes = [16, 64] if quick else [16, 64, 256]
+    workloads: Dict[str, Callable[[], QuantumCircuit]] = {}
+
+    for size in sizes:
+        for name, op in [("xor", "^"), ("and", "&"), ("or", "|")]:
+            source = chain_source(op, size, 4)
+            workloads[
+                f"compiler/{name}_chain/{size}"
+            ] = lambda source=source: compile_source(source)
+
+        source = shifts_source(size)
+        workloads[f"compiler/shifts/{size}"] = lambda source=source: compile_source(
+            source
+        )
+
+        source = nested_ifs_source(size, 3)
+        workloads[f"compiler/nested_ifs/{size}"] = lambda source=source: compile_source(
+            source
+        )
+
+        source = arx_source(size, 4)
+        workloads[f"compiler/arx/{size}"] = lambda source=source: compile_source(source)
+        workloads[f"compiler/arx_clean/{size}"] = lambda source=source: compile_source(
+            source, clean_ancillas=True
+        )
+
+    for address_count in [4, 6] if quick else [4, 6, 8, 10]:
+        rng = random.Random(address_count)
+        values = [rng.randrange(256) for _ in range(2**address_count)]
+        workloads[
+            f"qram/{address_count}"
+        ] = lambda address_count=address_count, values=values: new_qram(
+            address_count, 8, values
+        )
+        workloads[
+            f"gray_qram/{address_count}"
+        ] = lambda address_count=address_count, values=values: new_gray_qram(
+            address_count, 8, values
+        )
+
+    for address_count in [8, 10] if quick else [8, 10, 12]:
+        rng = random.Random(address_count)
+        values = [rng.randrange(256) for _ in range(2**address_count)]
+        for block_size in [1, 4]:
+            workloads[
+                f"qrom/{address_count}/{block_size}"
+            ] = lambda address_count=address_count, values=values, block_size=block_size: new_qrom(
+                address_count, 8, values, block_size
+            ).get_qc()
+
+    for size in [8, 64] if quick else [8, 64, 256, 1024]:
+        workloads[f"adder/{size}"] = lambda size=size: new_adder(size)
+        workloads[f"lookahead_adder/{size}"] = lambda size=size: new_adder(
+            size, "lookahead"
+        )
+        workloads[f"inplace_adder/{size}"] = lambda size=size: new_inplace_adder(size)
+
+    for size in [8, 64] if quick else [8, 64, 256]:
+        rng = random.Random(size)
+        expected = [bool(rng.getrandbits(1)) for _ in range(size)]
+        workloads[
+            f"oracle_checker/{size}"
+        ] = lambda expected=expected: new_oracle_checker(expected)
+        patterns = [
+            [bool(rng.getrandbits(1)) for _ in range(min(size, 16))]
+            for _ in range(size)
+        ]
+        workloads[
+            f"multi_oracle_checker/{size}"
+        ] = lambda patterns=patterns: new_multi_oracle_checker(patterns)
+
+    return workloads
+
+
+def measure(build: Callable[[], QuantumCircuit], repeat: int = 3) -> Dict[str, Any]:
+    """Build the circuit and measure it.
+
+    Args:
+        build (Callable[[], QuantumCircuit]): Circuit builder.
+        repeat (int, optional): Number of timed runs. Defaults to 3.
+
+    Returns:
+        Dict[str, Any]: Metrics of the workload.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        qc = build()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    build()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count_ops = {name: count for name, count in qc.count_ops().items()}
+    gates = sum(count for name, count in count_ops.items() if name != "barrier")
+
+    return {
+        "time": min(times),
+        "peak_memory": peak_memory,
+        "qubits": qc.num_qubits,
+        "gates": gates,
+        "count_ops": count_ops,
+        "depth": qc.depth(
+            filter_function=lambda inst: inst.operation.name != "barrier"
+        ),
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float = 0.2,
+) -> List[str]:
+    """Find regressions against the baseline.
+
+    Args:
+        results (Dict[str, Dict[str, Any]]): Metrics of the current run.
+        baseline (Dict[str, Dict[str, Any]]): Metrics of the previous run.
+        tolerance (float, optional): Allowed relative increase of time and memory. Defaults to 0.2.
+
+    Returns:
+        List[str]: Descriptions of regressions.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+
+        for metric in QUALITY_METRICS:
+            if metrics[metric] > base[metric]:
+                regressions.append(
+                    f"{name}: {metric} {base[metric]} -> {metrics[metric]}"
+                )
+
+        for metric in ["time", "peak_memory"]:
+            if metrics[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {metric} {base[metric]:.4g} -> {metrics[metric]:.4g}"
+                )
+
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--save", help="write results to the JSON file")
+    parser.add_argument("--compare", help="compare with results in the JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed relative increase of time and memory (default: 0.2)",
+    )
+    parser.add_argument("--filter", default="", help="run only matching workloads")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs (default: 3)")
+    parser.add_argument("--quick", action="store_true", help="only small sizes")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, build in get_workloads(args.quick).items():
+        if args.filter not in name:
+            continue
+        metrics = measure(build, args.repeat)
+        results[name] = metrics
+        print(
+            f"{name:32} {metrics['time'] * 1000:10.2f} ms"
+            f" {metrics['peak_memory'] / 2**20:8.2f} MiB"
+            f" {metrics['qubits']:8} qubits {metrics['gates']:8} gates"
+            f" {metrics['depth']:8} depth"
+        )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,13 @@
 Quantum adder circuit generator.
 """
 
+from typing import Dict, List, Sequence, Union
+
 from qiskit import QuantumRegister, AncillaRegister
 from qiskit.circuit import QuantumCircuit
 
+from . import ir
+
 
 def new_full_adder() -> QuantumCircuit:
     """Generate full adder circuit.
@@ -47,26 +51,307 @@ def new_inplace_full_adder() -> QuantumCircuit:
     return qc
 
 
-def new_adder(size: int) -> QuantumCircuit:
-    """Generate adder circuit.
+# Adder constructions
+RIPPLE = "ripple"
+LOOKAHEAD = "lookahead"
+
+METHODS = (RIPPLE, LOOKAHEAD)
+
+
+def get_lookahead_ancilla_count(size: int) -> int:
+    """Get the number of ancillas of the carry-lookahead adder.
 
     Args:
         size (int): Number of bits.
 
     Returns:
-        QuantumCircuit: Generated adder.
+        int: Number of qubits storing the propagate bits of the prefix tree.
     """
-    a = QuantumRegister(size, name="a")
-    b = QuantumRegister(size, name="b")
-    sm = QuantumRegister(size, name="sum")
+    count = 0
+    for t in range(1, size.bit_length() - 1):
+        count += max(0, size // 2**t - 1)
+    return count
+
+
+def append_lookahead_adder(
+    circuit: ir.Circuit,
+    a: Sequence[int],
+    b: Sequence[int],
+    z: Sequence[int],
+    ancillas: Sequence[int],
+):
+    """Append out-of-place carry-lookahead adder z <- a + b (Draper et al., 2004).
+
+    Carries are computed by a prefix tree of generate and propagate bits, so
+    the depth is O(log n) for n bits, at the cost of about 5 * n Toffoli
+    gates and `get_lookahead_ancilla_count` ancillas.
+
+    Args:
+        circuit (ir.Circuit): Circuit to append the gates to.
+        a (Sequence[int]): First summand, lowest bit first. It is restored.
+        b (Sequence[int]): Second summand of the same size. It is restored.
+        z (Sequence[int]): n + 1 qubits in 0 state, the sum with the carry out.
+        ancillas (Sequence[int]): Qubits in 0 state, see `get_lookahead_ancilla_count`. They are returned to 0.
+
+    Raises:
+        ValueError: Registers of wrong sizes.
+    """
+    size = len(a)
+    if len(b) != size or len(z) != size + 1:
+        raise ValueError(f"Expected summands of {size} bits and a sum of {size + 1}")
+    if len(ancillas) < get_lookahead_ancilla_count(size):
+        raise ValueError(
+            f"Expected {get_lookahead_ancilla_count(size)} ancillas, got {len(ancillas)}"
+        )
+
+    levels = size.bit_length() - 1
+    free = iter(ancillas)
+    # propagate[t][m] is the propagate bit of the block [2^t * m, 2^t * (m + 1))
+    propagate: List[Dict[int, int]] = [dict(enumerate(b))]
+    for t in range(1, levels):
+        propagate.append({m: next(free) for m in range(1, size // 2**t)})
+
+    def p_rounds(rounds: Sequence[int]):
+        for t in rounds:
+            for m in range(1, size // 2**t):
+                circuit.x(
+                    propagate[t][m],
+                    (propagate[t - 1][2 * m], propagate[t - 1][2 * m + 1]),
+                )
+
+    for i in range(size):
+        circuit.x(z[i + 1], (a[i], b[i]))
+    for i in range(size):
+        circuit.x(b[i], (a[i],))
+
+    p_rounds(range(1, levels))
+
+    # G rounds: carries out of the blocks
+    for t in range(1, levels + 1):
+        for m in range(size // 2**t):
+            circuit.x(
+                z[2**t * (m + 1)],
+                (z[2**t * m + 2 ** (t - 1)], propagate[t - 1][2 * m + 1]),
+            )
+
+    # C rounds: carries into the middles of the blocks
+    for t in range((2 * size // 3).bit_length() - 1, 0, -1):
+        for m in range(1, (size - 2 ** (t - 1)) // 2**t + 1):
+            circuit.x(
+                z[2**t * m + 2 ** (t - 1)],
+                (z[2**t * m], propagate[t - 1][2 * m]),
+            )
+
+    # Uncompute the propagate bits of the blocks
+    p_rounds(range(levels - 1, 0, -1))
+
+    for i in range(size):
+        circuit.x(z[i], (b[i],))
+    for i in range(size):
+        circuit.x(b[i], (a[i],))
+
+
+def new_adder(size: int, method: str = RIPPLE) -> QuantumCircuit:
+    """Generate adder circuit sum <- (a + b) mod 2^size.
+
+    The "ripple" adder uses 3 * size qubits and has depth linear in size.
+    The "lookahead" adder has depth logarithmic in size, but uses up to
+    size more ancillas and more than twice as many Toffoli gates. The qubits, ancillas,
+    Toffoli gates and depth are stored in the metadata of the circuit.
+
+    Args:
+        size (int): Number of bits.
+        method (str, optional): Construction, "ripple" or "lookahead". Defaults to "ripple".
+
+    Raises:
+        ValueError: Unknown method.
+
+    Returns:
+        QuantumCircuit: Generated adder with registers "a", "b", "sum" and "anc" for the lookahead ancillas.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown adder method: {method}")
+
+    if method == RIPPLE:
+        a = QuantumRegister(size, name="a")
+        b = QuantumRegister(size, name="b")
+        sm = QuantumRegister(size, name="sum")
+
+        qc = QuantumCircuit(a, b, sm, name="adder")
+
+        # Full adders are appended directly, composing is much slower
+        for i in range(size - 1):
+            qc.ccx(a[i], b[i], sm[i + 1])
+            qc.cx(a[i], b[i])
+            qc.ccx(b[i], sm[i], sm[i + 1])
+            qc.cx(b[i], sm[i])
+            qc.cx(a[i], b[i])
 
-    qc = QuantumCircuit(a, b, sm, name="adder")
-    full_adder = new_full_adder()
+        qc.cx(a[size - 1], sm[size - 1])
+        qc.cx(b[size - 1], sm[size - 1])
+        ancillas = 0
 
-    for i in range(size - 1):
-        qc.compose(full_adder, qubits=[a[i], b[i], sm[i], sm[i + 1]], inplace=True)
+    else:
+        circuit = ir.Circuit(name="adder")
+        registers = {
+            "a": circuit.add_qubits(size),
+            "b": circuit.add_qubits(size),
+            "sum": circuit.add_qubits(size),
+        }
+        # The carry out of the low bits is the carry into the highest one
+        ancillas = get_lookahead_ancilla_count(size - 1)
+        if ancillas:
+            registers["anc"] = circuit.add_qubits(ancillas)
 
-    qc.cx(a[size - 1], sm[size - 1])
-    qc.cx(b[size - 1], sm[size - 1])
+        a, b, sm = registers["a"], registers["b"], registers["sum"]
+        append_lookahead_adder(circuit, a[:-1], b[:-1], sm, registers.get("anc", []))
+        circuit.x(sm[-1], (a[-1],))
+        circuit.x(sm[-1], (b[-1],))
 
+        qc = circuit.to_qiskit(registers)
+
+    qc.metadata = {
+        "method": method,
+        "qubits": qc.num_qubits,
+        "ancillas": ancillas,
+        "toffoli": qc.count_ops().get("ccx", 0),
+        "depth": qc.depth(),
+    }
     return qc
+
+
+def append_inplace_adder(
+    circuit: ir.Circuit,
+    a: Sequence[int],
+    b: Sequence[int],
+    carry: int,
+    carry_out: Union[int, None] = None,
+    ctrl: Union[int, None] = None,
+):
+    """Append in-place ripple-carry adder b <- a + b (Cuccaro et al., 2004).
+
+    The carries are computed in place of a by MAJ gates and uncomputed by
+    UMA gates writing the sum to b, so only one ancilla is needed. Uses
+    2 * n Toffoli gates for n bits, 4 * n if controlled.
+
+    Args:
+        circuit (ir.Circuit): Circuit to append the gates to.
+        a (Sequence[int]): First summand, lowest bit first. It is restored.
+        b (Sequence[int]): Second summand of the same size, replaced by the sum modulo 2^n.
+        carry (int): Ancilla in 0 state. It is returned to 0.
+        carry_out (Union[int, None], optional): Qubit the carry out is XOR-ed to. Defaults to None.
+        ctrl (Union[int, None], optional): Control qubit, b is unchanged if it is 0. Defaults to None.
+
+    Raises:
+        ValueError: Summands of different sizes.
+    """
+    if len(a) != len(b):
+        raise ValueError(f"Summands of different sizes: {len(a)} and {len(b)}")
+    if not a:
+        return
+
+    size = len(a)
+    carries = [carry] + list(a[:-1])
+
+    # MAJ: a[i] <- carry into i + 1, b[i] <- a[i] ^ b[i], carries[i] <- a[i] ^ carries[i]
+    for i in range(size):
+        circuit.x(b[i], (a[i],))
+        circuit.x(carries[i], (a[i],))
+        circuit.x(a[i], (carries[i], b[i]))
+
+    if carry_out is not None:
+        circuit.x(carry_out, (a[-1],) if ctrl is None else (ctrl, a[-1]))
+
+    # UMA: restore a and carries[i], b[i] <- a[i] ^ b[i] ^ carries[i]
+    for i in range(size - 1, -1, -1):
+        circuit.x(a[i], (carries[i], b[i]))
+        circuit.x(carries[i], (a[i],))
+        if ctrl is None:
+            circuit.x(b[i], (carries[i],))
+        else:
+            circuit.x(b[i], (a[i],))
+            circuit.x(b[i], (ctrl, a[i]))
+            circuit.x(b[i], (ctrl, carries[i]))
+
+
+def append_carry(
+    circuit: ir.Circuit,
+    a: Sequence[int],
+    b: Sequence[int],
+    carry: int,
+    carry_out: int,
+    ctrl: Union[int, None] = None,
+):
+    """Append circuit XOR-ing the carry out of a + b to a qubit.
+
+    The MAJ gates of the ripple-carry adder compute the carry out in place
+    of a, then they are undone, so both summands are restored. Uses 2 * n
+    Toffoli gates for n bits and one ancilla. The carry out of ~a + b is
+    a < b, so this is also a comparator.
+
+    Args:
+        circuit (ir.Circuit): Circuit to append the gates to.
+        a (Sequence[int]): First summand, lowest bit first. It is restored.
+        b (Sequence[int]): Second summand of the same size. It is restored.
+        carry (int): Ancilla in 0 state. It is returned to 0.
+        carry_out (int): Qubit the carry out is XOR-ed to.
+        ctrl (Union[int, None], optional): Control qubit, carry_out is unchanged if it is 0. Defaults to None.
+
+    Raises:
+        ValueError: Summands of different sizes.
+    """
+    if len(a) != len(b):
+        raise ValueError(f"Summands of different sizes: {len(a)} and {len(b)}")
+    if not a:
+        return
+
+    size = len(a)
+    carries = [carry] + list(a[:-1])
+
+    for i in range(size):
+        circuit.x(b[i], (a[i],))
+        circuit.x(carries[i], (a[i],))
+        circuit.x(a[i], (carries[i], b[i]))
+
+    circuit.x(carry_out, (a[-1],) if ctrl is None else (ctrl, a[-1]))
+
+    for i in range(size - 1, -1, -1):
+        circuit.x(a[i], (carries[i], b[i]))
+        circuit.x(carries[i], (a[i],))
+        circuit.x(b[i], (a[i],))
+
+
+def new_inplace_adder(
+    size: int, controlled: bool = False, carry_out: bool = False
+) -> QuantumCircuit:
+    """Generate in-place adder circuit b <- a + b with one ancilla.
+
+    See `append_inplace_adder`.
+
+    Args:
+        size (int): Number of bits.
+        controlled (bool, optional): Add control qubit "ctrl". Defaults to False.
+        carry_out (bool, optional): Add qubit "cout" the carry out is XOR-ed to. Defaults to False.
+
+    Returns:
+        QuantumCircuit: Generated adder with registers "a", "b", optional "cout" and "ctrl" and ancilla "anc".
+    """
+    circuit = ir.Circuit(name="inplace_adder")
+    registers = {}
+    registers["a"] = circuit.add_qubits(size)
+    registers["b"] = circuit.add_qubits(size)
+    if carry_out:
+        registers["cout"] = circuit.add_qubits(1)
+    if controlled:
+        registers["ctrl"] = circuit.add_qubits(1)
+    registers["anc"] = circuit.add_qubits(1)
+
+    append_inplace_adder(
+        circuit,
+        registers["a"],
+        registers["b"],
+        registers["anc"][0],
+        registers["cout"][0] if carry_out else None,
+        registers["ctrl"][0] if controlled else None,
+    )
+    return circuit.to_qiskit(registers)
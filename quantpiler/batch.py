@@ -0,0 +1,95 @@
+"""
+Parallel compilation of many functions.
+"""
+
+from typing import Any, Callable, Dict, List, Sequence, Union
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import pickle
+
+from . import compiler
+
+
+def compile_source(
+    source: str, options: Dict[str, Any]
+) -> Union["compiler.CompiledFunction", Exception]:
+    """Compile the source code, returning the error instead of raising it.
+
+    Args:
+        source (str): Source code of the function.
+        options (Dict[str, Any]): Options passed to the `Compiler`.
+
+    Returns:
+        Union[CompiledFunction, Exception]: The compiled function or the error.
+    """
+    try:
+        comp = compiler.Compiler(**options)
+        comp.assemble_source(source)
+        return comp.get_compiled()
+    except Exception as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            # The error must be sent back from the worker process
+            return RuntimeError(f"{type(e).__name__}: {e}")
+        return e
+
+
+def compile_many(
+    funcs: Sequence[Union[Callable, str]],
+    max_workers: Union[int, None] = None,
+    **options,
+) -> List[Union["compiler.CompiledFunction", Exception]]:
+    """Compile functions in a pool of processes.
+
+    Functions are sent to the workers as source code, so they don't have to
+    be picklable, but the options do.
+
+    Args:
+        funcs (Sequence[Union[Callable, str]]): Functions or their source code.
+        max_workers (Union[int, None], optional): Number of processes, 1 compiles in the current process. Defaults to the number of CPUs.
+        **options: Options passed to the `Compiler`.
+
+    Returns:
+        List[Union[CompiledFunction, Exception]]: The compiled function or the error of every item, in the order of funcs.
+    """
+    results: List[Union["compiler.CompiledFunction", Exception, None]] = [None] * len(
+        funcs
+    )
+    sources: List[str] = []
+    indices: List[int] = []
+
+    for index, func in enumerate(funcs):
+        if isinstance(func, str):
+            sources.append(func)
+            indices.append(index)
+            continue
+        try:
+            sources.append(compiler.get_source(func))
+            indices.append(index)
+        except Exception as e:
+            results[index] = e
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(sources))
+
+    if max_workers <= 1:
+        compiled = [compile_source(source, options) for source in sources]
+    else:
+        # Few large chunks keep the workers busy with little IPC overhead
+        chunksize = max(1, len(sources) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers) as executor:
+            compiled = list(
+                executor.map(
+                    compile_source,
+                    sources,
+                    [options] * len(sources),
+                    chunksize=chunksize,
+                )
+            )
+
+    for index, result in zip(indices, compiled):
+        results[index] = result
+    return results
@@ -0,0 +1,168 @@
+"""
+Cache of compiled functions.
+"""
+
+from typing import Any, Callable, Dict, Union
+
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from . import __version__
+from . import compiler
+
+
+def get_cache_key(
+    source: str, annotations: Dict[str, Any], options: Dict[str, Any]
+) -> str:
+    """Get the cache key of the compiled function.
+
+    Args:
+        source (str): Dedented source code of the function.
+        annotations (Dict[str, Any]): Function annotations (argument and return sizes).
+        options (Dict[str, Any]): Compiler options.
+
+    Returns:
+        str: Hex digest identifying the compiled function.
+    """
+    data = json.dumps(
+        {
+            "version": __version__,
+            "source": source,
+            "annotations": {name: repr(ann) for name, ann in annotations.items()},
+            "options": options,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class CompileCache:
+    """LRU cache of compiled functions with optional on-disk storage.
+
+    Every lookup returns a copy of the cached function, so callers are free to
+    modify the returned circuit.
+    """
+
+    maxsize: int = 128
+    cache_dir: Union[str, None] = None
+    entries: "OrderedDict[str, compiler.CompiledFunction]" = None
+
+    def __init__(self, maxsize: int = 128, cache_dir: Union[str, None] = None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self):
+        """Remove all in-memory entries. Files in the cache directory are kept."""
+        self.entries.clear()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pickle")
+
+    def load(self, key: str) -> "Union[compiler.CompiledFunction, None]":
+        """Load compiled function from the cache directory.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Union[CompiledFunction, None]: The stored function or None if it is missing or unreadable.
+        """
+        if self.cache_dir is None:
+            return None
+
+        try:
+            with open(self.get_path(key), "rb") as f:
+                compiled = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+        if not isinstance(compiled, compiler.CompiledFunction):
+            return None
+        return compiled
+
+    def store(self, key: str, compiled: "compiler.CompiledFunction"):
+        """Atomically save compiled function to the cache directory.
+
+        Args:
+            key (str): Cache key.
+            compiled (CompiledFunction): Function to save.
+        """
+        if self.cache_dir is None:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(compiled, f)
+            os.replace(tmp_path, self.get_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def put(self, key: str, compiled: "compiler.CompiledFunction"):
+        self.entries[key] = compiled
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def compile(self, func: Callable, **options) -> "compiler.CompiledFunction":
+        """Compile function or return a copy of the cached result.
+
+        Args:
+            func (Callable): Function to compile.
+            **options: Options passed to the `Compiler`.
+
+        Returns:
+            CompiledFunction: The compiled function.
+        """
+        source = compiler.get_source(func)
+        comp = compiler.Compiler(**options)
+        key = get_cache_key(
+            source, getattr(func, "__annotations__", {}), comp.get_options()
+        )
+
+        compiled = self.entries.get(key)
+        if compiled is not None:
+            self.entries.move_to_end(key)
+            return compiled.copy()
+
+        compiled = self.load(key)
+        if compiled is None:
+            comp.assemble_source(source)
+            compiled = comp.get_compiled()
+            self.store(key, compiled)
+
+        self.put(key, compiled)
+        return compiled.copy()
+
+
+default_cache = CompileCache()
+
+
+def compile_cached(
+    func: Callable, cache: Union[CompileCache, None] = None, **options
+) -> "compiler.CompiledFunction":
+    """Compile function using the cache.
+
+    Args:
+        func (Callable): Function to compile.
+        cache (Union[CompileCache, None], optional): Cache to use. Defaults to the in-process default cache.
+        **options: Options passed to the `Compiler`.
+
+    Returns:
+        CompiledFunction: Copy of the compiled function.
+    """
+    if cache is None:
+        cache = default_cache
+    return cache.compile(func, **options)
@@ -2,26 +2,45 @@
 Python -> QuantumCircuit compiler.
 """
 
-from typing import Callable, Dict, List, Union
+from typing import Any, Callable, Dict, Hashable, List, Set, Tuple, Union
 
 import ast
 import inspect
+import operator
 import textwrap
+import time
 
-from qiskit.circuit.quantumregister import Qubit, AncillaQubit
-from qiskit import QuantumRegister, AncillaRegister
+from qiskit import QuantumRegister
 from qiskit.circuit import QuantumCircuit
 
+from . import adder
+from . import decompose
+from . import hooks as hooks_module
+from . import ir
+from . import optimizer
+from . import report
+from . import resources
+from . import scheduler
 from . import utils
 from .qreg import QReg
 
 
 def get_args_vars(func: Callable) -> Dict[str, int]:
+    return get_ast_args_vars(get_ast(func).body[0])
+
+
+def get_ast_args_vars(func: ast.FunctionDef) -> Dict[str, int]:
+    """Get the size of every argument of the quantum function.
+
+    Args:
+        func (ast.FunctionDef): AST of the quantum function.
+
+    Returns:
+        Dict[str, int]: Argument sizes by name.
+    """
     args_vars: Dict[str, int] = {}
 
-    st = get_ast(func)
-    args = st.body[0].args.args
-    for arg in args:
+    for arg in func.args.args:
         args_vars[arg.arg] = arg.annotation.value
 
     return args_vars
@@ -36,13 +55,36 @@ def get_return_size(func: Callable) -> int:
     Returns:
         int: 0 if the function returns nothing, otherwise the return size.
     """
-    st = get_ast(func)
+    return get_ast_return_size(get_ast(func).body[0])
+
+
+def get_ast_return_size(func: ast.FunctionDef) -> int:
+    """Get the return size of the quantum function.
+
+    Args:
+        func (ast.FunctionDef): AST of the quantum function.
+
+    Returns:
+        int: 0 if the function returns nothing, otherwise the return size.
+    """
     try:
-        return st.body[0].returns.value
+        return func.returns.value
     except AttributeError:
         return 0
 
 
+def get_source(module) -> str:
+    """Get the dedented source code of the python module.
+
+    Args:
+        module: Python module.
+
+    Returns:
+        str: The source code.
+    """
+    return textwrap.dedent(inspect.getsource(module))
+
+
 def get_ast(module) -> ast.AST:
     """Get the AST of the python module.
 
@@ -52,9 +94,7 @@ def get_ast(module) -> ast.AST:
     Returns:
         ast.AST: The resulting AST.
     """
-    source = inspect.getsource(module)
-    source = textwrap.dedent(source)
-    return ast.parse(source)
+    return ast.parse(get_source(module))
 
 
 def get_used_vars(op: ast.AST) -> List[str]:
@@ -70,6 +110,9 @@ def get_used_vars(op: ast.AST) -> List[str]:
         elif op_type == ast.BinOp:
             for val in [_op.left, _op.right]:
                 guv(val, _vars)
+        elif op_type == ast.Compare:
+            for val in [_op.left] + _op.comparators:
+                guv(val, _vars)
         else:
             raise NotImplementedError()
 
@@ -77,6 +120,119 @@ def get_used_vars(op: ast.AST) -> List[str]:
     return variables
 
 
+def get_loaded_vars(node: ast.AST) -> Set[str]:
+    """Get the names of all variables read in the AST node, including nested blocks.
+
+    Args:
+        node (ast.AST): AST node.
+
+    Returns:
+        Set[str]: Variable names.
+    """
+    return {
+        sub.id
+        for sub in ast.walk(node)
+        if type(sub) == ast.Name and type(sub.ctx) == ast.Load
+    }
+
+
+def count_var_loads(node: ast.AST, name: str) -> int:
+    """Count how many times the variable is read in the AST node.
+
+    Args:
+        node (ast.AST): AST node.
+        name (str): Variable name.
+
+    Returns:
+        int: Number of reads.
+    """
+    return sum(
+        1
+        for sub in ast.walk(node)
+        if type(sub) == ast.Name and type(sub.ctx) == ast.Load and sub.id == name
+    )
+
+
+def get_mentioned_vars(node: ast.AST) -> Set[str]:
+    """Get the names of all variables read or assigned in the AST node.
+
+    Args:
+        node (ast.AST): AST node.
+
+    Returns:
+        Set[str]: Variable names.
+    """
+    return {sub.id for sub in ast.walk(node) if type(sub) == ast.Name}
+
+
+def get_live_vars(
+    instructions: List[ast.AST], live_out: Set[str], conditional: bool = False
+) -> List[Set[str]]:
+    """Calculate variables whose values are still needed after every instruction.
+
+    Both branches of `If` are assembled one after another, so variables read
+    in the `else` branch or in the condition are alive during the body.
+
+    Assignments in a conditional block may not happen, so they don't kill
+    the variables needed after the block: their values from before the
+    block are kept alive until its end.
+
+    Args:
+        instructions (List[ast.AST]): Instructions of the block.
+        live_out (Set[str]): Variables needed after the block.
+        conditional (bool, optional): The block is a branch of `If`. Defaults to False.
+
+    Returns:
+        List[Set[str]]: Live variables after every instruction.
+    """
+    live_after: List[Set[str]] = [set()] * len(instructions)
+    keep = set(live_out) if conditional else set()
+
+    live = set(live_out)
+    for i in range(len(instructions) - 1, -1, -1):
+        live_after[i] = live
+        live = get_live_in(instructions[i], live) | keep
+
+    return live_after
+
+
+def get_live_in(instruction: ast.AST, live_out: Set[str]) -> Set[str]:
+    """Calculate variables needed before the instruction.
+
+    Args:
+        instruction (ast.AST): Instruction.
+        live_out (Set[str]): Variables needed after the instruction.
+
+    Returns:
+        Set[str]: Live variables before the instruction.
+    """
+    inst_type = type(instruction)
+
+    if inst_type == ast.Assign or inst_type == ast.AnnAssign:
+        if inst_type == ast.Assign:
+            target = instruction.targets[0]
+        else:
+            target = instruction.target
+        return get_loaded_vars(instruction.value) | (live_out - {target.id})
+    elif inst_type == ast.Return:
+        return get_loaded_vars(instruction)
+    elif inst_type == ast.If:
+        # Assignments in branches are conditional, so they don't kill variables
+        test_vars = get_loaded_vars(instruction.test)
+        orelse_live = get_block_live_in(instruction.orelse, live_out | test_vars)
+        body_live = get_block_live_in(instruction.body, orelse_live | test_vars)
+        return body_live | live_out | test_vars
+    else:
+        return get_loaded_vars(instruction) | live_out
+
+
+def get_block_live_in(instructions: List[ast.AST], live_out: Set[str]) -> Set[str]:
+    live = set(live_out)
+    for inst in reversed(instructions):
+        live = get_live_in(inst, live)
+    return live
+
+
 def unwrap_ops_chain(op: ast.AST, t: ast.AST) -> List[ast.AST]:
     sources: List[ast.AST] = []
 
@@ -91,6 +247,278 @@ def unwrap_ops_chain(op: ast.AST, t: ast.AST) -> List[ast.AST]:
     return sources
 
 
+# Commutative operations unwrapped into chains
+CHAIN_OPS = {ast.BitXor: "^", ast.BitAnd: "&", ast.BitOr: "|"}
+SHIFT_OPS = {ast.LShift: "<<", ast.RShift: ">>"}
+ARITH_OPS = {ast.Add: "+", ast.Sub: "-"}
+COMPARE_OPS = {
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+}
+COMPARE_FUNCS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+# Comparison with swapped operands: a < b is b > a
+SWAPPED_COMPARE_OPS = {
+    ast.Eq: ast.Eq,
+    ast.NotEq: ast.NotEq,
+    ast.Lt: ast.Gt,
+    ast.LtE: ast.GtE,
+    ast.Gt: ast.Lt,
+    ast.GtE: ast.LtE,
+}
+
+
+def is_simple_compare(op: ast.AST) -> bool:
+    """Check if the operation is a supported comparison of two operands.
+
+    Args:
+        op (ast.AST): AST operation.
+
+    Returns:
+        bool: True for ==, !=, <, <=, > and >= without chaining.
+    """
+    return (
+        type(op) == ast.Compare and len(op.ops) == 1 and type(op.ops[0]) in COMPARE_OPS
+    )
+
+
+def get_expr_operands(op: ast.AST) -> List[ast.AST]:
+    """Get the operands which are assembled before the operation.
+
+    Args:
+        op (ast.AST): AST operation.
+
+    Returns:
+        List[ast.AST]: Operands.
+    """
+    if type(op) == ast.UnaryOp:
+        return [op.operand]
+    elif type(op) == ast.BinOp and type(op.op) in CHAIN_OPS:
+        return unwrap_ops_chain(op, type(op.op))
+    elif type(op) == ast.BinOp and type(op.op) in SHIFT_OPS:
+        return [op.left]
+    elif type(op) == ast.BinOp and type(op.op) in ARITH_OPS:
+        return [op.left, op.right]
+    elif is_simple_compare(op):
+        return [op.left, op.comparators[0]]
+    else:
+        return []
+
+
+def get_expr_key(
+    op: ast.AST, versions: Dict[str, int], limit: int = float("inf")
+) -> Union[Hashable, None]:
+    """Get the key identifying the value of an expression.
+
+    Expressions with equal keys have equal values: they apply the same
+    operations to the same versions of variables. Operands of commutative
+    operations are sorted.
+
+    Args:
+        op (ast.AST): AST operation.
+        versions (Dict[str, int]): Number of assignments of every variable.
+        limit (int, optional): Result size limit. Defaults to float("inf").
+
+    Returns:
+        Union[Hashable, None]: The key or None if the expression is a variable or unsupported.
+    """
+    op_type = type(op)
+
+    if op_type == ast.Call:
+        key = ("const", op.args[0].value)
+    elif op_type == ast.UnaryOp and type(op.op) == ast.Invert:
+        key = ("~",)
+    elif op_type == ast.BinOp and type(op.op) in CHAIN_OPS:
+        key = (CHAIN_OPS[type(op.op)],)
+    elif op_type == ast.BinOp and type(op.op) in SHIFT_OPS:
+        key = (SHIFT_OPS[type(op.op)], op.right.value)
+    elif op_type == ast.BinOp and type(op.op) in ARITH_OPS:
+        key = (ARITH_OPS[type(op.op)],)
+    elif is_simple_compare(op):
+        key = (COMPARE_OPS[type(op.ops[0])],)
+    else:
+        return None
+
+    operand_keys = []
+    for operand in get_expr_operands(op):
+        if type(operand) == ast.Name:
+            operand_key = ("var", operand.id, versions.get(operand.id, 0))
+        else:
+            operand_key = get_expr_key(operand, versions)
+            if operand_key is None:
+                return None
+        operand_keys.append(operand_key)
+
+    if key[0] in CHAIN_OPS.values() or key[0] in ("+", "==", "!="):
+        operand_keys.sort(key=repr)
+
+    return key + tuple(operand_keys) + (None if limit == float("inf") else limit,)
+
+
+def get_const(op: ast.AST) -> Union[Tuple[int, int], None]:
+    """Evaluate an expression without variables.
+
+    Args:
+        op (ast.AST): AST operation.
+
+    Returns:
+        Union[Tuple[int, int], None]: Value and size of the result or None if the expression isn't constant.
+    """
+    op_type = type(op)
+
+    if op_type == ast.Call:
+        if len(op.args) != 1 or type(op.args[0]) != ast.Constant:
+            return None
+        value = op.args[0].value
+        if type(value) != int or value < 0:
+            return None
+        return value, utils.get_uint_len(value)
+
+    elif op_type == ast.UnaryOp and type(op.op) == ast.Invert:
+        const = get_const(op.operand)
+        if const is None:
+            return None
+        value, size = const
+        return ~value & ((1 << size) - 1), size
+
+    elif op_type == ast.BinOp and type(op.op) in CHAIN_OPS:
+        consts = [get_const(operand) for operand in get_expr_operands(op)]
+        if None in consts:
+            return None
+        return fold_consts(type(op.op), consts)
+
+    elif op_type == ast.BinOp and type(op.op) in SHIFT_OPS:
+        const = get_const(op.left)
+        if const is None:
+            return None
+        value, size = const
+        distance = op.right.value
+        if type(op.op) == ast.LShift:
+            return value << distance, size + distance
+        else:
+            return value >> distance, max(size - distance, 0)
+
+    elif op_type == ast.BinOp and type(op.op) in ARITH_OPS:
+        left, right = get_const(op.left), get_const(op.right)
+        if left is None or right is None:
+            return None
+        size = max(left[1], right[1])
+        if type(op.op) == ast.Add:
+            return left[0] + right[0], size + 1
+        else:
+            return (left[0] - right[0]) & ((1 << size) - 1), size
+
+    elif is_simple_compare(op):
+        left, right = get_const(op.left), get_const(op.comparators[0])
+        if left is None or right is None:
+            return None
+        return int(COMPARE_FUNCS[type(op.ops[0])](left[0], right[0])), 1
+
+    return None
+
+
+def fold_consts(
+    op_type: type, consts: List[Tuple[int, int]]
+) -> Union[Tuple[int, int], None]:
+    """Apply XOR, AND or OR to constants.
+
+    Args:
+        op_type (type): ast.BitXor, ast.BitAnd or ast.BitOr.
+        consts (List[Tuple[int, int]]): Values and sizes of constants.
+
+    Returns:
+        Union[Tuple[int, int], None]: Value and size of the result or None if there are no constants.
+    """
+    if not consts:
+        return None
+
+    value, size = consts[0]
+    for const_value, const_size in consts[1:]:
+        if op_type == ast.BitXor:
+            value, size = value ^ const_value, max(size, const_size)
+        elif op_type == ast.BitAnd:
+            value, size = value & const_value, min(size, const_size)
+        else:
+            value, size = value | const_value, max(size, const_size)
+
+    return value & ((1 << size) - 1), size
+
+
+def count_expr_uses(
+    instructions: List[ast.AST], versions: Dict[str, int]
+) -> Dict[Hashable, int]:
+    """Count how many times the value of every expression is requested.
+
+    The value of a repeated expression is reused, so its operands are
+    requested only once. Expressions under conditions are not counted.
+
+    Args:
+        instructions (List[ast.AST]): Instructions of the function.
+        versions (Dict[str, int]): Number of assignments of every variable before the instructions.
+
+    Returns:
+        Dict[Hashable, int]: Number of uses by expression key.
+    """
+    versions = dict(versions)
+    uses: Dict[Hashable, int] = {}
+
+    def add_uses(op: ast.AST, limit: int = float("inf")):
+        key = get_expr_key(op, versions, limit)
+        if key is None:
+            return
+
+        uses[key] = uses.get(key, 0) + 1
+        if uses[key] == 1:
+            for operand in get_expr_operands(op):
+                add_uses(operand)
+
+    def add_assignments(instructions: List[ast.AST]):
+        for inst in instructions:
+            if type(inst) == ast.Assign:
+                name = inst.targets[0].id
+                versions[name] = versions.get(name, 0) + 1
+            elif type(inst) == ast.AnnAssign:
+                name = inst.target.id
+                versions[name] = versions.get(name, 0) + 1
+            elif type(inst) == ast.If:
+                const = get_const(inst.test)
+                if const is None or const[0]:
+                    add_assignments(inst.body)
+                if const is None or not const[0]:
+                    add_assignments(inst.orelse)
+
+    def add_block(instructions: List[ast.AST]):
+        for inst in instructions:
+            inst_type = type(inst)
+            if inst_type == ast.Assign:
+                add_uses(inst.value)
+            elif inst_type == ast.AnnAssign:
+                add_uses(inst.value, inst.annotation.value)
+            elif inst_type == ast.Return:
+                add_uses(inst.value)
+            elif inst_type == ast.If:
+                const = get_const(inst.test)
+                if const is not None:
+                    # Folded condition, the branch is assembled unconditionally
+                    add_block(inst.body if const[0] else inst.orelse)
+                    continue
+                add_uses(inst.test)
+            add_assignments([inst])
+
+    add_block(instructions)
+    return uses
+
+
 def get_tmp_regs(regs: List[QReg]) -> List[QReg]:
     """Get all temporary registers from the given registers.
 
@@ -143,58 +571,484 @@ def get_min_reg(regs: List[QReg]) -> Union[QReg, None]:
         return None
 
 
+class CompiledFunction:
+    """Compiled quantum function.
+
+    Registers are stored as qubit ids of the circuit, so the compiled function
+    can be copied and pickled independently of the compiler. The circuit is
+    lowered to qiskit on the first `get_qc` call.
+    """
+
+    circuit: ir.Circuit = None
+    arguments: Dict[str, List[int]] = {}
+    ret: Union[List[int], None] = None
+    qc: Union[QuantumCircuit, None] = None
+
+    def __init__(
+        self,
+        circuit: ir.Circuit,
+        arguments: Dict[str, List[int]],
+        ret: Union[List[int], None],
+    ):
+        self.circuit = circuit
+        self.arguments = arguments
+        self.ret = ret
+        self.qc = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["qc"] = None
+        return state
+
+    def copy(self) -> "CompiledFunction":
+        ret = None if self.ret is None else list(self.ret)
+        arguments = {name: list(bits) for name, bits in self.arguments.items()}
+        return CompiledFunction(self.circuit.copy(), arguments, ret)
+
+    def get_circuit(self) -> ir.Circuit:
+        return self.circuit
+
+    def get_qc(self) -> QuantumCircuit:
+        if self.qc is None:
+            self.qc = self.circuit.to_qiskit(self.arguments)
+        return self.qc
+
+    def get_ret(self) -> Union[QuantumRegister, None]:
+        if self.ret is None:
+            return None
+        qc = self.get_qc()
+        return QuantumRegister(bits=[qc.qubits[i] for i in self.ret])
+
+    def get_arguments(self) -> Dict[str, QuantumRegister]:
+        qc = self.get_qc()
+        return {
+            name: QuantumRegister(bits=[qc.qubits[i] for i in bits])
+            for name, bits in self.arguments.items()
+        }
+
+
 class Compiler:
-    qc: QuantumCircuit = None
-    # TODO: variables lifetime calculation
+    circuit: ir.Circuit = None
     variables: Dict[str, QReg] = {}
     arguments: Dict[str, QReg] = {}
-    conditions: List[Qubit] = []
+    conditions: List[int] = []
     ret: QReg = None
-    bits: List[Qubit] = []
+    bits: List[int] = []
     add_barriers: bool = True
+    free_dead_variables: bool = True
+    clean_ancillas: bool = False
+    optimize: bool = False
+    eliminate_common_subexpressions: bool = True
+    mcx_mode: Union[str, None] = None
+    schedule: bool = False
+    dry_run: bool = False
+    hooks: List["hooks_module.Hook"] = []
+    peak_qubits: int = 0
+    versions: Dict[str, int] = {}
+    expressions: Dict[Hashable, QReg] = {}
+    expr_uses: Dict[Hashable, int] = {}
+    allocated: List[int] = []
+    source: Union[str, None] = None
+    line_times: Dict[int, float] = {}
+    nested_times: List[float] = []
+    qc: QuantumCircuit = None
+    qc_gates: int = 0
+
+    def __init__(
+        self,
+        add_barriers: bool = True,
+        free_dead_variables: bool = True,
+        clean_ancillas: bool = False,
+        optimize: bool = False,
+        eliminate_common_subexpressions: bool = True,
+        mcx_mode: Union[str, None] = None,
+        schedule: bool = False,
+        dry_run: bool = False,
+        hooks: Union[List["hooks_module.Hook"], None] = None,
+    ):
+        """Create compiler.
 
-    def __init__(self):
+        Args:
+            add_barriers (bool, optional): Add barrier after every operation. Defaults to True.
+            free_dead_variables (bool, optional): Reuse qubits of variables after their last use. Defaults to True.
+            clean_ancillas (bool, optional): Uncompute temporaries instead of resetting them, so the circuit is reversible and all ancillas end in 0. Defaults to False.
+            optimize (bool, optional): Run peephole optimizations on the compiled circuit. Barriers are removed. Defaults to False.
+            eliminate_common_subexpressions (bool, optional): Reuse the value of an expression that was already computed. Defaults to True.
+            mcx_mode (Union[str, None], optional): Decompose multi-controlled X gates into Toffoli gates using ancillas, see `decompose.decompose_mcx` for the modes. Defaults to None (no decomposition).
+            schedule (bool, optional): Reorder commuting gates into parallel layers to minimize the depth. Defaults to False.
+            dry_run (bool, optional): Only count the resources, see `get_resources`. No circuit is built and the circuit passes are skipped. Defaults to False.
+            hooks (Union[List[hooks.Hook], None], optional): Hooks called around the compilation phases, see `hooks`. They don't affect the circuit. Defaults to None.
+        """
+        self.circuit = None
         self.qc = None
         self.variables = {}
         self.arguments = {}
         self.conditions = []
         self.ret = None
         self.bits = []
-        self.add_barriers = True
+        self.free_bits: Set[int] = set()
+        self.bit_drops: Dict[int, int] = {}
+        self.allocated = []
+        self.add_barriers = add_barriers
+        self.free_dead_variables = free_dead_variables
+        self.clean_ancillas = clean_ancillas
+        self.optimize = optimize
+        self.eliminate_common_subexpressions = eliminate_common_subexpressions
+        self.mcx_mode = mcx_mode
+        self.schedule = schedule
+        self.dry_run = dry_run
+        self.hooks = [] if hooks is None else list(hooks)
+        self.peak_qubits = 0
+        self.versions = {}
+        self.expressions = {}
+        self.expired_expressions = []
+        self.expr_uses = {}
+        self.source = None
+        self.line_times = {}
+        self.nested_times = []
+
+    def get_options(self) -> Dict[str, Any]:
+        """Get the options affecting the compiled circuit.
+
+        Returns:
+            Dict[str, Any]: Options passed to the constructor.
+        """
+        return {
+            "add_barriers": self.add_barriers,
+            "free_dead_variables": self.free_dead_variables,
+            "clean_ancillas": self.clean_ancillas,
+            "optimize": self.optimize,
+            "eliminate_common_subexpressions": self.eliminate_common_subexpressions,
+            "mcx_mode": self.mcx_mode,
+            "schedule": self.schedule,
+            "dry_run": self.dry_run,
+        }
+
+    def run_phase(
+        self, phase: str, node: Union[ast.AST, None], func: Callable, *args, **kwargs
+    ) -> Any:
+        """Call the function, notifying the hooks.
 
-    def set_qc(self, qc: QuantumCircuit):
-        self.qc = qc
+        Args:
+            phase (str): Phase name.
+            node (Union[ast.AST, None]): Compiled AST node.
+            func (Callable): Function running the phase.
+            *args: Arguments of the function.
+            **kwargs: Keyword arguments of the function.
+
+        Returns:
+            Any: Result of the function.
+        """
+        if not self.hooks:
+            return func(*args, **kwargs)
+
+        for hook in self.hooks:
+            hook.on_enter(phase, node)
+
+        circuit = self.circuit
+        gates = 0 if circuit is None else len(circuit)
+        qubits = 0 if circuit is None else circuit.num_qubits
+        start = time.perf_counter()
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            circuit = self.circuit
+            counters = {
+                "gates": (0 if circuit is None else len(circuit)) - gates,
+                "qubits": (0 if circuit is None else circuit.num_qubits) - qubits,
+            }
+            for hook in reversed(self.hooks):
+                hook.on_exit(phase, node, elapsed, counters)
+
+    def set_circuit(self, circuit: ir.Circuit):
+        self.circuit = circuit
+        self.qc = None
 
     def assemble(self, func: Callable) -> QuantumCircuit:
+        self.assemble_source(get_source(func))
+
+    def assemble_source(self, source: str):
+        """Compile the first function defined in the source code.
+
+        Args:
+            source (str): Python source code.
+        """
+        func = self.run_phase("parse", None, ast.parse, source).body[0]
+
         # Create quantum circuit
-        self.qc = QuantumCircuit(name=func.__name__)
+        if self.dry_run:
+            self.set_circuit(resources.ResourceCounter(name=func.name))
+        else:
+            self.set_circuit(ir.Circuit(name=func.name))
+        self.peak_qubits = 0
+        self.source = source
+        self.line_times = {}
+        self.nested_times = []
 
         # Create qreg for every function's argument
-        args_vars = get_args_vars(func)
+        self.circuit.line = func.lineno
+        args_vars = get_ast_args_vars(func)
         for arg_name, arg_bitness in args_vars.items():
             self.arguments[arg_name] = self.create_reg(arg_bitness)
 
         self.variables = self.arguments.copy()
+        self.allocated = []
+        self.versions = {}
+        self.expressions = {}
+        self.expired_expressions = []
+        self.expr_uses = {}
 
         # Compile function
-        st = get_ast(func)
-        self.assemble_function(st.body[0])
+        self.assemble_function(func)
+
+        if self.dry_run:
+            return
+
+        inputs = [bit for reg in self.arguments.values() for bit in reg]
+
+        if self.optimize:
+            self.run_phase(
+                "optimize",
+                None,
+                lambda: self.set_circuit(optimizer.optimize(self.circuit, inputs)),
+            )
+
+        if self.mcx_mode is not None:
+            self.run_phase(
+                "decompose",
+                None,
+                lambda: self.set_circuit(
+                    decompose.decompose_mcx(self.circuit, self.mcx_mode, inputs)
+                ),
+            )
+
+        if self.schedule:
+            self.run_phase(
+                "schedule",
+                None,
+                lambda: self.set_circuit(scheduler.schedule(self.circuit)),
+            )
+
+    def get_circuit(self) -> ir.Circuit:
+        return self.circuit
 
     def get_qc(self) -> QuantumCircuit:
+        """Lower the compiled circuit to qiskit.
+
+        The result is reused until new gates are emitted.
+
+        Raises:
+            ValueError: The compiler only counts resources.
+
+        Returns:
+            QuantumCircuit: The lowered circuit.
+        """
+        if self.dry_run:
+            raise ValueError("No circuit is built in dry run mode")
+
+        if self.qc is None or self.qc_gates != len(self.circuit):
+            self.qc = self.run_phase(
+                "lower", None, self.circuit.to_qiskit, self.arguments
+            )
+            self.qc_gates = len(self.circuit)
         return self.qc
 
     def get_ret(self) -> QuantumRegister:
-        return self.ret
+        """Get the register with the result in the lowered circuit.
+
+        Returns:
+            QuantumRegister: The result register or None if the function returns nothing.
+        """
+        if self.ret is None:
+            return None
+        qc = self.get_qc()
+        return QuantumRegister(bits=[qc.qubits[i] for i in self.ret])
+
+    def get_resources(self) -> "resources.Resources":
+        """Get the resources of the compiled function.
+
+        Returns:
+            Resources: Qubit and gate counts.
+        """
+        if self.dry_run:
+            return self.circuit.get_resources(self.peak_qubits)
+
+        counter = resources.ResourceCounter(self.circuit.name, self.circuit.num_qubits)
+        counter.extend(self.circuit)
+        return counter.get_resources(self.peak_qubits)
+
+    def get_line_report(self) -> List["report.LineResources"]:
+        """Get the qubits, gates and compile time of every source line.
+
+        Returns:
+            List[report.LineResources]: Resources of the lines, see `report.get_line_report`.
+        """
+        return report.get_line_report(self.circuit, self.source, self.line_times)
+
+    def get_compiled(self) -> CompiledFunction:
+        """Get the compiled function independent of the compiler.
+
+        Raises:
+            ValueError: The compiler only counts resources.
+
+        Returns:
+            CompiledFunction: Circuit with argument and return register layout.
+        """
+        if self.dry_run:
+            raise ValueError("No circuit is built in dry run mode")
+
+        arguments = {name: list(reg) for name, reg in self.arguments.items()}
+        ret = None if self.ret is None else list(self.ret)
+
+        return CompiledFunction(self.circuit, arguments, ret)
 
     def assemble_function(self, func: ast.AST):
+        self.run_phase("function", func, self.assemble_function_body, func)
+
+    def assemble_function_body(self, func: ast.AST):
+        if self.eliminate_common_subexpressions and not self.clean_ancillas:
+            self.expr_uses = count_expr_uses(func.body, self.versions)
+
         self.assemble_instructions(func.body)
 
-    def assemble_instructions(self, instructions: List[ast.AST]):
-        for inst in instructions:
-            self.assemble_instruction(inst)
+        if self.clean_ancillas and self.ret is not None:
+            self.uncompute_function()
+
+    def uncompute_function(self):
+        """Copy the result to new qubits and uncompute everything else.
+
+        After this all the qubits except the arguments and the result are in 0.
+        """
+        end = len(self.circuit)
+
+        # Result qubits must be untouched by the uncomputed gates
+        ret = QReg(self.circuit.add_qubits(len(self.ret)))
+        for src_bit, trg_bit in zip(self.ret, ret):
+            self.circuit.x(trg_bit, [src_bit])
+
+        self.circuit.append_inverse(0, end)
+        self.ret = ret
+
+    def assemble_instructions(
+        self,
+        instructions: List[ast.AST],
+        live_out: Set[str] = set(),
+        conditional: bool = False,
+    ):
+        """Assemble block of instructions.
+
+        Variables that are not read after an instruction are freed right
+        after it if `free_dead_variables` is enabled.
+
+        Args:
+            instructions (List[ast.AST]): Instructions to assemble.
+            live_out (Set[str], optional): Variables needed after the block. Defaults to set().
+            conditional (bool, optional): The block is a branch of `If`, see `get_live_vars`. Defaults to False.
+        """
+        if not self.free_dead_variables:
+            for inst in instructions:
+                self.assemble_instruction(inst)
+            return
+
+        live_after = get_live_vars(instructions, live_out, conditional)
+        for inst, live in zip(instructions, live_after):
+            self.assemble_instruction(inst, live)
+
+            for name in get_mentioned_vars(inst) - live:
+                self.free_variable(name)
+
+    def is_reg_shared(self, reg: QReg, name: Union[str, None] = None) -> bool:
+        """Check if register is used by anything except the given variable.
+
+        Args:
+            reg (QReg): Register to check.
+            name (Union[str, None], optional): Variable owning the register. Defaults to None.
+
+        Returns:
+            bool: True if the register is an argument, the result or the value of other variable.
+        """
+        if reg is self.ret:
+            return True
+
+        for arg_reg in self.arguments.values():
+            if reg is arg_reg:
+                return True
+
+        for var_name, var_reg in self.variables.items():
+            if var_name != name and reg is var_reg:
+                return True
+
+        for expr_reg in self.expressions.values():
+            if reg is expr_reg:
+                return True
+
+        for expr_reg in self.expired_expressions:
+            if reg is expr_reg:
+                return True
+
+        return False
+
+    def free_variable(self, name: str):
+        """Forget variable and return its qubits to the pool if nothing else uses them.
+
+        Args:
+            name (str): Variable name.
+        """
+        if name not in self.variables:
+            return
+
+        reg = self.variables[name]
+        if not self.is_reg_shared(reg, name):
+            self.destroy_reg(reg)
+        del self.variables[name]
 
-    def assemble_instruction(self, instruction: ast.AST):
+    def assemble_instruction(self, instruction: ast.AST, live_out: Set[str] = set()):
+        """Assemble a statement, tagging the emitted gates and qubits with its line.
+
+        The compile time of the statement without its nested statements is
+        added to `line_times`.
+
+        Args:
+            instruction (ast.AST): Statement to assemble.
+            live_out (Set[str], optional): Variables needed after the statement. Defaults to set().
+        """
+        line = instruction.lineno
+        prev_line = self.circuit.line
+        self.circuit.line = line
+        self.nested_times.append(0.0)
+        start = time.perf_counter()
+
+        try:
+            self.run_phase(
+                "instruction",
+                instruction,
+                self.assemble_statement,
+                instruction,
+                live_out,
+            )
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self.nested_times.pop()
+            self.line_times[line] = self.line_times.get(line, 0.0) + elapsed - nested
+            if self.nested_times:
+                self.nested_times[-1] += elapsed
+            self.circuit.line = prev_line
+
+    def assemble_statement(self, instruction: ast.AST, live_out: Set[str] = set()):
         inst_type = type(instruction)
+        expired_start = len(self.expired_expressions)
+
+        if (
+            self.eliminate_common_subexpressions
+            and self.clean_ancillas
+            and not self.conditions
+        ):
+            # Values are uncomputed after every statement, so they can be
+            # reused only inside of it
+            self.expressions.clear()
+            self.expr_uses = count_expr_uses([instruction], self.versions)
 
         if inst_type == ast.Assign:
             if len(instruction.targets) != 1:
@@ -206,21 +1060,30 @@ class Compiler:
             if target_var_name in self.variables:
                 old_var = self.variables[target_var_name]
 
-                if old_var not in self.arguments.values():
-                    # If variable is not function argument,
-                    # we will drop its original value
-                    old_var.tmp = True
+                old_var_free = not self.clean_ancillas and not self.is_reg_shared(
+                    old_var, target_var_name
+                )
+                if old_var_free:
+                    # If variable is not function argument or other variable,
+                    # we will drop its original value. The expression may
+                    # reuse it only if it reads the variable once.
+                    if count_var_loads(instruction.value, target_var_name) <= 1:
+                        old_var.tmp = True
+                    old_drops = self.get_bit_drops(old_var)
 
-                new_var = self.assemble_op(instruction.value)
+                new_var = self.assemble_value(instruction.value, old=old_var)
+                # The value may be the old register itself
+                old_var.tmp = False
 
-                if old_var not in self.arguments.values():
-                    self.drop_unused_bits(new_var, old_var)
+                if old_var_free:
+                    self.drop_unused_bits(new_var, old_var, old_drops)
 
             # If we just defining new variable
             else:
-                new_var = self.assemble_op(instruction.value)
+                new_var = self.assemble_value(instruction.value)
 
             self.variables[target_var_name] = new_var
+            self.versions[target_var_name] = self.versions.get(target_var_name, 0) + 1
 
         elif inst_type == ast.AnnAssign:
             target_var_name = instruction.target.id
@@ -229,25 +1092,34 @@ class Compiler:
             if target_var_name in self.variables:
                 old_var = self.variables[target_var_name]
 
-                if old_var not in self.arguments.values():
-                    # If variable is not function argument,
-                    # we will drop its original value
-                    old_var.tmp = True
-
-                new_var = self.assemble_op(
-                    instruction.value, limit=instruction.annotation.value
+                old_var_free = not self.clean_ancillas and not self.is_reg_shared(
+                    old_var, target_var_name
+                )
+                if old_var_free:
+                    # If variable is not function argument or other variable,
+                    # we will drop its original value. The expression may
+                    # reuse it only if it reads the variable once.
+                    if count_var_loads(instruction.value, target_var_name) <= 1:
+                        old_var.tmp = True
+                    old_drops = self.get_bit_drops(old_var)
+
+                new_var = self.assemble_value(
+                    instruction.value, limit=instruction.annotation.value, old=old_var
                 )
+                # The value may be the old register itself
+                old_var.tmp = False
 
-                if old_var not in self.arguments.values():
-                    self.drop_unused_bits(new_var, old_var)
+                if old_var_free:
+                    self.drop_unused_bits(new_var, old_var, old_drops)
 
             # If we just defining new variable
             else:
-                new_var = self.assemble_op(
+                new_var = self.assemble_value(
                     instruction.value, limit=instruction.annotation.value
                 )
 
             self.variables[target_var_name] = new_var
+            self.versions[target_var_name] = self.versions.get(target_var_name, 0) + 1
 
         elif inst_type == ast.Return:
             if type(instruction.value) == ast.Name:
@@ -256,17 +1128,97 @@ class Compiler:
                 self.ret = self.assemble_op(instruction.value)
 
         elif inst_type == ast.If:
-            self.assemble_if(instruction)
+            self.assemble_if(instruction, live_out)
 
         else:
             raise NotImplementedError(f"Unsupported top-level operation: {inst_type}")
 
+        self.drop_expired_expressions(expired_start)
+
+    def drop_expired_expressions(self, start: int = 0):
+        """Drop the values of common subexpressions after their last use.
+
+        The qubits still used by variables, arguments, the result or other
+        expressions are kept.
+
+        Args:
+            start (int, optional): First expired expression to drop. Defaults to 0.
+        """
+        expired = self.expired_expressions[start:]
+        del self.expired_expressions[start:]
+        if not expired:
+            return
+
+        used: Set[int] = set()
+        regs = list(self.variables.values()) + list(self.arguments.values())
+        regs += list(self.expressions.values()) + self.expired_expressions
+        if self.ret is not None:
+            regs.append(self.ret)
+        for reg in regs:
+            used.update(reg)
+
+        for reg in expired:
+            for bit in reg:
+                if bit not in used:
+                    used.add(bit)
+                    self.drop_bit(bit)
+
     def assemble_op(self, op: ast.AST, limit: int = float("inf")) -> QReg:
+        """Assemble an expression.
+
+        If common subexpressions elimination is enabled, the value of an
+        expression is kept while it will be requested again. The emitted
+        gates and qubits are tagged with the line of the expression.
+
+        Args:
+            op (ast.AST): AST operation to execute.
+            limit (int, optional): Result size limit. Defaults to float("inf").
+
+        Returns:
+            QReg: Register with the result.
+        """
+        prev_line = self.circuit.line
+        # Expressions may span several lines
+        self.circuit.line = getattr(op, "lineno", prev_line)
+        try:
+            return self.assemble_cached_op(op, limit=limit)
+        finally:
+            self.circuit.line = prev_line
+
+    def assemble_cached_op(self, op: ast.AST, limit: int = float("inf")) -> QReg:
+        key = None
+        if self.eliminate_common_subexpressions and not self.conditions:
+            key = get_expr_key(op, self.versions, limit)
+
+        if key is not None:
+            self.expr_uses[key] = self.expr_uses.get(key, 0) - 1
+
+            res = self.expressions.get(key)
+            if res is not None:
+                if self.expr_uses[key] <= 0:
+                    # Other operands of the statement may still read the
+                    # value, so it is dropped after the statement
+                    del self.expressions[key]
+                    self.expired_expressions.append(res)
+                return res
+
+        res = self.run_phase("expression", op, self.assemble_expr, op, limit=limit)
+
+        if key is not None and self.expr_uses[key] > 0:
+            self.expressions[key] = res
+
+        return res
+
+    def assemble_expr(self, op: ast.AST, limit: int = float("inf")) -> QReg:
         op_type = type(op)
         if op_type == ast.Name:
             # TODO: check cond
             res = self.variables[op.id]
 
+        elif get_const(op) is not None:
+            value, size = get_const(op)
+            res = self.reg_from_const(value, limit=limit, size=size)
+
         elif op_type == ast.Call:
             # const loading
             res = self.reg_from_const(op.args[0].value)
@@ -284,18 +1236,8 @@ class Compiler:
 
         elif op_type == ast.BinOp:
             op_subtype = type(op.op)
-            if op_subtype == ast.BitXor:
-                sources = self.ops_to_regs(unwrap_ops_chain(op, ast.BitXor))
-                res = self.assemble_xor(sources, limit=limit)
-                self.drop_tmp_regs(sources)
-            elif op_subtype == ast.BitAnd:
-                sources = self.ops_to_regs(unwrap_ops_chain(op, ast.BitAnd))
-                res = self.assemble_bit_and(sources, limit=limit)
-                self.drop_tmp_regs(sources)
-            elif op_subtype == ast.BitOr:
-                sources = self.ops_to_regs(unwrap_ops_chain(op, ast.BitOr))
-                res = self.assemble_bit_or(sources, limit=limit)
-                self.drop_tmp_regs(sources)
+            if op_subtype in CHAIN_OPS:
+                res = self.assemble_chain(op, limit=limit)
             elif op_subtype == ast.LShift:
                 source = self.op_to_reg(op.left)
                 res = self.assemble_lshift(source, op.right.value, limit=limit)
@@ -304,8 +1246,21 @@ class Compiler:
                 source = self.op_to_reg(op.left)
                 res = self.assemble_rshift(source, op.right.value, limit=limit)
                 self.drop_tmp_reg(source)
+            elif op_subtype in ARITH_OPS:
+                sources = self.ops_to_regs([op.left, op.right])
+                if sources[0] is sources[1]:
+                    # The adder needs distinct qubits
+                    sources[1] = self.assemble_copy(sources[0])
+                    sources[1].tmp = True
+                if op_subtype == ast.Add:
+                    res = self.assemble_add(sources, limit=limit)
+                else:
+                    res = self.assemble_sub(sources, limit=limit)
+                self.drop_tmp_regs(sources)
             else:
                 raise NotImplementedError(f"Unsupported op {op_subtype} of {op_type}")
+        elif op_type == ast.Compare:
+            res = self.assemble_compare(op)
         else:
             raise NotImplementedError(f"Unsupported operation: {op_type}")
 
@@ -313,12 +1268,149 @@ class Compiler:
 
         return res
 
-    def assemble_if(self, inst: ast.If):
+    def assemble_chain(self, op: ast.BinOp, limit: int = float("inf")) -> QReg:
+        """Assemble chain of XOR, AND or OR operations.
+
+        Constant operands are folded into one constant, which is applied
+        without its own register.
+
+        Args:
+            op (ast.BinOp): AST operation.
+            limit (int, optional): Result size limit. Defaults to float("inf").
+
+        Returns:
+            QReg: Register with result.
+        """
+        op_type = type(op.op)
+        operands = unwrap_ops_chain(op, op_type)
+
+        consts = [get_const(operand) for operand in operands]
+        const = fold_consts(op_type, [c for c in consts if c is not None])
+        sources = self.ops_to_regs(
+            [operand for operand, c in zip(operands, consts) if c is None]
+        )
+
+        # A repeated register (a variable or a reused common subexpression)
+        # can't be both a source and the in-place target: x & x = x | x = x
+        # and x ^ x = 0
+        counts: Dict[QReg, int] = {}
+        for src in sources:
+            counts[src] = counts.get(src, 0) + 1
+        size = max([len(src) for src in sources] + [0 if const is None else const[1]])
+        cancelled = []
+        if op_type == ast.BitXor:
+            sources = [src for src, count in counts.items() if count % 2]
+            cancelled = [src for src, count in counts.items() if not count % 2]
+        else:
+            sources = list(counts)
+
+        if not sources:
+            res = self.create_reg(min(size, limit))
+            value = 0 if const is None else const[0]
+            for i, bit in enumerate(res):
+                if (value >> i) & 1:
+                    self.x(bit)
+        elif const is None:
+            if op_type == ast.BitXor:
+                res = self.assemble_xor(sources, limit=limit)
+            elif op_type == ast.BitAnd:
+                res = self.assemble_bit_and(sources, limit=limit)
+            else:
+                res = self.assemble_bit_or(sources, limit=limit)
+        elif op_type == ast.BitXor:
+            res = self.assemble_xor_const(sources, *const, limit=limit)
+        elif op_type == ast.BitAnd:
+            res = self.assemble_bit_and_const(sources, *const, limit=limit)
+        else:
+            res = self.assemble_bit_or_const(sources, *const, limit=limit)
+
+        if cancelled and len(res) < min(size, limit):
+            # The cancelled operands still define the size
+            res = self.resize_reg(res, min(size, limit))
+
+        self.drop_tmp_regs(sources + cancelled)
+        return res
+
+    def assemble_compare(self, op: ast.Compare) -> QReg:
+        """Assemble comparison of two operands.
+
+        A constant operand is moved to the right and compared without
+        loading it when possible, see `assemble_less_const`.
+
+        Args:
+            op (ast.Compare): AST operation.
+
+        Raises:
+            NotImplementedError: Chained or unsupported comparison.
+
+        Returns:
+            QReg: One qubit register with the result.
+        """
+        if not is_simple_compare(op):
+            raise NotImplementedError(
+                f"Unsupported comparison {[type(cmp_op) for cmp_op in op.ops]}"
+            )
+
+        op_type = type(op.ops[0])
+        left, right = op.left, op.comparators[0]
+        if get_const(left) is not None:
+            left, right = right, left
+            op_type = SWAPPED_COMPARE_OPS[op_type]
+
+        src = self.detach_condition(self.op_to_reg(left))
+        const = get_const(right)
+
+        if const is not None:
+            value = const[0]
+            if op_type in (ast.Eq, ast.NotEq):
+                res = self.assemble_equal_const(src, value)
+            elif op_type in (ast.Lt, ast.GtE):
+                res = self.assemble_less_const(src, value)
+            else:
+                # a <= c is a < c + 1
+                res = self.assemble_less_const(src, value + 1)
+            inverted = op_type in (ast.NotEq, ast.Gt, ast.GtE)
+        else:
+            other = self.detach_condition(self.op_to_reg(right))
+            if src is other:
+                res = self.reg_from_bool(op_type in (ast.Eq, ast.LtE, ast.GtE))
+                inverted = False
+            else:
+                if set(src) & set(other):
+                    # The comparators need distinct qubits
+                    other = self.assemble_copy(other)
+                    other.tmp = True
+                if op_type in (ast.Eq, ast.NotEq):
+                    res = self.assemble_equal(src, other)
+                elif op_type in (ast.Lt, ast.GtE):
+                    res = self.assemble_less(src, other)
+                else:
+                    res = self.assemble_less(other, src)
+                inverted = op_type in (ast.NotEq, ast.LtE, ast.GtE)
+                self.drop_tmp_reg(other)
+
+        if inverted:
+            self.x(res[0])
+
+        self.drop_tmp_reg(src)
+        return res
+
+    def assemble_if(self, inst: ast.If, live_out: Set[str] = set()):
         """Assemble ast.If operation.
 
         Args:
             inst (ast.If): Operation to assemble.
+            live_out (Set[str], optional): Variables needed after the operation. Defaults to set().
         """
+        const = get_const(inst.test)
+        if const is not None:
+            # Only one branch is reachable
+            self.assemble_instructions(inst.body if const[0] else inst.orelse, live_out)
+            return
+
+        start = len(self.circuit)
+        alloc_start = len(self.allocated)
+
         test_res = self.assemble_op(inst.test)
 
         if self.conditions:
@@ -330,18 +1422,44 @@ class Compiler:
             cur_cond = self.assemble_to_bool(test_res)
             self.conditions.append(cur_cond)
 
+        # Condition qubit can be the test result itself
+        cond_is_var = self.conditions[-1] in test_res and self.is_reg_shared(test_res)
+
+        test_end = len(self.circuit)
+        test_allocated = self.allocated[alloc_start:]
+
         # Drop reg with test result
-        if type(inst.test) != ast.Name:
-            self.destroy_reg(test_res)
+        if not self.is_reg_shared(test_res):
+            for bit in test_res:
+                if bit != self.conditions[-1]:
+                    self.drop_bit(bit)
+
+        test_vars = get_loaded_vars(inst.test)
+        orelse_live_out = live_out | test_vars
+        body_live_out = get_block_live_in(inst.orelse, orelse_live_out) | test_vars
 
-        self.assemble_instructions(inst.body)
+        self.assemble_instructions(inst.body, body_live_out, conditional=True)
 
-        # Else
-        self.qc.x(self.conditions[-1])
-        self.assemble_instructions(inst.orelse)
+        # Else, the condition is AND-ed with the enclosing one
+        outer_cond = self.conditions[-2:-1]
+        self.circuit.x(self.conditions[-1], outer_cond)
+        self.assemble_instructions(inst.orelse, orelse_live_out, conditional=True)
 
         last_cond = self.conditions.pop()
-        self.drop_bit(last_cond)
+
+        if self.clean_ancillas:
+            # Undo else and uncompute the condition
+            self.circuit.x(last_cond, outer_cond)
+            self.circuit.append_inverse(start, test_end)
+
+            del self.allocated[alloc_start:]
+            for bit in test_allocated:
+                self.release_bit(bit)
+        elif cond_is_var:
+            # Restore the variable used as condition
+            self.circuit.x(last_cond)
+        else:
+            self.drop_bit(last_cond)
 
     def op_to_reg(self, op: ast.AST) -> QReg:
         """Perform an operation and return the resulting register.
@@ -356,7 +1474,8 @@ class Compiler:
             return self.variables[op.id]
         else:
             reg = self.assemble_op(op)
-            reg.tmp = True
+            if not self.is_reg_shared(reg):
+                reg.tmp = True
             return reg
 
     def ops_to_regs(self, ops: List[ast.AST]) -> List[QReg]:
@@ -370,47 +1489,158 @@ class Compiler:
         """
         return list(map(self.op_to_reg, ops))
 
-    def create_bit(self) -> Qubit:
-        """Create qubit and add it to QuantumCircuit.
+    def create_bit(self) -> int:
+        """Create qubit and add it to the circuit.
 
         Returns:
-            Qubit: The created qubit.
+            int: The created qubit.
         """
-        reg = QuantumRegister(1)
-        self.qc.add_register(reg)
-        return reg[0]
+        return self.circuit.add_qubit()
 
-    def get_bit(self) -> Qubit:
+    def get_bit(self) -> int:
         """Return qubit in 0 state.
 
         If an unused qubit exists, it will be returned, otherwise a new one will be created.
 
         Returns:
-            Qubit: Qubit in 0 state.
+            int: Qubit in 0 state.
         """
         if self.bits:
             bit = self.bits.pop()
-            self.qc.reset(bit)
+            self.free_bits.remove(bit)
+            if not self.clean_ancillas:
+                self.circuit.reset(bit)
         else:
             bit = self.create_bit()
+
+        if self.clean_ancillas:
+            self.allocated.append(bit)
+
+        self.peak_qubits = max(
+            self.peak_qubits, self.circuit.num_qubits - len(self.bits)
+        )
         return bit
 
-    def drop_bit(self, bit: Qubit):
+    def drop_bit(self, bit: int):
         """Add a qubit to the stack of unused qubits.
 
+        In clean ancillas mode dropped qubits stay dirty until they are
+        uncomputed, so they are not reused.
+
         Args:
-            bit (Qubit): Unused qubit.
+            bit (int): Unused qubit.
+
+        Raises:
+            ValueError: The qubit is already unused.
         """
+        if not self.clean_ancillas:
+            self.release_bit(bit)
+
+    def release_bit(self, bit: int):
+        """Add a qubit in 0 state to the stack of unused qubits.
+
+        Args:
+            bit (int): Unused qubit in 0 state.
+
+        Raises:
+            ValueError: The qubit is already unused.
+        """
+        if bit in self.free_bits:
+            raise ValueError(f"Qubit {bit} is already free")
         self.bits.append(bit)
+        self.free_bits.add(bit)
+        self.bit_drops[bit] = self.bit_drops.get(bit, 0) + 1
+
+    def get_bit_drops(self, reg: QReg) -> List[int]:
+        """Get how many times every qubit of the register was dropped.
+
+        Args:
+            reg (QReg): Register.
+
+        Returns:
+            List[int]: Number of drops of every qubit.
+        """
+        return [self.bit_drops.get(bit, 0) for bit in reg]
 
-    def drop_unused_bits(self, used_reg: QReg, unused_reg: QReg):
+    def assemble_value(
+        self,
+        op: ast.AST,
+        limit: int = float("inf"),
+        old: Union[QReg, None] = None,
+    ) -> QReg:
+        """Assemble the value of an assignment.
+
+        In clean ancillas mode the value is copied to new qubits and all the
+        temporaries are uncomputed (compute-copy-uncompute). Under condition
+        the old value of the variable is kept when the condition is false.
+
+        Args:
+            op (ast.AST): AST operation to execute.
+            limit (int, optional): Result size limit. Defaults to float("inf").
+            old (Union[QReg, None], optional): Old value of the variable. Defaults to None.
+
+        Returns:
+            QReg: Register with the value.
+        """
+        if not self.clean_ancillas:
+            return self.assemble_op(op, limit=limit)
+
+        start = len(self.circuit)
+        alloc_start = len(self.allocated)
+
+        res = self.assemble_op(op, limit=limit)
+
+        allocated = self.allocated[alloc_start:]
+        del self.allocated[alloc_start:]
+
+        res_bits = set(res)
+        if not self.conditions and all(bit in res_bits for bit in allocated):
+            # Nothing to uncompute
+            return res
+
+        end = len(self.circuit)
+
+        size = len(res)
+        if self.conditions and old is not None:
+            size = min(max(size, len(old)), limit)
+
+        value = self.create_reg(size)
+        del self.allocated[alloc_start:]
+
+        # Under condition the value is selected: cond ? res : old
+        cond = self.conditions[-1:]
+        for src_bit, trg_bit in zip(res, value):
+            self.circuit.x(trg_bit, [src_bit] + cond)
+
+        if cond and old is not None:
+            self.circuit.x(cond[0])
+            for src_bit, trg_bit in zip(old, value):
+                self.circuit.x(trg_bit, [src_bit] + cond)
+            self.circuit.x(cond[0])
+
+        self.circuit.append_inverse(start, end)
+        for bit in allocated:
+            self.release_bit(bit)
+
+        return value
+
+    def drop_unused_bits(
+        self,
+        used_reg: QReg,
+        unused_reg: QReg,
+        drops: Union[List[int], None] = None,
+    ):
         """Drop qubits that are in unused_reg but not in used_reg.
 
         Args:
             used_reg (QReg): Register in use.
             unused_reg (QReg): Unused register.
+            drops (Union[List[int], None], optional): Result of `get_bit_drops` for unused_reg. Qubits dropped since then are skipped. Defaults to None.
         """
-        for unused_bit in unused_reg:
+        for i, unused_bit in enumerate(unused_reg):
+            if drops is not None and self.bit_drops.get(unused_bit, 0) != drops[i]:
+                # Already dropped by the operation
+                continue
             if unused_bit not in used_reg:
                 self.drop_bit(unused_bit)
 
@@ -424,23 +1654,30 @@ class Compiler:
             QReg: Created register.
         """
         bits = [self.get_bit() for _ in range(size)]
-        return QReg(bits=bits)
+        return QReg(bits)
 
-    def reg_from_const(self, data: int) -> QReg:
+    def reg_from_const(
+        self,
+        data: int,
+        limit: int = float("inf"),
+        size: Union[int, None] = None,
+    ) -> QReg:
         """Create a register with the specified number.
 
         Args:
             data (int): Register value.
+            limit (int, optional): Register size limit. Defaults to float("inf").
+            size (Union[int, None], optional): Register size, e.g. of a folded expression. Defaults to the size of the number.
 
         Returns:
-            QReg: Register with the specified number.
+            QReg: Register with the specified number, at least one qubit.
         """
-        data_bits = utils.uint_to_bits(data)
-        data_bits.reverse()
-        reg = self.create_reg(len(data_bits))
-        for reg_bit, data_bit in zip(reg, data_bits):
-            if data_bit:
-                self.x(reg_bit)
+        if size is None:
+            size = utils.get_uint_len(data)
+        reg = self.create_reg(max(1, min(size, limit)))
+        for i, bit in enumerate(reg):
+            if (data >> i) & 1:
+                self.x(bit)
         return reg
 
     def destroy_reg(self, reg: QReg):
@@ -475,7 +1712,7 @@ class Compiler:
             for _ in range(len(reg) - size):
                 self.drop_bit(bits.pop())
 
-        new_reg = QReg(bits=bits)
+        new_reg = QReg(bits)
         new_reg.tmp = reg.tmp
         return new_reg
 
@@ -492,64 +1729,65 @@ class Compiler:
         for reg in regs:
             self.drop_tmp_reg(reg)
 
-    def assemble_to_bool(self, src: QReg, prev: Qubit = None) -> Qubit:
-        if len(src) > 1:
-            trg = self.get_bit()
+    def assemble_to_bool(self, src: QReg, prev: int = None) -> int:
+        """Calculate the condition of an If statement.
 
-            all_src_bits = list(src)
-
-            if prev:
-                all_src_bits.append(prev)
+        Args:
+            src (QReg): Test result, true if any qubit is 1.
+            prev (int, optional): Condition of the enclosing If statement. Defaults to None.
 
-            self.qc.x(all_src_bits)
-            self.qc.x(trg)
-            self.qc.mcx(all_src_bits, trg)
-            self.qc.x(all_src_bits)
+        Returns:
+            int: Qubit with the condition, AND-ed with the previous one.
+        """
+        if len(src) == 1 and prev is None:
+            return src[0]
 
-            self.barrier()
+        trg = self.get_bit()
+        zero_controls = [ir.negate(bit) for bit in src]
 
-            return trg
+        if prev is None:
+            self.circuit.x(trg)
+            self.circuit.x(trg, zero_controls)
+        elif len(src) == 1:
+            self.circuit.x(trg, [prev, src[0]])
         else:
-            return src[0]
+            self.circuit.x(trg, [prev])
+            self.circuit.x(trg, [prev] + zero_controls)
+
+        self.barrier()
+
+        return trg
 
     def barrier(self):
         """Adds a barrier to the circuit if they are enabled."""
         if self.add_barriers:
-            self.qc.barrier()
+            self.circuit.barrier()
 
     def x(self, trg):
-        if len(self.conditions):
-            cond = self.conditions.pop()
-            self.qc.cx(cond, trg)
-            self.conditions.append(cond)
-        else:
-            self.qc.x(trg)
+        self.circuit.x(trg, self.conditions[-1:])
 
     def cx(self, src, trg):
-        if len(self.conditions):
-            cond = self.conditions.pop()
-            self.qc.ccx(src, cond, trg)
-            self.conditions.append(cond)
-        else:
-            self.qc.cx(src, trg)
+        self.circuit.x(trg, [src] + self.conditions[-1:])
 
     def mcx(self, srcs, trg):
-        if len(self.conditions):
-            cond = self.conditions.pop()
-            srcs = srcs.copy()
-            srcs.append(cond)
-            self.qc.mcx(srcs, trg)
-            self.conditions.append(cond)
-        else:
-            self.qc.mcx(srcs, trg)
+        self.circuit.x(trg, list(srcs) + self.conditions[-1:])
 
     def swap(self, trg1, trg2):
-        if len(self.conditions):
-            cond = self.conditions.pop()
-            self.qc.cswap(cond, trg1, trg2)
-            self.conditions.append(cond)
-        else:
-            self.qc.swap(trg1, trg2)
+        self.circuit.swap(trg1, trg2, self.conditions[-1:])
+
+    def reg_from_bool(self, value: bool) -> QReg:
+        """Create a one qubit register with the value of a folded comparison.
+
+        Args:
+            value (bool): Register value.
+
+        Returns:
+            QReg: Register with the value.
+        """
+        reg = self.create_reg(1)
+        if value:
+            self.x(reg[0])
+        return reg
 
     def assemble_copy(self, src: QReg, trg: Union[None, QReg] = None) -> QReg:
         if trg:
@@ -617,6 +1855,262 @@ class Compiler:
 
         return trg
 
+    def assemble_inplace_add(
+        self, trg: QReg, src: QReg, carry_out: Union[int, None] = None
+    ):
+        """Add register to the target in place by the ripple-carry adder.
+
+        The addend is truncated or padded with zero qubits to the size of
+        the target. Under condition the adder is controlled by it.
+
+        Args:
+            trg (QReg): Target register, replaced by the sum modulo 2^len(trg).
+            src (QReg): Addend.
+            carry_out (Union[int, None], optional): Qubit in 0 state to receive the carry out. Defaults to None.
+        """
+        src = list(src[: len(trg)])
+        ancillas = [self.get_bit() for _ in range(len(trg) - len(src) + 1)]
+        src += ancillas[1:]
+
+        adder.append_inplace_adder(
+            self.circuit,
+            src,
+            trg,
+            ancillas[0],
+            carry_out,
+            self.conditions[-1] if self.conditions else None,
+        )
+
+        if not self.clean_ancillas:
+            # The ancillas are back in 0. In clean ancillas mode they are
+            # released after the statement is uncomputed.
+            for bit in ancillas:
+                self.release_bit(bit)
+
+    def assemble_add(self, srcs: List[QReg], limit: int = float("inf")) -> QReg:
+        """Calculate the sum of two registers.
+
+        A temporary operand is used as the target of the in-place adder.
+
+        Args:
+            srcs (List[QReg]): Summands.
+            limit (int, optional): Result size limit. Defaults to float("inf").
+
+        Returns:
+            QReg: Register with the sum, one qubit larger than the largest summand unless limited.
+        """
+        size = max(len(src) for src in srcs)
+        limit = min(limit, size + 1)
+
+        srcs = list(srcs)
+        max_tmp_src = get_max_tmp_src(srcs)
+        if max_tmp_src:
+            trg = max_tmp_src
+            trg.tmp = False
+            srcs.remove(max_tmp_src)
+        else:
+            trg = get_max_reg(srcs)
+            srcs.remove(trg)
+            trg = self.assemble_copy(trg)
+        (src,) = srcs
+
+        if limit > size:
+            # The carry out goes to the new highest qubit
+            trg = self.resize_reg(trg, size)
+            carry_out = self.get_bit()
+            self.assemble_inplace_add(trg, src, carry_out)
+            return QReg(list(trg) + [carry_out])
+
+        trg = self.resize_reg(trg, limit)
+        self.assemble_inplace_add(trg, src)
+        return trg
+
+    def assemble_sub(self, srcs: List[QReg], limit: int = float("inf")) -> QReg:
+        """Calculate the difference of two registers modulo 2^n.
+
+        Computed as ~(~a + b) by the in-place adder, the minuend is used as
+        the target if it is temporary.
+
+        Args:
+            srcs (List[QReg]): Minuend and subtrahend.
+            limit (int, optional): Result size limit. Defaults to float("inf").
+
+        Returns:
+            QReg: Register with the difference, of the size of the largest operand unless limited.
+        """
+        minuend, subtrahend = srcs
+        limit = min(limit, max(len(minuend), len(subtrahend)))
+
+        if minuend.tmp:
+            trg = minuend
+            trg.tmp = False
+        else:
+            trg = self.assemble_copy(minuend)
+        trg = self.resize_reg(trg, limit)
+
+        self.x(trg)
+        self.assemble_inplace_add(trg, subtrahend)
+        self.x(trg)
+        return trg
+
+    def detach_condition(self, reg: QReg) -> QReg:
+        """Copy the register if it holds the current condition.
+
+        Comparators change their operands temporarily, so they can't be
+        controlled by their own qubits.
+
+        Args:
+            reg (QReg): Operand.
+
+        Returns:
+            QReg: The register or its temporary copy.
+        """
+        if not self.conditions or self.conditions[-1] not in reg:
+            return reg
+        if reg.tmp:
+            self.drop_tmp_reg(reg)
+        copy = self.assemble_copy(reg)
+        copy.tmp = True
+        return copy
+
+    def assemble_equal(self, a: QReg, b: QReg) -> QReg:
+        """Check if two registers are equal.
+
+        The shorter register is XOR-ed to the longer one, the result is set
+        if it is all zeros, then the XOR is undone.
+
+        Args:
+            a (QReg): First operand.
+            b (QReg): Second operand, without qubits of the first one.
+
+        Returns:
+            QReg: One qubit register with the result.
+        """
+        if len(a) < len(b):
+            a, b = b, a
+
+        res = self.create_reg(1)
+        for a_bit, b_bit in zip(a, b):
+            self.circuit.x(a_bit, [b_bit])
+        self.mcx([ir.negate(bit) for bit in a], res[0])
+        for a_bit, b_bit in zip(a, b):
+            self.circuit.x(a_bit, [b_bit])
+        return res
+
+    def assemble_equal_const(self, src: QReg, value: int) -> QReg:
+        """Check if the register is equal to the constant.
+
+        The result is set by one X gate controlled by the qubits of the
+        register, negated where the constant has 0.
+
+        Args:
+            src (QReg): Register.
+            value (int): Constant.
+
+        Returns:
+            QReg: One qubit register with the result.
+        """
+        if value >> len(src):
+            return self.reg_from_bool(False)
+
+        res = self.create_reg(1)
+        controls = [
+            bit if (value >> i) & 1 else ir.negate(bit) for i, bit in enumerate(src)
+        ]
+        self.mcx(controls, res[0])
+        return res
+
+    def append_less(self, a: List[int], b: List[int], trg: int):
+        """XOR a < b to the qubit.
+
+        a < b is the carry out of ~a + b, computed by the MAJ gates of the
+        ripple-carry adder and uncomputed, so it takes 2 * n Toffoli gates
+        and one carry ancilla. The shorter operand is padded with zero
+        qubits. Under condition the result is controlled by it.
+
+        Args:
+            a (List[int]): First operand, lowest bit first.
+            b (List[int]): Second operand, without qubits of the first one.
+            trg (int): Qubit the result is XOR-ed to.
+        """
+        size = max(len(a), len(b))
+        a_padding = [self.get_bit() for _ in range(size - len(a))]
+        b_padding = [self.get_bit() for _ in range(size - len(b))]
+        carry = self.get_bit()
+        a = list(a) + a_padding
+        b = list(b) + b_padding
+
+        self.circuit.x(a)
+        adder.append_carry(
+            self.circuit,
+            a,
+            b,
+            carry,
+            trg,
+            self.conditions[-1] if self.conditions else None,
+        )
+        self.circuit.x(a)
+
+        if not self.clean_ancillas:
+            for bit in a_padding + b_padding + [carry]:
+                self.release_bit(bit)
+
+    def assemble_less(self, a: QReg, b: QReg) -> QReg:
+        """Check if the first register is less than the second.
+
+        Args:
+            a (QReg): First operand.
+            b (QReg): Second operand, without qubits of the first one.
+
+        Returns:
+            QReg: One qubit register with the result.
+        """
+        res = self.create_reg(1)
+        self.append_less(list(a), list(b), res[0])
+        return res
+
+    def assemble_less_const(self, src: QReg, value: int) -> QReg:
+        """Check if the register is less than the constant.
+
+        Comparisons with 0 and constants out of the range of the register are
+        folded. The bits of the register below the lowest set bit of the
+        constant don't change the result, so they are skipped. Less than a
+        power of 2 means the remaining high bits are 0, which is checked by
+        one X gate. Otherwise the constant is loaded into temporary qubits
+        for `append_less`.
+
+        Args:
+            src (QReg): Register.
+            value (int): Constant.
+
+        Returns:
+            QReg: One qubit register with the result.
+        """
+        if value <= 0:
+            return self.reg_from_bool(False)
+        if value >> len(src):
+            return self.reg_from_bool(True)
+
+        shift = (value & -value).bit_length() - 1
+        bits = list(src)[shift:]
+        value >>= shift
+
+        res = self.create_reg(1)
+        if value == 1:
+            self.mcx([ir.negate(bit) for bit in bits], res[0])
+            return res
+
+        const = [self.get_bit() for _ in range(len(bits))]
+        const_ones = [bit for i, bit in enumerate(const) if (value >> i) & 1]
+        self.circuit.x(const_ones)
+        self.append_less(bits, const, res[0])
+        self.circuit.x(const_ones)
+
+        if not self.clean_ancillas:
+            for bit in const:
+                self.release_bit(bit)
+        return res
+
     def assemble_bit_and(self, srcs: List[QReg], limit: int = float("inf")) -> QReg:
         """Calculate AND of registers.
 
@@ -675,7 +2169,7 @@ class Compiler:
             srcs.remove(max_tmp_src)
 
             for i in range(limit):
-                srcs_bits = [src[i] for src in srcs]
+                srcs_bits = [src[i] for src in srcs if i < len(src)]
 
                 tmp_bit = self.get_bit()
                 self.swap(trg[i], tmp_bit)
@@ -693,7 +2187,7 @@ class Compiler:
             trg = self.create_reg(limit)
 
             for i in range(limit):
-                srcs_bits = [src[i] for src in srcs]
+                srcs_bits = [src[i] for src in srcs if i < len(src)]
 
                 self.x(srcs_bits)
                 self.x(trg[i])
@@ -702,6 +2196,145 @@ class Compiler:
 
         return trg
 
+    def select_bits(self, src: QReg, positions: List[int]) -> QReg:
+        """Take the bits at the given positions of a register.
+
+        Unused bits of a temporary register are dropped and the register
+        itself is replaced by the selection.
+
+        Args:
+            src (QReg): Source register.
+            positions (List[int]): Sorted bit positions.
+
+        Returns:
+            QReg: Register with the selected bits, shorter if the source is too short.
+        """
+        selected = QReg([src[i] for i in positions if i < len(src)])
+        selected.tmp = src.tmp
+
+        if src.tmp:
+            src.tmp = False
+            self.drop_unused_bits(selected, src)
+
+        return selected
+
+    def place_bits(
+        self, src: QReg, positions: List[int], size: int, value: int = 0
+    ) -> QReg:
+        """Create register with the bits of src at the given positions.
+
+        Other bits are new qubits set to the bits of value.
+
+        Args:
+            src (QReg): Register with the bits to place.
+            positions (List[int]): Sorted bit positions.
+            size (int): Size of the result.
+            value (int, optional): Value of the other bits. Defaults to 0.
+
+        Returns:
+            QReg: The resulting register.
+        """
+        placed = dict(zip(positions, src))
+
+        bits = []
+        for i in range(size):
+            if i in placed:
+                bits.append(placed[i])
+            else:
+                bit = self.get_bit()
+                if (value >> i) & 1:
+                    self.x(bit)
+                bits.append(bit)
+
+        return QReg(bits)
+
+    def select_and_place(
+        self, sources: List[QReg], positions: List[int], assemble: Callable
+    ) -> QReg:
+        selected = [self.select_bits(src, positions) for src in sources]
+
+        if len(selected) == 1:
+            # Just wires
+            if selected[0].tmp:
+                return selected[0]
+            return self.assemble_copy(selected[0])
+
+        res = assemble(selected, limit=len(positions))
+        self.drop_tmp_regs(selected)
+        return res
+
+    def assemble_xor_const(
+        self, srcs: List[QReg], value: int, size: int, limit: int = float("inf")
+    ) -> QReg:
+        """Calculate XOR of registers and a constant.
+
+        The constant is applied by X gates on the result.
+
+        Args:
+            srcs (List[QReg]): List of input registers.
+            value (int): Constant.
+            size (int): Constant size.
+            limit (int, optional): Result size limit. Defaults to float("inf").
+
+        Returns:
+            QReg: Register with result.
+        """
+        size = min(limit, max(size, len(get_max_reg(srcs))))
+
+        res = self.assemble_xor(srcs, limit=size)
+        if len(res) < size:
+            res = self.resize_reg(res, size)
+
+        for i, bit in enumerate(res):
+            if (value >> i) & 1:
+                self.x(bit)
+
+        return res
+
+    def assemble_bit_and_const(
+        self, srcs: List[QReg], value: int, size: int, limit: int = float("inf")
+    ) -> QReg:
+        """Calculate AND of registers and a constant.
+
+        Only the bits set in the constant are calculated, the others are 0.
+
+        Args:
+            srcs (List[QReg]): List of input registers.
+            value (int): Constant.
+            size (int): Constant size.
+            limit (int, optional): Result size limit. Defaults to float("inf").
+
+        Returns:
+            QReg: Register with result.
+        """
+        size = min(limit, size, len(get_min_reg(srcs)))
+        positions = [i for i in range(size) if (value >> i) & 1]
+
+        res = self.select_and_place(srcs, positions, self.assemble_bit_and)
+        return self.place_bits(res, positions, size)
+
+    def assemble_bit_or_const(
+        self, srcs: List[QReg], value: int, size: int, limit: int = float("inf")
+    ) -> QReg:
+        """Calculate OR of registers and a constant.
+
+        Only the bits not set in the constant are calculated, the others are 1.
+
+        Args:
+            srcs (List[QReg]): List of input registers.
+            value (int): Constant.
+            size (int): Constant size.
+            limit (int, optional): Result size limit. Defaults to float("inf").
+
+        Returns:
+            QReg: Register with result.
+        """
+        size = min(limit, max(size, len(get_max_reg(srcs))))
+        positions = [i for i in range(size) if not (value >> i) & 1]
+
+        res = self.select_and_place(srcs, positions, self.assemble_bit_or)
+        return self.place_bits(res, positions, size, value)
+
     def assemble_lshift(
         self, src: QReg, distance: int, limit: int = float("inf")
     ) -> QReg:
@@ -731,7 +2364,7 @@ class Compiler:
             for _ in range(len(bits) - limit):
                 self.drop_bit(bits.pop())
 
-            res = QReg(bits=bits)
+            res = QReg(bits)
         else:
             res = self.create_reg(limit)
             for i in range(limit - distance):
@@ -764,7 +2397,7 @@ class Compiler:
             for _ in range(len(bits) - limit):
                 self.drop_bit(bits.pop())
 
-            res = QReg(bits=bits)
+            res = QReg(bits)
         else:
             res = self.create_reg(limit)
             for i in range(limit):
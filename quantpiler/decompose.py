@@ -0,0 +1,192 @@
+"""
+Decomposition of multi-controlled gates into Toffoli gates using ancillas.
+"""
+
+from typing import Iterable, List, Sequence, Union
+
+from . import ir
+from .optimizer import update_known_values
+
+# Multi-controlled X decomposition strategies
+NO_ANCILLA = "noancilla"
+V_CHAIN = "v-chain"
+DIRTY = "dirty"
+LOG_DEPTH = "log-depth"
+
+MODES = (NO_ANCILLA, V_CHAIN, DIRTY, LOG_DEPTH)
+
+
+def v_chain(
+    res: ir.Circuit, controls: Sequence[int], target: int, ancillas: Sequence[int]
+):
+    """Append multi-controlled X using a chain of clean ancillas.
+
+    Uses 2 * (n - 2) + 1 Toffoli gates for n controls.
+
+    Args:
+        res (ir.Circuit): Circuit to append the gates to.
+        controls (Sequence[int]): At least 3 controls.
+        target (int): Target qubit.
+        ancillas (Sequence[int]): n - 2 qubits in 0 state. They are returned to 0.
+    """
+    chain = []
+    chain.append(((controls[0], controls[1]), ancillas[0]))
+    for i in range(1, len(controls) - 2):
+        chain.append(((controls[i + 1], ancillas[i - 1]), ancillas[i]))
+
+    for gate_controls, gate_target in chain:
+        res.x(gate_target, gate_controls)
+    res.x(target, (controls[-1], ancillas[len(controls) - 3]))
+    for gate_controls, gate_target in reversed(chain):
+        res.x(gate_target, gate_controls)
+
+
+def log_depth(
+    res: ir.Circuit, controls: Sequence[int], target: int, ancillas: Sequence[int]
+):
+    """Append multi-controlled X computing AND of the controls by a binary tree of clean ancillas.
+
+    Uses the same number of Toffoli gates as `v_chain`, but the depth is
+    logarithmic in the number of controls.
+
+    Args:
+        res (ir.Circuit): Circuit to append the gates to.
+        controls (Sequence[int]): At least 3 controls.
+        target (int): Target qubit.
+        ancillas (Sequence[int]): n - 2 qubits in 0 state. They are returned to 0.
+    """
+    tree = []
+    free = list(ancillas)
+
+    level = list(controls)
+    while len(level) > 2:
+        next_level = []
+        for i in range(0, len(level) - 1, 2):
+            ancilla = free.pop(0)
+            tree.append(((level[i], level[i + 1]), ancilla))
+            next_level.append(ancilla)
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+
+    for gate_controls, gate_target in tree:
+        res.x(gate_target, gate_controls)
+    res.x(target, level)
+    for gate_controls, gate_target in reversed(tree):
+        res.x(gate_target, gate_controls)
+
+
+def dirty_chain(
+    res: ir.Circuit, controls: Sequence[int], target: int, ancillas: Sequence[int]
+):
+    """Append multi-controlled X using borrowed ancillas in any state.
+
+    Uses 4 * (n - 2) Toffoli gates for n controls (Barenco et al., lemma 7.2).
+
+    Args:
+        res (ir.Circuit): Circuit to append the gates to.
+        controls (Sequence[int]): At least 3 controls.
+        target (int): Target qubit.
+        ancillas (Sequence[int]): n - 2 qubits in any state. Their state is restored.
+    """
+    count = len(controls)
+
+    def descend():
+        for i in range(count - 3, 0, -1):
+            res.x(ancillas[i], (controls[i + 1], ancillas[i - 1]))
+
+    def ascend():
+        for i in range(1, count - 2):
+            res.x(ancillas[i], (controls[i + 1], ancillas[i - 1]))
+
+    for _ in range(2):
+        res.x(target, (controls[-1], ancillas[count - 3]))
+        descend()
+        res.x(ancillas[0], (controls[0], controls[1]))
+        ascend()
+
+
+def decompose_mcx(
+    circuit: ir.Circuit,
+    mode: str = V_CHAIN,
+    inputs: Union[Iterable[int], None] = None,
+) -> ir.Circuit:
+    """Decompose X gates with more than 2 controls into Toffoli gates.
+
+    Swaps with more than one control are turned into a multi-controlled X
+    between two CNOTs first.
+
+    Clean ancillas are qubits known to be in 0 state at the gate. Dirty
+    ancillas are any qubits not used by the gate. If there are not enough of
+    them, new qubits are added to the circuit.
+
+    Args:
+        circuit (ir.Circuit): Circuit to decompose.
+        mode (str, optional): Strategy: "noancilla" leaves the gates to qiskit's ancilla-free decomposition, "v-chain" and "log-depth" use clean ancillas, "dirty" uses borrowed ones. Defaults to "v-chain".
+        inputs (Union[Iterable[int], None], optional): Qubits with unknown initial values, the others start in 0. Defaults to all the qubits.
+
+    Raises:
+        ValueError: Unknown mode.
+
+    Returns:
+        ir.Circuit: Decomposed circuit.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown MCX decomposition mode: {mode}")
+
+    if mode == NO_ANCILLA:
+        return circuit.copy()
+
+    res = circuit.empty_copy()
+
+    # Known value of every qubit, None if unknown
+    if inputs is None:
+        values: List[Union[int, None]] = [None] * circuit.num_qubits
+    else:
+        values = [0] * circuit.num_qubits
+        for qubit in inputs:
+            values[qubit] = None
+
+    def get_ancillas(used: Sequence[int], count: int) -> List[int]:
+        used = set(ir.get_qubit(qubit) for qubit in used)
+        ancillas = []
+        for qubit in range(res.num_qubits):
+            if len(ancillas) == count:
+                break
+            if qubit not in used and (mode == DIRTY or values[qubit] == 0):
+                ancillas.append(qubit)
+
+        while len(ancillas) < count:
+            ancillas.append(res.add_qubit())
+            values.append(0)
+
+        return ancillas
+
+    def append_mcx(controls: Sequence[int], target: int):
+        if len(controls) <= 2:
+            res.x(target, controls)
+            return
+
+        ancillas = get_ancillas(list(controls) + [target], len(controls) - 2)
+        if mode == V_CHAIN:
+            v_chain(res, controls, target, ancillas)
+        elif mode == LOG_DEPTH:
+            log_depth(res, controls, target, ancillas)
+        else:
+            dirty_chain(res, controls, target, ancillas)
+
+    for gate in circuit:
+        res.line = gate.line
+        if gate.op == ir.X and len(gate.controls) > 2:
+            append_mcx(gate.controls, gate.targets[0])
+        elif gate.op == ir.SWAP and len(gate.controls) > 1:
+            target1, target2 = gate.targets
+            res.x(target1, (target2,))
+            append_mcx(gate.controls + (target1,), target2)
+            res.x(target1, (target2,))
+        else:
+            res.append_gate(gate)
+
+        update_known_values(values, gate)
+
+    return res
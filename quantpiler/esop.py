@@ -0,0 +1,188 @@
+"""
+ESOP (exclusive sum of products) minimization of truth tables.
+
+A product is a cube ``(mask, values)``: variable i is in the product if bit
+i of mask is set, as a positive literal if bit i of values is set and as a
+negative literal otherwise. The function is the XOR of its products.
+"""
+
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+Cube = Tuple[int, int]
+
+
+def get_variable_count(table: np.ndarray) -> int:
+    count = len(table).bit_length() - 1
+    if len(table) != 2**count:
+        raise ValueError(f"Truth table size must be a power of 2, got {len(table)}")
+    return count
+
+
+def get_reed_muller(
+    table: np.ndarray, care: Union[np.ndarray, None] = None
+) -> np.ndarray:
+    """Get the coefficients of the positive polarity Reed-Muller form.
+
+    Coefficient s is set if the product of the variables in s is in the
+    form. Don't care entries are chosen so their coefficients are 0.
+
+    Args:
+        table (np.ndarray): Truth table, entry x is the value for the variables in bits of x.
+        care (Union[np.ndarray, None], optional): False for don't care entries. Defaults to all entries cared.
+
+    Returns:
+        np.ndarray: Coefficients by the variable mask.
+    """
+    count = get_variable_count(table)
+    coeffs = np.array(table, dtype=bool)
+
+    if care is None or np.all(care):
+        # Moebius transform by butterflies
+        for var in range(count):
+            coeffs = coeffs.reshape(-1, 2, 2**var)
+            coeffs[:, 1, :] ^= coeffs[:, 0, :]
+        return coeffs.reshape(-1)
+
+    # Entries are processed in increasing order, so the coefficients of all
+    # subsets of an entry are known. partial[k][s] is the XOR of the
+    # coefficients of the proper subsets of s differing from it only in the
+    # k lowest bits.
+    care = np.asarray(care, dtype=bool)
+    partial = np.zeros((count + 1, len(table)), dtype=bool)
+    for s in range(len(table)):
+        acc = False
+        for k in range(count):
+            if (s >> k) & 1:
+                acc ^= partial[k][s ^ (1 << k)] ^ coeffs[s ^ (1 << k)]
+            partial[k + 1][s] = acc
+        if care[s]:
+            coeffs[s] = table[s] ^ acc
+        else:
+            coeffs[s] = False
+
+    return coeffs
+
+
+def get_fixed_polarity_cubes(
+    table: np.ndarray, polarity: int, care: Union[np.ndarray, None] = None
+) -> List[Cube]:
+    """Get the products of the fixed polarity Reed-Muller form.
+
+    Args:
+        table (np.ndarray): Truth table.
+        polarity (int): Variables used as negative literals.
+        care (Union[np.ndarray, None], optional): False for don't care entries. Defaults to all entries cared.
+
+    Returns:
+        List[Cube]: The products.
+    """
+    order = np.arange(len(table)) ^ polarity
+    coeffs = get_reed_muller(
+        np.asarray(table)[order], None if care is None else np.asarray(care)[order]
+    )
+    return [(int(mask), int(mask) & ~polarity) for mask in np.flatnonzero(coeffs)]
+
+
+def exorlink(cubes: List[Cube]) -> List[Cube]:
+    """Merge pairs of products differing in one variable.
+
+    Uses x & C ^ ~x & C = C and x & C ^ C = ~x & C, equal products cancel.
+
+    Args:
+        cubes (List[Cube]): Products.
+
+    Returns:
+        List[Cube]: Equivalent products, no more than the given ones.
+    """
+    present: Dict[Cube, None] = {}
+
+    def toggle(cube: Cube):
+        if cube in present:
+            del present[cube]
+        else:
+            present[cube] = None
+
+    for cube in cubes:
+        toggle(cube)
+
+    merged = True
+    while merged:
+        merged = False
+        for cube in list(present):
+            if cube not in present:
+                continue
+            mask, values = cube
+            var_mask = mask
+            while var_mask:
+                bit = var_mask & -var_mask
+                var_mask ^= bit
+
+                opposite = (mask, values ^ bit)
+                reduced = (mask & ~bit, values & ~bit)
+                if opposite in present:
+                    toggle(cube)
+                    toggle(opposite)
+                    toggle(reduced)
+                elif reduced in present:
+                    toggle(cube)
+                    toggle(reduced)
+                    toggle(opposite)
+                else:
+                    continue
+                merged = True
+                break
+
+    return list(present)
+
+
+def minimize_esop(
+    table: np.ndarray, care: Union[np.ndarray, None] = None
+) -> List[Cube]:
+    """Find a small ESOP of the truth table.
+
+    The best fixed polarity Reed-Muller form is searched greedily, flipping
+    the polarity of one variable at a time, then its products are merged
+    by `exorlink`.
+
+    Args:
+        table (np.ndarray): Truth table, entry x is the value for the variables in bits of x.
+        care (Union[np.ndarray, None], optional): False for don't care entries. Defaults to all entries cared.
+
+    Returns:
+        List[Cube]: Products of the ESOP.
+    """
+    count = get_variable_count(table)
+    table = np.asarray(table, dtype=bool)
+
+    polarity = 0
+    best = get_fixed_polarity_cubes(table, polarity, care)
+    improved = True
+    while improved and best:
+        improved = False
+        for var in range(count):
+            cubes = get_fixed_polarity_cubes(table, polarity ^ (1 << var), care)
+            if len(cubes) < len(best):
+                polarity ^= 1 << var
+                best = cubes
+                improved = True
+
+    return sorted(exorlink(best))
+
+
+def evaluate_esop(cubes: List[Cube], count: int) -> np.ndarray:
+    """Get the truth table of the ESOP.
+
+    Args:
+        cubes (List[Cube]): Products.
+        count (int): Number of variables.
+
+    Returns:
+        np.ndarray: Truth table.
+    """
+    inputs = np.arange(2**count)
+    table = np.zeros(2**count, dtype=bool)
+    for mask, values in cubes:
+        table ^= (inputs & mask) == values
+    return table
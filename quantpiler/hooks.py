@@ -0,0 +1,153 @@
+"""
+Hooks observing the compilation phases.
+
+The compiler calls `Hook.on_enter` and `Hook.on_exit` around every phase:
+
+* "parse" - parsing of the source code,
+* "function" - assembling of the function body,
+* "instruction" - assembling of a statement (nested in "function" or an If statement),
+* "expression" - lowering of an expression (cached values are not lowered again),
+* "optimize", "decompose", "schedule" - circuit passes,
+* "lower" - building of the qiskit circuit and its registers.
+"""
+
+from typing import Any, Callable, Dict, List, Union
+
+import ast
+
+
+class Hook:
+    """Base class of compiler hooks, its methods do nothing."""
+
+    def on_enter(self, phase: str, node: Union[ast.AST, None]):
+        """Called before the phase.
+
+        Args:
+            phase (str): Phase name.
+            node (Union[ast.AST, None]): Compiled AST node, None for the phases not bound to a node.
+        """
+
+    def on_exit(
+        self,
+        phase: str,
+        node: Union[ast.AST, None],
+        elapsed: float,
+        counters: Dict[str, int],
+    ):
+        """Called after the phase, even if it raised an exception.
+
+        Args:
+            phase (str): Phase name.
+            node (Union[ast.AST, None]): Compiled AST node, None for the phases not bound to a node.
+            elapsed (float): Wall time of the phase in seconds, nested phases included.
+            counters (Dict[str, int]): Change of the number of "gates" and "qubits" of the circuit during the phase.
+        """
+
+
+class CallbackHook(Hook):
+    """Hook calling a function after every phase.
+
+    The function receives the arguments of `Hook.on_exit`.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[str, Union[ast.AST, None], float, Dict[str, int]], Any],
+    ):
+        self.callback = callback
+
+    def on_exit(
+        self,
+        phase: str,
+        node: Union[ast.AST, None],
+        elapsed: float,
+        counters: Dict[str, int],
+    ):
+        self.callback(phase, node, elapsed, counters)
+
+
+def get_phase_key(phase: str, node: Union[ast.AST, None]) -> str:
+    """Get the name of the phase including the kind of the node.
+
+    Args:
+        phase (str): Phase name.
+        node (Union[ast.AST, None]): Compiled AST node.
+
+    Returns:
+        str: Key like "instruction:Assign" or "expression:BinOp.BitXor".
+    """
+    if node is None or phase in ("function", "parse"):
+        return phase
+
+    kind = type(node).__name__
+    if isinstance(node, (ast.BinOp, ast.UnaryOp, ast.BoolOp)):
+        kind += "." + type(node.op).__name__
+    elif isinstance(node, ast.Compare) and len(node.ops) == 1:
+        kind += "." + type(node.ops[0]).__name__
+    return f"{phase}:{kind}"
+
+
+class TimingCollector(Hook):
+    """Hook aggregating the calls, time and counters of every phase.
+
+    Statements and expressions are grouped by their kind, see `get_phase_key`.
+    Times of nested phases are also included in their parents.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def on_exit(
+        self,
+        phase: str,
+        node: Union[ast.AST, None],
+        elapsed: float,
+        counters: Dict[str, int],
+    ):
+        key = get_phase_key(phase, node)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = {"calls": 0, "time": 0.0, "gates": 0, "qubits": 0}
+            self.stats[key] = stats
+
+        stats["calls"] += 1
+        stats["time"] += elapsed
+        stats["gates"] += counters["gates"]
+        stats["qubits"] += counters["qubits"]
+
+    def reset(self):
+        self.stats = {}
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get the aggregated statistics.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Number of "calls", total "time" in seconds and the total change of "gates" and "qubits" by phase key.
+        """
+        return {key: stats.copy() for key, stats in self.stats.items()}
+
+    def format(self) -> str:
+        """Format the statistics as a text table sorted by time.
+
+        Returns:
+            str: The table.
+        """
+        rows: List[List[str]] = [["phase", "calls", "time, ms", "gates", "qubits"]]
+        for key, stats in sorted(self.stats.items(), key=lambda item: -item[1]["time"]):
+            rows.append(
+                [
+                    key,
+                    str(stats["calls"]),
+                    f"{stats['time'] * 1000:.3f}",
+                    str(stats["gates"]),
+                    str(stats["qubits"]),
+                ]
+            )
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = []
+        for row in rows:
+            cells = [row[0].ljust(widths[0])]
+            cells += [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+            lines.append("  ".join(cells))
+        return "\n".join(lines)
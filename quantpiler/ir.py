@@ -0,0 +1,373 @@
+"""
+Intermediate representation of reversible circuits.
+
+The compiler emits gates into a `Circuit`, which stores them in flat typed
+arrays with integer qubit ids instead of qiskit objects. The circuit is
+lowered to a `QuantumCircuit` only when it is requested.
+
+A control qubit `q` is active on |1>. A negative control, active on |0>, is
+stored as `~q` (see `negate`).
+
+Every gate and qubit is tagged with the source line that was being compiled
+when it was added (`Circuit.line`), 0 if unknown.
+"""
+
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple, Union
+
+from array import array
+
+from qiskit import QuantumRegister
+from qiskit.circuit import QuantumCircuit
+from qiskit.circuit.library import (
+    XGate,
+    CXGate,
+    CCXGate,
+    MCXGate,
+    SwapGate,
+    CSwapGate,
+)
+from qiskit.circuit.reset import Reset
+from qiskit.circuit.barrier import Barrier
+
+# Gate opcodes
+X = 0
+SWAP = 1
+RESET = 2
+BARRIER = 3
+
+OP_NAMES = {X: "x", SWAP: "swap", RESET: "reset", BARRIER: "barrier"}
+
+
+def negate(control: int) -> int:
+    """Invert the polarity of a control.
+
+    Args:
+        control (int): Control qubit, `~q` for negative control.
+
+    Returns:
+        int: The control with inverted polarity.
+    """
+    return ~control
+
+
+def get_qubit(control: int) -> int:
+    """Get the qubit id of a (possibly negative) control.
+
+    Args:
+        control (int): Control qubit, `~q` for negative control.
+
+    Returns:
+        int: Qubit id.
+    """
+    return control if control >= 0 else ~control
+
+
+def get_ctrl_state(controls: Sequence[int]) -> int:
+    """Get the qiskit control state of the controls.
+
+    Args:
+        controls (Sequence[int]): Controls, `~q` for negative ones.
+
+    Returns:
+        int: Control state, bit i is set if control i is active on |1>.
+    """
+    state = 0
+    for i, control in enumerate(controls):
+        if control >= 0:
+            state |= 1 << i
+    return state
+
+
+class Gate(NamedTuple):
+    """Single gate of the `Circuit`.
+
+    Attributes:
+        op (int): Opcode.
+        controls (Tuple[int, ...]): Control qubits, `~q` for negative control.
+        targets (Tuple[int, ...]): Target qubits.
+        line (int): Source line, 0 if unknown.
+    """
+
+    op: int
+    controls: Tuple[int, ...]
+    targets: Tuple[int, ...]
+    line: int = 0
+
+
+def get_gate_name(gate: Gate) -> str:
+    """Get the name of the equivalent qiskit gate.
+
+    Args:
+        gate (Gate): Gate.
+
+    Returns:
+        str: Qiskit gate name, e.g. "cx" or "cswap".
+    """
+    controls = len(gate.controls)
+    if gate.op == X:
+        return ["x", "cx", "ccx"][controls] if controls < 3 else "mcx"
+    elif gate.op == SWAP:
+        return "c" * min(controls, 1) + "swap" if controls < 2 else "mcswap"
+    else:
+        return OP_NAMES[gate.op]
+
+
+class Circuit:
+    """Array-backed list of reversible gates on integer qubit ids.
+
+    Gate qubits are stored in one flat array: controls first, then targets.
+    """
+
+    name: str = "circuit"
+    num_qubits: int = 0
+    line: int = 0
+
+    def __init__(self, name: str = "circuit", num_qubits: int = 0):
+        self.name = name
+        self.num_qubits = num_qubits
+        self.line = 0
+        self.ops = array("B")
+        self.num_controls = array("l")
+        self.starts = array("l", [0])
+        self.qubits = array("l")
+        self.lines = array("l")
+        self.qubit_lines = array("l", [0] * num_qubits)
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def __getitem__(self, index: int) -> Gate:
+        if index < 0:
+            index += len(self)
+        start = self.starts[index]
+        middle = start + self.num_controls[index]
+        end = self.starts[index + 1]
+        return Gate(
+            self.ops[index],
+            tuple(self.qubits[start:middle]),
+            tuple(self.qubits[middle:end]),
+            self.lines[index],
+        )
+
+    def __iter__(self) -> Iterator[Gate]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def add_qubit(self) -> int:
+        """Add qubit to the circuit.
+
+        Returns:
+            int: Id of the new qubit.
+        """
+        self.num_qubits += 1
+        self.qubit_lines.append(self.line)
+        return self.num_qubits - 1
+
+    def add_qubits(self, count: int) -> List[int]:
+        """Add several qubits to the circuit.
+
+        Args:
+            count (int): Number of qubits.
+
+        Returns:
+            List[int]: Ids of the new qubits.
+        """
+        start = self.num_qubits
+        self.num_qubits += count
+        self.qubit_lines.extend([self.line] * count)
+        return list(range(start, self.num_qubits))
+
+    def append(
+        self,
+        op: int,
+        controls: Sequence[int],
+        targets: Sequence[int],
+        line: Union[int, None] = None,
+    ):
+        """Append gate to the end of the circuit.
+
+        Args:
+            op (int): Opcode.
+            controls (Sequence[int]): Control qubits, `~q` for negative control.
+            targets (Sequence[int]): Target qubits.
+            line (Union[int, None], optional): Source line. Defaults to the current line.
+
+        Raises:
+            ValueError: A qubit is used several times by the gate.
+        """
+        if len(controls) + len(targets) > 1:
+            used = {get_qubit(control) for control in controls}
+            used.update(targets)
+            if len(used) != len(controls) + len(targets):
+                raise ValueError(
+                    f"Duplicate qubits in gate: controls {list(controls)}, targets {list(targets)}"
+                )
+
+        self.lines.append(self.line if line is None else line)
+        self.ops.append(op)
+        self.num_controls.append(len(controls))
+        self.qubits.extend(controls)
+        self.qubits.extend(targets)
+        self.starts.append(len(self.qubits))
+
+    def append_gate(self, gate: Gate):
+        self.append(gate.op, gate.controls, gate.targets, gate.line)
+
+    def extend(self, gates: Iterable[Gate]):
+        for gate in gates:
+            self.append(gate.op, gate.controls, gate.targets, gate.line)
+
+    def append_inverse(self, start: int = 0, end: Union[int, None] = None):
+        """Append the inverse of the gates in range [start, end).
+
+        Args:
+            start (int, optional): First gate. Defaults to 0.
+            end (Union[int, None], optional): Gate after the last one. Defaults to the end of the circuit.
+
+        Raises:
+            ValueError: The range contains a reset, which can't be inverted.
+        """
+        if end is None:
+            end = len(self)
+
+        # All the gates are self-inverse
+        for i in range(end - 1, start - 1, -1):
+            gate = self[i]
+            if gate.op == RESET:
+                raise ValueError("Reset can't be inverted")
+            self.append_gate(gate)
+
+    def x(self, targets: Union[int, Sequence[int]], controls: Sequence[int] = ()):
+        """Append (multi-controlled) X gate to every target.
+
+        Args:
+            targets (Union[int, Sequence[int]]): Target qubit or qubits.
+            controls (Sequence[int], optional): Control qubits, `~q` for negative control. Defaults to ().
+        """
+        if isinstance(targets, int):
+            self.append(X, controls, (targets,))
+        else:
+            for target in targets:
+                self.append(X, controls, (target,))
+
+    def swap(self, target1: int, target2: int, controls: Sequence[int] = ()):
+        self.append(SWAP, controls, (target1, target2))
+
+    def reset(self, target: int):
+        self.append(RESET, (), (target,))
+
+    def barrier(self):
+        self.append(BARRIER, (), ())
+
+    def empty_copy(self) -> "Circuit":
+        """Create an empty circuit with the same name and qubits.
+
+        Returns:
+            Circuit: Circuit without gates.
+        """
+        new = Circuit(self.name, self.num_qubits)
+        new.line = self.line
+        new.qubit_lines = array("l", self.qubit_lines)
+        return new
+
+    def copy(self, name: Union[str, None] = None) -> "Circuit":
+        new = Circuit(self.name if name is None else name, self.num_qubits)
+        new.line = self.line
+        new.ops = array("B", self.ops)
+        new.num_controls = array("l", self.num_controls)
+        new.starts = array("l", self.starts)
+        new.qubits = array("l", self.qubits)
+        new.lines = array("l", self.lines)
+        new.qubit_lines = array("l", self.qubit_lines)
+        return new
+
+    def count_ops(self) -> Dict[str, int]:
+        """Count gates by their qiskit names.
+
+        Returns:
+            Dict[str, int]: Number of gates of every type.
+        """
+        counts: Dict[str, int] = {}
+        for gate in self:
+            name = get_gate_name(gate)
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def to_qiskit(
+        self, registers: Union[Dict[str, Sequence[int]], None] = None
+    ) -> QuantumCircuit:
+        """Lower the circuit to a qiskit QuantumCircuit.
+
+        Args:
+            registers (Union[Dict[str, Sequence[int]], None], optional): Named registers to create. Qubits outside of them are placed in one register "q". Defaults to None.
+
+        Raises:
+            ValueError: Registers overlap.
+
+        Returns:
+            QuantumCircuit: The lowered circuit.
+        """
+        if registers is None:
+            registers = {}
+
+        qubits = [None] * self.num_qubits
+        qregs = []
+        for name, ids in registers.items():
+            qreg = QuantumRegister(len(ids), name=name)
+            for qubit_id, qubit in zip(ids, qreg):
+                if qubits[qubit_id] is not None:
+                    raise ValueError(f"Qubit {qubit_id} is in several registers")
+                qubits[qubit_id] = qubit
+            qregs.append(qreg)
+
+        free_ids = [i for i in range(self.num_qubits) if qubits[i] is None]
+        if free_ids:
+            qreg = QuantumRegister(len(free_ids), name="q")
+            for qubit_id, qubit in zip(free_ids, qreg):
+                qubits[qubit_id] = qubit
+            qregs.append(qreg)
+
+        qc = QuantumCircuit(*qregs, name=self.name)
+
+        # Gate objects are immutable here, so one is shared by all the
+        # instructions of the same type, which is much faster to build
+        instructions = {}
+
+        for gate in self:
+            qargs = [qubits[get_qubit(i)] for i in gate.controls]
+            qargs += [qubits[i] for i in gate.targets]
+            controls = len(gate.controls)
+            ctrl_state = get_ctrl_state(gate.controls)
+
+            key = (gate.op, controls, ctrl_state)
+            instruction = instructions.get(key)
+            if instruction is not None and gate.op != BARRIER:
+                qc._append(instruction, qargs, [])
+                continue
+
+            if gate.op == X:
+                if controls == 0:
+                    instruction = XGate()
+                elif controls == 1:
+                    instruction = CXGate(ctrl_state=ctrl_state)
+                elif controls == 2:
+                    instruction = CCXGate(ctrl_state=ctrl_state)
+                else:
+                    instruction = MCXGate(controls, ctrl_state=ctrl_state)
+            elif gate.op == SWAP:
+                if controls == 0:
+                    instruction = SwapGate()
+                elif controls == 1:
+                    instruction = CSwapGate(ctrl_state=ctrl_state)
+                else:
+                    instruction = SwapGate().control(controls, ctrl_state=ctrl_state)
+            elif gate.op == RESET:
+                instruction = Reset()
+            else:
+                instruction = Barrier(self.num_qubits)
+                qargs = qubits
+
+            instructions[key] = instruction
+            qc._append(instruction, qargs, [])
+
+        return qc
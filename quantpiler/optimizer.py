@@ -0,0 +1,257 @@
+"""
+Peephole optimizations of compiled circuits.
+"""
+
+from typing import Dict, Iterable, List, Union
+
+from . import ir
+
+
+def remove_barriers(circuit: ir.Circuit) -> ir.Circuit:
+    """Remove all barriers from the circuit.
+
+    Args:
+        circuit (ir.Circuit): Circuit to optimize.
+
+    Returns:
+        ir.Circuit: Circuit without barriers.
+    """
+    res = circuit.empty_copy()
+    for gate in circuit:
+        if gate.op != ir.BARRIER:
+            res.append_gate(gate)
+    return res
+
+
+def merge_x_controls(circuit: ir.Circuit) -> ir.Circuit:
+    """Move uncontrolled X gates forward, turning the controls they conjugate into negative controls.
+
+    X gates are delayed until a gate that doesn't commute with them.
+    Passing a control, X inverts its polarity, passing an X target it stays
+    unchanged and passing an uncontrolled swap it moves to the other target.
+    Pairs of X on the same qubit cancel.
+
+    Args:
+        circuit (ir.Circuit): Circuit to optimize.
+
+    Returns:
+        ir.Circuit: Optimized circuit.
+    """
+    res = circuit.empty_copy()
+    # Source line of every pending X
+    pending: Dict[int, int] = {}
+
+    def flush(qubits):
+        for qubit in sorted(qubits):
+            if qubit in pending:
+                res.append(ir.X, (), (qubit,), pending.pop(qubit))
+
+    def toggle(qubits, line):
+        for qubit in qubits:
+            if qubit in pending:
+                del pending[qubit]
+            else:
+                pending[qubit] = line
+
+    for gate in circuit:
+        if gate.op == ir.X and not gate.controls:
+            toggle(gate.targets, gate.line)
+            continue
+
+        if gate.op == ir.BARRIER:
+            flush(list(pending))
+            res.append_gate(gate)
+            continue
+
+        if gate.op == ir.RESET:
+            # Reset discards the previous state
+            for target in gate.targets:
+                pending.pop(target, None)
+            res.append_gate(gate)
+            continue
+
+        controls = tuple(
+            ir.negate(ctrl) if ir.get_qubit(ctrl) in pending else ctrl
+            for ctrl in gate.controls
+        )
+
+        if gate.op == ir.SWAP:
+            target1, target2 = gate.targets
+            if (target1 in pending) != (target2 in pending):
+                if controls:
+                    flush(gate.targets)
+                else:
+                    # Move the X to the other target
+                    target = target1 if target1 in pending else target2
+                    line = pending.pop(target)
+                    pending[target1 if target == target2 else target2] = line
+
+        res.append(gate.op, controls, gate.targets, gate.line)
+
+    flush(list(pending))
+    return res
+
+
+def update_known_values(values: List[Union[int, None]], gate: ir.Gate):
+    """Update the known classical values of qubits after the gate.
+
+    Args:
+        values (List[Union[int, None]]): Value of every qubit, None if unknown.
+        gate (ir.Gate): Gate.
+    """
+    if gate.op == ir.BARRIER:
+        return
+    elif gate.op == ir.RESET:
+        values[gate.targets[0]] = 0
+        return
+
+    known = True
+    for ctrl in gate.controls:
+        value = values[ir.get_qubit(ctrl)]
+        if value is None:
+            known = False
+        elif value != (ctrl >= 0):
+            # The gate is never applied
+            return
+
+    if gate.op == ir.X:
+        target = gate.targets[0]
+        if values[target] is not None:
+            values[target] = 1 - values[target] if known else None
+    else:
+        target1, target2 = gate.targets
+        value1, value2 = values[target1], values[target2]
+        if known:
+            values[target1], values[target2] = value2, value1
+        elif value1 is None or value1 != value2:
+            values[target1] = values[target2] = None
+
+
+def propagate_constants(circuit: ir.Circuit, inputs: Iterable[int]) -> ir.Circuit:
+    """Simplify gates using the known classical values of qubits.
+
+    All qubits except the inputs start in 0. Gates with a control that is
+    known to be inactive are removed, known active controls are removed from
+    gates, and resets of qubits known to be 0 are removed.
+
+    Args:
+        circuit (ir.Circuit): Circuit to optimize.
+        inputs (Iterable[int]): Qubits with unknown initial values.
+
+    Returns:
+        ir.Circuit: Optimized circuit.
+    """
+    # Known value of every qubit, None if unknown
+    values: List[Union[int, None]] = [0] * circuit.num_qubits
+    for qubit in inputs:
+        values[qubit] = None
+
+    res = circuit.empty_copy()
+
+    for gate in circuit:
+        if gate.op == ir.BARRIER:
+            res.append_gate(gate)
+            continue
+
+        if gate.op == ir.RESET:
+            target = gate.targets[0]
+            if values[target] != 0:
+                res.append_gate(gate)
+                values[target] = 0
+            continue
+
+        controls = []
+        active = True
+        for ctrl in gate.controls:
+            value = values[ir.get_qubit(ctrl)]
+            if value is None:
+                controls.append(ctrl)
+            elif value != (ctrl >= 0):
+                active = False
+                break
+
+        if not active:
+            continue
+
+        if gate.op == ir.SWAP:
+            value1, value2 = values[gate.targets[0]], values[gate.targets[1]]
+            if value1 is not None and value1 == value2:
+                # Swap of equal values
+                continue
+
+        gate = ir.Gate(gate.op, tuple(controls), gate.targets, gate.line)
+        update_known_values(values, gate)
+        res.append_gate(gate)
+
+    return res
+
+
+def is_same_gate(gate1: ir.Gate, gate2: ir.Gate) -> bool:
+    if gate1.op != gate2.op or set(gate1.controls) != set(gate2.controls):
+        return False
+    if gate1.op == ir.SWAP:
+        return set(gate1.targets) == set(gate2.targets)
+    return gate1.targets == gate2.targets
+
+
+def cancel_inverses(circuit: ir.Circuit) -> ir.Circuit:
+    """Cancel pairs of identical self-inverse gates with no gates between them on their qubits.
+
+    Args:
+        circuit (ir.Circuit): Circuit to optimize.
+
+    Returns:
+        ir.Circuit: Optimized circuit.
+    """
+    gates: List[Union[ir.Gate, None]] = []
+    # Indices of the gates acting on every qubit, in order
+    stacks: Dict[int, List[int]] = {}
+
+    for gate in circuit:
+        if gate.op == ir.BARRIER:
+            stacks.clear()
+            gates.append(gate)
+            continue
+
+        qubits = [ir.get_qubit(ctrl) for ctrl in gate.controls] + list(gate.targets)
+        last = [stacks[q][-1] if stacks.get(q) else None for q in qubits]
+
+        if (
+            gate.op != ir.RESET
+            and last[0] is not None
+            and all(index == last[0] for index in last)
+            and is_same_gate(gates[last[0]], gate)
+        ):
+            gates[last[0]] = None
+            for qubit in qubits:
+                stacks[qubit].pop()
+            continue
+
+        for qubit in qubits:
+            stacks.setdefault(qubit, []).append(len(gates))
+        gates.append(gate)
+
+    res = circuit.empty_copy()
+    res.extend(gate for gate in gates if gate is not None)
+    return res
+
+
+def optimize(
+    circuit: ir.Circuit, inputs: Union[Iterable[int], None] = None
+) -> ir.Circuit:
+    """Run all the peephole optimizations.
+
+    Barriers are removed, because they block the other optimizations.
+
+    Args:
+        circuit (ir.Circuit): Circuit to optimize.
+        inputs (Union[Iterable[int], None], optional): Qubits with unknown initial values, the others start in 0. Constants are propagated only if they are given. Defaults to None.
+
+    Returns:
+        ir.Circuit: Optimized circuit.
+    """
+    circuit = remove_barriers(circuit)
+    if inputs is not None:
+        circuit = propagate_constants(circuit, inputs)
+    circuit = merge_x_controls(circuit)
+    return cancel_inverses(circuit)
@@ -2,10 +2,15 @@
 Some circuits useful for quantum oracles.
 """
 
-from typing import List
+from typing import Iterable, List, Sequence, Set, Tuple, Union
 
+import numpy as np
 from qiskit import QuantumRegister, AncillaRegister
 from qiskit.circuit import QuantumCircuit
+from qiskit.circuit.library import MCXGate
+
+# Control qubit index and the state it matches
+Control = Tuple[int, bool]
 
 
 def new_oracle_checker(expected_data: List[bool]) -> QuantumCircuit:
@@ -37,3 +42,123 @@ def new_oracle_checker(expected_data: List[bool]) -> QuantumCircuit:
             qc.x(data[i])
 
     return qc
+
+
+def get_patterns(
+    expected: Union[Iterable[Sequence[bool]], np.ndarray]
+) -> List[Tuple[bool, ...]]:
+    """Get the sorted unique expected patterns.
+
+    Args:
+        expected (Union[Iterable[Sequence[bool]], np.ndarray]): Expected bits of every pattern, list, set or 2D array.
+
+    Raises:
+        ValueError: No patterns or patterns of different sizes.
+
+    Returns:
+        List[Tuple[bool, ...]]: The patterns.
+    """
+    patterns: Set[Tuple[bool, ...]] = {
+        tuple(bool(bit) for bit in pattern) for pattern in expected
+    }
+    if not patterns:
+        raise ValueError("No expected patterns")
+
+    sizes = {len(pattern) for pattern in patterns}
+    if len(sizes) != 1:
+        raise ValueError(f"Patterns of different sizes: {sorted(sizes)}")
+
+    return sorted(patterns)
+
+
+def new_multi_oracle_checker(
+    expected: Union[Iterable[Sequence[bool]], np.ndarray]
+) -> QuantumCircuit:
+    """Generate data checker accepting several patterns.
+
+    This circuit will flip phase of `result` qubit if the `data` qubits equal
+    to any of the expected patterns.
+
+    The patterns are walked as a trie by the data bits. Bits shared by all
+    patterns of a subtree are kept as controls, and the AND of them is
+    computed into an ancilla of the `anc` stack only where the subtree
+    branches, so common prefixes are matched once. The AND for the second
+    branch is obtained from the first by one gate, as p & ~x ^ p = p & x.
+    Subtrees containing all patterns of their suffix are marked by their
+    prefix only.
+
+    Args:
+        expected (Union[Iterable[Sequence[bool]], np.ndarray]): Expected bits on `data` qubits of every pattern, list, set or 2D array.
+
+    Raises:
+        ValueError: No patterns or patterns of different sizes.
+
+    Returns:
+        QuantumCircuit: The newly generated oracle-checker circuit.
+    """
+    patterns = get_patterns(expected)
+    size = len(patterns[0])
+
+    # Qubits are numbered as data, result, anc
+    result_qubit = size
+    gates: List[Tuple[List[Control], int]] = []
+    ancilla_count = 0
+
+    def visit(
+        patterns: List[Tuple[bool, ...]], depth: int, prefix: List[Control], level: int
+    ):
+        nonlocal ancilla_count
+
+        if len(patterns) == 2 ** (size - depth):
+            gates.append((prefix, result_qubit))
+            return
+        if len(patterns) == 1:
+            suffix = [(i, patterns[0][i]) for i in range(depth, size)]
+            gates.append((prefix + suffix, result_qubit))
+            return
+
+        children = [
+            (value, [pattern for pattern in patterns if pattern[depth] == value])
+            for value in (False, True)
+        ]
+        children = [(value, child) for value, child in children if child]
+
+        if len(children) == 1 or not prefix:
+            # Nothing to share yet
+            for value, child in children:
+                visit(child, depth + 1, prefix + [(depth, value)], level)
+            return
+
+        ancilla = size + 1 + level
+        ancilla_count = max(ancilla_count, level + 1)
+
+        gates.append((prefix + [(depth, False)], ancilla))
+        visit(children[0][1], depth + 1, [(ancilla, True)], level + 1)
+        gates.append((prefix, ancilla))
+        visit(children[1][1], depth + 1, [(ancilla, True)], level + 1)
+        gates.append((prefix + [(depth, True)], ancilla))
+
+    visit(patterns, 0, [], 0)
+
+    data = QuantumRegister(size, name="data")
+    result = QuantumRegister(1, name="result")
+    regs = [data, result]
+    if ancilla_count:
+        regs.append(AncillaRegister(ancilla_count, name="anc"))
+    qc = QuantumCircuit(*regs, name="multi_oracle_checker")
+    qubits = qc.qubits
+
+    qc.h(result)
+    for controls, target in gates:
+        if not controls:
+            qc.x(qubits[target])
+            continue
+        ctrl_state = 0
+        for i, (_, state) in enumerate(controls):
+            if state:
+                ctrl_state |= 1 << i
+        gate = MCXGate(len(controls), ctrl_state=ctrl_state)
+        qc.append(gate, [qubits[qubit] for qubit, _ in controls] + [qubits[target]])
+    qc.h(result)
+
+    return qc
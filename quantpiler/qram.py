@@ -4,14 +4,49 @@ Quantum RAM circuit generator.
 
 from typing import Union, List, Dict
 
+import numpy as np
 from qiskit import QuantumRegister
 from qiskit.circuit import QuantumCircuit
+from qiskit.circuit.library import MCXGate
 
-from .utils import uint_to_bits
+from .esop import minimize_esop
+from .utils import gray_to_uint, uint_to_bits
 
 
-def new_qram(
+def get_values_dict(
     address_count: int, data_count: int, values: Union[Dict[int, int], List[int]]
+) -> Dict[int, int]:
+    """Convert qRAM data to a dict and check it.
+
+    Args:
+        address_count (int): Number of address qubits.
+        data_count (int): Number of data qubits.
+        values (Union[Dict[int, int], List[int]]): Saved qRAM data.
+
+    Raises:
+        ValueError: Some address/data in values is larger than maximum for address/data qubits count.
+
+    Returns:
+        Dict[int, int]: Data by address.
+    """
+    if type(values) is list:
+        values = dict(enumerate(values))
+
+    for key, value in values.items():
+        if key > 2**address_count - 1:
+            raise ValueError(f"Key {key} larger than maximum ({2**address_count - 1})")
+
+        if value > 2**data_count - 1:
+            raise ValueError(f"Value {value} larger than maximum ({2**data_count - 1})")
+
+    return values
+
+
+def new_qram(
+    address_count: int,
+    data_count: int,
+    values: Union[Dict[int, int], List[int]],
+    minimize: bool = False,
 ) -> QuantumCircuit:
     """Generate qRAM circuit.
 
@@ -19,6 +54,7 @@ def new_qram(
         address_count (int): Number of address qubits.
         data_count (int): Number of data qubits.
         values (Union[Dict[int, int], List[int]]): Saved qRAM data.
+        minimize (bool, optional): Build every data bit from a minimized ESOP of its truth table, see `new_esop_qram`. Addresses missing in values are don't cares. Defaults to False.
 
     Raises:
         ValueError: Some address/data in values is larger than maximum for address/data qubits count.
@@ -26,28 +62,19 @@ def new_qram(
     Returns:
         QuantumCircuit: The newly generated qRAM circuit.
     """
+    if minimize:
+        return new_esop_qram(address_count, data_count, values)
+
     address = QuantumRegister(address_count, name="addr")
     data = QuantumRegister(data_count, name="data")
     qc = QuantumCircuit(address, data, name="qram")
 
-    if type(values) is list:
-        values_dict = {}
-        for i in range(len(values)):
-            values_dict[i] = values[i]
-        values = values_dict
+    values = get_values_dict(address_count, data_count, values)
 
     key_i = 0
     for key in values:
         key_i = key_i + 1
 
-        if key > 2**address_count - 1:
-            raise ValueError(f"Key {key} larger than maximum ({2**address_count - 1})")
-
-        if key > 2**address_count - 1:
-            raise ValueError(
-                f"Value {values[key]} larger than maximum ({2**data_count - 1})"
-            )
-
         k = uint_to_bits(key, bits=address_count)
         v = uint_to_bits(values[key], bits=data_count)
 
@@ -67,3 +94,112 @@ def new_qram(
             qc.barrier()
 
     return qc
+
+
+def new_esop_qram(
+    address_count: int, data_count: int, values: Union[Dict[int, int], List[int]]
+) -> QuantumCircuit:
+    """Generate qRAM circuit with one multi-controlled X per ESOP product.
+
+    The truth table of every data bit is minimized by `esop.minimize_esop`,
+    so structured tables need far fewer gates, each controlled only by the
+    address qubits in its product.
+
+    Args:
+        address_count (int): Number of address qubits.
+        data_count (int): Number of data qubits.
+        values (Union[Dict[int, int], List[int]]): Saved qRAM data. Addresses missing in a dict are don't cares.
+
+    Raises:
+        ValueError: Some address/data in values is larger than maximum for address/data qubits count.
+
+    Returns:
+        QuantumCircuit: The newly generated qRAM circuit.
+    """
+    address = QuantumRegister(address_count, name="addr")
+    data = QuantumRegister(data_count, name="data")
+    qc = QuantumCircuit(address, data, name="qram")
+
+    values = get_values_dict(address_count, data_count, values)
+
+    table = np.zeros(2**address_count, dtype=object)
+    care = np.zeros(2**address_count, dtype=bool)
+    for key, value in values.items():
+        table[key] = value
+        care[key] = True
+
+    for i in range(data_count):
+        # Bits are stored from the most significant, as by uint_to_bits
+        bit_table = (table >> (data_count - 1 - i)) & 1 == 1
+        for mask, polarity in minimize_esop(bit_table, care):
+            controls = []
+            ctrl_state = 0
+            for var in range(address_count):
+                if (mask >> var) & 1:
+                    if (polarity >> var) & 1:
+                        ctrl_state |= 1 << len(controls)
+                    controls.append(address[address_count - 1 - var])
+
+            if controls:
+                gate = MCXGate(len(controls), ctrl_state=ctrl_state)
+                qc.append(gate, controls + [data[i]])
+            else:
+                qc.x(data[i])
+
+    return qc
+
+
+def new_gray_qram(
+    address_count: int, data_count: int, values: Union[Dict[int, int], List[int]]
+) -> QuantumCircuit:
+    """Generate qRAM circuit visiting the addresses in Gray code order.
+
+    Consecutive addresses differ in one bit, so only the X gates on the
+    changed address qubits are applied between the entries. If more than two
+    data bits are set, the address match is computed once into an ancilla and
+    copied to them by CNOTs. Entries with zero data are skipped.
+
+    Args:
+        address_count (int): Number of address qubits.
+        data_count (int): Number of data qubits.
+        values (Union[Dict[int, int], List[int]]): Saved qRAM data.
+
+    Raises:
+        ValueError: Some address/data in values is larger than maximum for address/data qubits count.
+
+    Returns:
+        QuantumCircuit: The newly generated qRAM circuit with address, data and a single ancilla ("anc") register. The ancilla starts and ends in 0.
+    """
+    address = QuantumRegister(address_count, name="addr")
+    data = QuantumRegister(data_count, name="data")
+    anc = QuantumRegister(1, name="anc")
+    qc = QuantumCircuit(address, data, anc, name="qram")
+
+    values = get_values_dict(address_count, data_count, values)
+    keys = sorted((key for key in values if values[key]), key=gray_to_uint)
+
+    # Address qubits are flipped where the current key has 0
+    flipped = [False] * address_count
+    for key in keys:
+        k = uint_to_bits(key, bits=address_count)
+        for i in range(address_count):
+            if flipped[i] == bool(k[i]):
+                qc.x(address[i])
+                flipped[i] = not flipped[i]
+
+        v = uint_to_bits(values[key], bits=data_count)
+        targets = [data[i] for i in range(data_count) if v[i]]
+        if len(targets) <= 2:
+            for target in targets:
+                qc.mcx(address, target)
+        else:
+            qc.mcx(address, anc[0])
+            for target in targets:
+                qc.cx(anc[0], target)
+            qc.mcx(address, anc[0])
+
+    for i in range(address_count):
+        if flipped[i]:
+            qc.x(address[i])
+
+    return qc
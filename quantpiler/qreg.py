@@ -1,7 +1,13 @@
-from qiskit import QuantumRegister, QuantumCircuit
+class QReg(list):
+    """Register of the compiler: list of qubit ids.
 
+    Registers are compared by identity, so two registers holding the same
+    qubits are still different registers.
+    """
 
-class QReg(QuantumRegister):
     tp: str = "int"
     tmp: bool = False
-    qc: QuantumCircuit = None
+
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
@@ -0,0 +1,178 @@
+"""
+QROM (read-only quantum memory) for large classical tables.
+
+Gates are appended to an `ir.Circuit` while the values are read in chunks,
+so tables with millions of entries can be streamed from NumPy arrays,
+iterables or memory-mapped ``.npy`` files.
+"""
+
+from typing import Iterable, Iterator, List, Sequence, Union
+
+from itertools import islice
+import os
+
+import numpy as np
+
+from . import compiler
+from . import ir
+
+
+def iter_value_chunks(
+    values: Union[np.ndarray, Iterable[int], str, os.PathLike], chunk_size: int
+) -> Iterator[List[int]]:
+    """Read the table in chunks.
+
+    Args:
+        values (Union[np.ndarray, Iterable[int], str, os.PathLike]): One-dimensional array, iterable of values or path to a ``.npy`` file, which is memory-mapped.
+        chunk_size (int): Maximum number of values in a chunk.
+
+    Raises:
+        ValueError: The array is not one-dimensional.
+
+    Yields:
+        List[int]: Consecutive values of the table.
+    """
+    if isinstance(values, (str, os.PathLike)):
+        values = np.load(values, mmap_mode="r")
+
+    if isinstance(values, np.ndarray):
+        if values.ndim != 1:
+            raise ValueError(f"Table must be one-dimensional, got shape {values.shape}")
+        for start in range(0, len(values), chunk_size):
+            yield values[start : start + chunk_size].tolist()
+        return
+
+    iterator = iter(values)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_level_controls(
+    chain: Sequence[int], address: Sequence[int], level: int, key: int
+) -> List[int]:
+    """Get the controls computing a level of the unary iteration chain.
+
+    Level k is the AND of the previous level and the (k + 1)-th highest
+    address qubit, with the polarity given by the key.
+
+    Args:
+        chain (Sequence[int]): Ancillas of the levels.
+        address (Sequence[int]): Iterated address qubits, lowest bit first.
+        level (int): Level.
+        key (int): Value of the iterated address.
+
+    Returns:
+        List[int]: Controls of the X gate computing the level.
+    """
+    bit = len(address) - 1 - level
+    ctrl = address[bit] if (key >> bit) & 1 else ir.negate(address[bit])
+    if level == 0:
+        return [ctrl]
+    return [chain[level - 1], ctrl]
+
+
+def new_qrom(
+    address_count: int,
+    data_count: int,
+    values: Union[np.ndarray, Iterable[int], str, os.PathLike],
+    block_size: int = 1,
+    chunk_size: int = 2**16,
+) -> "compiler.CompiledFunction":
+    """Generate QROM circuit by unary iteration with an optional select-swap network.
+
+    Entries are visited in address order. The AND of the address bits with
+    the polarities of the current entry is kept in a chain of ancillas, and
+    moving to the next entry only recomputes the levels of the changed bits,
+    so the iteration takes about 2 Toffoli gates per entry. The set data
+    bits are written by CNOTs from the last level.
+
+    With `block_size` b > 1, b entries are written at once into b copies
+    of the data register (iterating only the high address bits), then the
+    copy selected by the low address bits is moved to the output by
+    controlled swaps. This uses (b - 1) * data_count more qubits and as many
+    controlled swaps, but divides the iteration cost by b. The other copies
+    are left holding the permuted entries of the block, so the circuit
+    should be uncomputed by its inverse.
+
+    Args:
+        address_count (int): Number of address qubits.
+        data_count (int): Number of data qubits.
+        values (Union[np.ndarray, Iterable[int], str, os.PathLike]): Table of non-negative values, one-dimensional array, iterable or path to a ``.npy`` file. Entries after the end of the table read 0.
+        block_size (int, optional): Number of data copies of the select-swap network, power of 2. Defaults to 1.
+        chunk_size (int, optional): Number of values read at once. Defaults to 2**16.
+
+    Raises:
+        ValueError: Invalid block size, too many entries or a value out of range.
+
+    Returns:
+        CompiledFunction: Circuit with "address" argument and the data register as the result, lowest bit first.
+    """
+    if block_size < 1 or block_size & (block_size - 1):
+        raise ValueError(f"Block size must be a power of 2, got {block_size}")
+
+    swap_bits = block_size.bit_length() - 1
+    if swap_bits > address_count:
+        raise ValueError(
+            f"Block size {block_size} larger than the number of addresses ({2**address_count})"
+        )
+
+    circuit = ir.Circuit(name="qrom")
+    address = circuit.add_qubits(address_count)
+    blocks = [circuit.add_qubits(data_count) for _ in range(block_size)]
+    high = address[swap_bits:]
+    chain = circuit.add_qubits(len(high))
+
+    def compute(key: int, levels: Iterable[int]):
+        for level in levels:
+            circuit.x(chain[level], get_level_controls(chain, high, level, key))
+
+    max_value = 2**data_count - 1
+    levels = len(high)
+    write_controls = (chain[-1],) if chain else ()
+    key = -1
+    index = 0
+
+    for chunk in iter_value_chunks(values, chunk_size):
+        if index + len(chunk) > 2**address_count:
+            raise ValueError(f"Table larger than maximum ({2**address_count})")
+
+        for value in chunk:
+            if value < 0 or value > max_value:
+                raise ValueError(f"Value {value} out of range [0, {max_value}]")
+
+            block_key = index >> swap_bits
+            if block_key != key and levels:
+                if key < 0:
+                    compute(block_key, range(levels))
+                else:
+                    top = (block_key ^ key).bit_length() - 1
+                    toggled = levels - 1 - top
+                    # The deeper levels depend on the toggled one
+                    compute(key, range(levels - 1, toggled, -1))
+                    if toggled == 0:
+                        circuit.x(chain[0])
+                    else:
+                        circuit.x(chain[toggled], (chain[toggled - 1],))
+                    compute(block_key, range(toggled + 1, levels))
+            key = block_key
+
+            block = blocks[index & (block_size - 1)]
+            while value:
+                low = value & -value
+                circuit.append(ir.X, write_controls, (block[low.bit_length() - 1],))
+                value ^= low
+            index += 1
+
+    if key >= 0:
+        compute(key, range(levels - 1, -1, -1))
+
+    for bit in range(swap_bits):
+        step = 2**bit
+        for start in range(0, block_size, 2 * step):
+            for target1, target2 in zip(blocks[start], blocks[start + step]):
+                circuit.swap(target1, target2, (address[bit],))
+
+    return compiler.CompiledFunction(circuit, {"address": address}, blocks[0])
@@ -0,0 +1,122 @@
+"""
+Attribution of resources to the source lines of compiled functions.
+"""
+
+from typing import Dict, List, NamedTuple, Union
+
+import json
+
+from . import ir
+
+
+class LineResources(NamedTuple):
+    """Resources produced by a source line.
+
+    Attributes:
+        line (int): Line number in the function source, 0 for gates and qubits not produced by any line.
+        source (str): Stripped text of the line.
+        qubits (int): Number of qubits allocated by the line.
+        gates (int): Number of gates emitted by the line, barriers excluded.
+        time (float): Compile time of the line in seconds, nested statements excluded.
+    """
+
+    line: int
+    source: str
+    qubits: int
+    gates: int
+    time: float
+
+
+def get_line_report(
+    circuit: ir.Circuit,
+    source: Union[str, None] = None,
+    times: Union[Dict[int, float], None] = None,
+) -> List[LineResources]:
+    """Count the qubits and gates tagged with every source line.
+
+    Args:
+        circuit (ir.Circuit): Compiled circuit or `resources.ResourceCounter`.
+        source (Union[str, None], optional): Source code the lines refer to. Defaults to None.
+        times (Union[Dict[int, float], None], optional): Compile time of every line. Defaults to None.
+
+    Returns:
+        List[LineResources]: Resources of the lines, sorted by line number.
+    """
+    if times is None:
+        times = {}
+    source_lines = [] if source is None else source.splitlines()
+
+    qubits: Dict[int, int] = {}
+    for line in circuit.qubit_lines:
+        qubits[line] = qubits.get(line, 0) + 1
+
+    gates: Dict[int, int] = {}
+    for op, line in zip(circuit.ops, circuit.lines):
+        if op != ir.BARRIER:
+            gates[line] = gates.get(line, 0) + 1
+
+    report = []
+    for line in sorted(set(qubits) | set(gates) | set(times)):
+        text = ""
+        if 0 < line <= len(source_lines):
+            text = source_lines[line - 1].strip()
+        report.append(
+            LineResources(
+                line=line,
+                source=text,
+                qubits=qubits.get(line, 0),
+                gates=gates.get(line, 0),
+                time=times.get(line, 0.0),
+            )
+        )
+    return report
+
+
+def format_line_report(report: List[LineResources]) -> str:
+    """Format the report as a text table.
+
+    Args:
+        report (List[LineResources]): Resources of the lines.
+
+    Returns:
+        str: Table with a row for every line and the total.
+    """
+    rows = [("line", "qubits", "gates", "time, ms", "source")]
+    for item in report:
+        rows.append(
+            (
+                str(item.line) if item.line else "-",
+                str(item.qubits),
+                str(item.gates),
+                f"{item.time * 1000:.3f}",
+                item.source,
+            )
+        )
+    rows.append(
+        (
+            "total",
+            str(sum(item.qubits for item in report)),
+            str(sum(item.gates for item in report)),
+            f"{sum(item.time for item in report) * 1000:.3f}",
+            "",
+        )
+    )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(4)]
+    lines = []
+    for row in rows:
+        cells = [cell.rjust(width) for cell, width in zip(row, widths)]
+        lines.append("  ".join(cells + [row[4]]).rstrip())
+    return "\n".join(lines)
+
+
+def line_report_to_json(report: List[LineResources]) -> str:
+    """Serialize the report to JSON.
+
+    Args:
+        report (List[LineResources]): Resources of the lines.
+
+    Returns:
+        str: JSON list of objects with the `LineResources` fields.
+    """
+    return json.dumps([item._asdict() for item in report], indent=2)
@@ -0,0 +1,201 @@
+"""
+Resource estimation without building circuits.
+"""
+
+from typing import Callable, Dict, Iterable, NamedTuple, Sequence, Tuple, Union
+
+from array import array
+
+from . import compiler
+from . import ir
+
+
+class Resources(NamedTuple):
+    """Resources of the compiled function.
+
+    Attributes:
+        num_qubits (int): Total number of qubits.
+        peak_qubits (int): Maximum number of qubits in use at once.
+        gates (Dict[Tuple[str, int], int]): Number of gates by type ("x", "swap", "reset" or "barrier") and number of controls.
+        resets (int): Number of resets.
+        toffoli (int): Estimated number of Toffoli gates after decomposition of multi-controlled gates.
+        t_count (int): Estimated number of T gates.
+    """
+
+    num_qubits: int
+    peak_qubits: int
+    gates: Dict[Tuple[str, int], int]
+    resets: int
+    toffoli: int
+    t_count: int
+
+
+# T gates in a Toffoli gate
+TOFFOLI_T_COUNT = 7
+
+
+def get_toffoli_count(op: int, controls: int) -> int:
+    """Estimate the number of Toffoli gates in a decomposed gate.
+
+    Multi-controlled X is decomposed by a v-chain with clean ancillas.
+
+    Args:
+        op (int): Opcode.
+        controls (int): Number of controls.
+
+    Returns:
+        int: Number of Toffoli gates.
+    """
+    if op == ir.SWAP and controls:
+        # Controlled swap is a multi-controlled X between two CNOTs
+        op, controls = ir.X, controls + 1
+
+    if op != ir.X or controls < 2:
+        return 0
+    return 2 * (controls - 2) + 1
+
+
+class ResourceCounter:
+    """Replacement of `ir.Circuit` which only counts gates.
+
+    Only the opcode, the number of controls and the source line of every
+    gate are stored, so the compiler can still uncompute ranges of gates.
+    """
+
+    name: str = "circuit"
+    num_qubits: int = 0
+    line: int = 0
+
+    def __init__(self, name: str = "circuit", num_qubits: int = 0):
+        self.name = name
+        self.num_qubits = num_qubits
+        self.line = 0
+        self.ops = array("B")
+        self.num_controls = array("l")
+        self.lines = array("l")
+        self.qubit_lines = array("l", [0] * num_qubits)
+        self.counts: Dict[Tuple[int, int], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def add_qubit(self) -> int:
+        self.num_qubits += 1
+        self.qubit_lines.append(self.line)
+        return self.num_qubits - 1
+
+    def add_qubits(self, count: int) -> Sequence[int]:
+        start = self.num_qubits
+        self.num_qubits += count
+        self.qubit_lines.extend([self.line] * count)
+        return list(range(start, self.num_qubits))
+
+    def count(self, op: int, controls: int, line: Union[int, None] = None):
+        self.ops.append(op)
+        self.num_controls.append(controls)
+        self.lines.append(self.line if line is None else line)
+        key = (op, controls)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def append(
+        self,
+        op: int,
+        controls: Sequence[int],
+        targets: Sequence[int],
+        line: Union[int, None] = None,
+    ):
+        self.count(op, len(controls), line)
+
+    def append_gate(self, gate: ir.Gate):
+        self.count(gate.op, len(gate.controls), gate.line)
+
+    def extend(self, gates: Iterable[ir.Gate]):
+        for gate in gates:
+            self.count(gate.op, len(gate.controls), gate.line)
+
+    def append_inverse(self, start: int = 0, end: Union[int, None] = None):
+        """Count the inverse of the gates in range [start, end).
+
+        Args:
+            start (int, optional): First gate. Defaults to 0.
+            end (Union[int, None], optional): Gate after the last one. Defaults to the end of the circuit.
+
+        Raises:
+            ValueError: The range contains a reset, which can't be inverted.
+        """
+        if end is None:
+            end = len(self)
+
+        for i in range(end - 1, start - 1, -1):
+            if self.ops[i] == ir.RESET:
+                raise ValueError("Reset can't be inverted")
+            self.count(self.ops[i], self.num_controls[i], self.lines[i])
+
+    def x(self, targets: Union[int, Sequence[int]], controls: Sequence[int] = ()):
+        if isinstance(targets, int):
+            self.count(ir.X, len(controls))
+        else:
+            for _ in targets:
+                self.count(ir.X, len(controls))
+
+    def swap(self, target1: int, target2: int, controls: Sequence[int] = ()):
+        self.count(ir.SWAP, len(controls))
+
+    def reset(self, target: int):
+        self.count(ir.RESET, 0)
+
+    def barrier(self):
+        self.count(ir.BARRIER, 0)
+
+    def count_ops(self) -> Dict[str, int]:
+        """Count gates by their qiskit names.
+
+        Returns:
+            Dict[str, int]: Number of gates of every type.
+        """
+        counts: Dict[str, int] = {}
+        for (op, controls), count in self.counts.items():
+            name = ir.get_gate_name(ir.Gate(op, (0,) * controls, ()))
+            counts[name] = counts.get(name, 0) + count
+        return counts
+
+    def get_resources(self, peak_qubits: int) -> Resources:
+        """Summarize the counted gates.
+
+        Args:
+            peak_qubits (int): Maximum number of qubits in use at once.
+
+        Returns:
+            Resources: The resources.
+        """
+        gates = {
+            (ir.OP_NAMES[op], controls): count
+            for (op, controls), count in self.counts.items()
+        }
+        toffoli = sum(
+            get_toffoli_count(op, controls) * count
+            for (op, controls), count in self.counts.items()
+        )
+        return Resources(
+            num_qubits=self.num_qubits,
+            peak_qubits=peak_qubits,
+            gates=gates,
+            resets=self.counts.get((ir.RESET, 0), 0),
+            toffoli=toffoli,
+            t_count=toffoli * TOFFOLI_T_COUNT,
+        )
+
+
+def estimate_resources(func: Callable, **options) -> Resources:
+    """Estimate the resources of the compiled function without building the circuit.
+
+    Args:
+        func (Callable): Function to compile.
+        **options: Options passed to the `Compiler`.
+
+    Returns:
+        Resources: The resources.
+    """
+    comp = compiler.Compiler(dry_run=True, **options)
+    comp.assemble(func)
+    return comp.get_resources()
@@ -0,0 +1,117 @@
+"""
+Depth-minimizing scheduling of compiled circuits.
+"""
+
+from typing import Dict, List, Set, Tuple
+
+from . import ir
+
+# How a gate uses a qubit
+CONTROL = 0
+X_TARGET = 1
+OTHER = 2
+
+
+def get_qubit_uses(gate: ir.Gate) -> List[Tuple[int, int]]:
+    """Get the qubits of the gate and how they are used.
+
+    Gates commute if they use every common qubit as a control or every
+    common qubit as a target of X.
+
+    Args:
+        gate (ir.Gate): Gate.
+
+    Returns:
+        List[Tuple[int, int]]: Pairs of qubit and use.
+    """
+    uses = [(ir.get_qubit(ctrl), CONTROL) for ctrl in gate.controls]
+    target_use = X_TARGET if gate.op == ir.X else OTHER
+    uses += [(target, target_use) for target in gate.targets]
+    return uses
+
+
+def get_layers(circuit: ir.Circuit) -> List[List[ir.Gate]]:
+    """Split the circuit into layers of gates on disjoint qubits.
+
+    Every gate is placed in the earliest layer after the gates it doesn't
+    commute with, so commuting gates of different operations overlap.
+    Barriers are kept in their own layers and nothing is moved across them.
+
+    Args:
+        circuit (ir.Circuit): Circuit to schedule.
+
+    Returns:
+        List[List[ir.Gate]]: Layers of gates.
+    """
+    layers: List[List[ir.Gate]] = []
+    # Layers with a gate on the qubit
+    occupied: Dict[int, Set[int]] = {}
+    # Current group of commuting uses of every qubit: use, last layer of the
+    # previous group and last layer of the group
+    groups: Dict[int, Tuple[int, int, int]] = {}
+    fence = -1
+
+    for gate in circuit:
+        if gate.op == ir.BARRIER:
+            layers.append([gate])
+            fence = len(layers) - 1
+            groups.clear()
+            continue
+
+        uses = get_qubit_uses(gate)
+
+        layer = fence + 1
+        for qubit, use in uses:
+            if qubit in groups:
+                group_use, group_start, group_end = groups[qubit]
+                if use == group_use and use != OTHER:
+                    layer = max(layer, group_start + 1)
+                else:
+                    layer = max(layer, group_end + 1)
+
+        while any(layer in occupied.get(qubit, ()) for qubit, _ in uses):
+            layer += 1
+
+        while len(layers) <= layer:
+            layers.append([])
+        layers[layer].append(gate)
+
+        for qubit, use in uses:
+            occupied.setdefault(qubit, set()).add(layer)
+            if qubit in groups:
+                group_use, group_start, group_end = groups[qubit]
+                if use == group_use and use != OTHER:
+                    groups[qubit] = (use, group_start, max(group_end, layer))
+                    continue
+                groups[qubit] = (use, group_end, layer)
+            else:
+                groups[qubit] = (use, fence, layer)
+
+    return [layer for layer in layers if layer]
+
+
+def schedule(circuit: ir.Circuit) -> ir.Circuit:
+    """Reorder the gates layer by layer.
+
+    Args:
+        circuit (ir.Circuit): Circuit to schedule.
+
+    Returns:
+        ir.Circuit: Equivalent circuit with gates sorted by layers.
+    """
+    res = circuit.empty_copy()
+    for layer in get_layers(circuit):
+        res.extend(layer)
+    return res
+
+
+def get_depth(circuit: ir.Circuit) -> int:
+    """Get the depth of the circuit after scheduling.
+
+    Args:
+        circuit (ir.Circuit): Circuit.
+
+    Returns:
+        int: Number of layers without barriers.
+    """
+    return sum(1 for layer in get_layers(circuit) if layer[0].op != ir.BARRIER)
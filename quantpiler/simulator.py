@@ -0,0 +1,445 @@
+"""
+Classical simulator for reversible circuits.
+
+Circuits built only from X-type gates (x, cx, ccx, mcx), swaps, resets and
+measurements map basis states to basis states, so they can be evaluated on
+classical bits instead of a state vector. Every qubit is stored as a vector of
+64-bit words where bit ``k`` of the vector is the qubit value in lane ``k``, so
+one pass over the circuit evaluates many independent inputs at once.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from qiskit import QuantumRegister
+from qiskit.circuit import QuantumCircuit, Instruction, ControlledGate
+
+from . import ir
+
+LANE_BITS = 64
+
+# Flattened operation kinds
+OP_X = 0
+OP_SWAP = 1
+OP_RESET = 2
+OP_MEASURE = 3
+
+_SKIPPED = ("barrier", "delay", "id")
+
+Op = Tuple[int, Tuple[Tuple[int, bool], ...], Tuple[int, ...]]
+
+
+def get_words_count(lanes: int) -> int:
+    """Get the number of 64-bit words needed to store given number of lanes.
+
+    Args:
+        lanes (int): Number of lanes.
+
+    Returns:
+        int: Number of words.
+    """
+    return max(1, (lanes + LANE_BITS - 1) // LANE_BITS)
+
+
+def pack_values(values: Union[Sequence[int], np.ndarray], bits: int) -> np.ndarray:
+    """Pack integers into per-bit lane vectors.
+
+    Args:
+        values (Union[Sequence[int], np.ndarray]): One integer per lane.
+        bits (int): Number of low bits of every value to pack.
+
+    Returns:
+        np.ndarray: Array of shape (bits, words) where bit ``k`` of row ``i`` is bit ``i`` of ``values[k]``.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "iuO":
+        values = values.astype(np.int64)
+
+    lanes = len(values)
+    words = get_words_count(lanes)
+    packed = np.zeros((bits, words), dtype=np.uint64)
+
+    if lanes == 0:
+        return packed
+
+    one = values.dtype.type(1) if values.dtype.kind == "u" else 1
+    lane_bits = np.zeros(words * LANE_BITS, dtype=np.uint8)
+    for i in range(bits):
+        shift = values.dtype.type(i) if values.dtype.kind == "u" else i
+        lane_bits[:lanes] = (values >> shift) & one
+        packed[i] = np.packbits(lane_bits, bitorder="little").view("<u8")
+
+    return packed
+
+
+def unpack_values(packed: np.ndarray, lanes: int) -> np.ndarray:
+    """Unpack per-bit lane vectors into integers.
+
+    Args:
+        packed (np.ndarray): Array of shape (bits, words), as returned by `pack_values`.
+        lanes (int): Number of lanes to unpack.
+
+    Returns:
+        np.ndarray: One integer per lane. The dtype is uint64 for up to 64 bits and object (python int) otherwise.
+    """
+    bits = len(packed)
+    wide = bits > LANE_BITS
+
+    values = np.zeros(lanes, dtype=object if wide else np.uint64)
+    for i in range(bits):
+        lane_bits = np.unpackbits(
+            np.ascontiguousarray(packed[i]).view(np.uint8), bitorder="little"
+        )[:lanes]
+        if wide:
+            values |= lane_bits.astype(object) << i
+        else:
+            values |= lane_bits.astype(np.uint64) << np.uint64(i)
+
+    return values
+
+
+def _flatten_instruction(
+    instruction: Instruction,
+    qubits: Sequence[int],
+    clbits: Sequence[int],
+    ops: List[Op],
+):
+    name = instruction.name
+
+    if getattr(instruction, "condition", None) is not None:
+        raise NotImplementedError(f"Classically conditioned {name} is not reversible")
+
+    if name in _SKIPPED:
+        return
+    elif name == "measure":
+        ops.append((OP_MEASURE, (), (qubits[0], clbits[0])))
+    elif name == "reset":
+        ops.append((OP_RESET, (), (qubits[0],)))
+    elif name == "x":
+        ops.append((OP_X, (), (qubits[0],)))
+    elif name == "swap":
+        ops.append((OP_SWAP, (), (qubits[0], qubits[1])))
+    elif isinstance(instruction, ControlledGate) and instruction.base_gate.name in (
+        "x",
+        "swap",
+    ):
+        ctrl_count = instruction.num_ctrl_qubits
+        ctrl_state = instruction.ctrl_state
+        controls = tuple(
+            (qubits[i], bool((ctrl_state >> i) & 1)) for i in range(ctrl_count)
+        )
+        if instruction.base_gate.name == "x":
+            ops.append((OP_X, controls, (qubits[ctrl_count],)))
+        else:
+            targets = (qubits[ctrl_count], qubits[ctrl_count + 1])
+            ops.append((OP_SWAP, controls, targets))
+    elif instruction.definition is not None:
+        definition = instruction.definition
+        sub_qubits = {bit: qubits[i] for i, bit in enumerate(definition.qubits)}
+        sub_clbits = {bit: clbits[i] for i, bit in enumerate(definition.clbits)}
+        for sub_inst in definition.data:
+            _flatten_instruction(
+                sub_inst.operation,
+                [sub_qubits[q] for q in sub_inst.qubits],
+                [sub_clbits[c] for c in sub_inst.clbits],
+                ops,
+            )
+    else:
+        raise NotImplementedError(f"Unsupported operation: {name}")
+
+
+def flatten_ir(circuit: ir.Circuit) -> List[Op]:
+    """Convert compiler circuit into a list of reversible operations.
+
+    Args:
+        circuit (ir.Circuit): Circuit to convert.
+
+    Returns:
+        List[Op]: Flattened operations.
+    """
+    kinds = {ir.X: OP_X, ir.SWAP: OP_SWAP, ir.RESET: OP_RESET}
+
+    ops: List[Op] = []
+    for gate in circuit:
+        if gate.op != ir.BARRIER:
+            controls = tuple((ir.get_qubit(ctrl), ctrl >= 0) for ctrl in gate.controls)
+            ops.append((kinds[gate.op], controls, gate.targets))
+    return ops
+
+
+def flatten_circuit(qc: Union[QuantumCircuit, ir.Circuit]) -> List[Op]:
+    """Convert circuit into a list of reversible operations on qubit indices.
+
+    Args:
+        qc (Union[QuantumCircuit, ir.Circuit]): Circuit to convert.
+
+    Raises:
+        NotImplementedError: The circuit contains a non-reversible operation.
+
+    Returns:
+        List[Op]: Flattened operations.
+    """
+    if isinstance(qc, ir.Circuit):
+        return flatten_ir(qc)
+
+    qubit_indices = {bit: i for i, bit in enumerate(qc.qubits)}
+    clbit_indices = {bit: i for i, bit in enumerate(qc.clbits)}
+
+    ops: List[Op] = []
+    for inst in qc.data:
+        _flatten_instruction(
+            inst.operation,
+            [qubit_indices[q] for q in inst.qubits],
+            [clbit_indices[c] for c in inst.clbits],
+            ops,
+        )
+
+    return ops
+
+
+def is_reversible(qc: Union[QuantumCircuit, ir.Circuit]) -> bool:
+    """Check if circuit can be executed by the reversible simulator.
+
+    Args:
+        qc (Union[QuantumCircuit, ir.Circuit]): Circuit to check.
+
+    Returns:
+        bool: True if all the operations are classical reversible gates, resets or measurements.
+    """
+    try:
+        flatten_circuit(qc)
+    except NotImplementedError:
+        return False
+    return True
+
+
+def run_ops(ops: Iterable[Op], state: np.ndarray, clbits: np.ndarray):
+    """Apply flattened operations to packed qubit values in place.
+
+    Args:
+        ops (Iterable[Op]): Operations returned by `flatten_circuit`.
+        state (np.ndarray): Packed qubit values of shape (qubits, words).
+        clbits (np.ndarray): Packed classical bit values of shape (clbits, words).
+    """
+    ones = np.full(state.shape[1], np.uint64(2**64 - 1), dtype=np.uint64)
+
+    for kind, controls, targets in ops:
+        if kind == OP_X or kind == OP_SWAP:
+            if controls:
+                mask = None
+                for ctrl, positive in controls:
+                    value = state[ctrl] if positive else ~state[ctrl]
+                    mask = value if mask is None else mask & value
+            else:
+                mask = ones
+
+            if kind == OP_X:
+                state[targets[0]] ^= mask
+            else:
+                a, b = targets
+                diff = (state[a] ^ state[b]) & mask
+                state[a] ^= diff
+                state[b] ^= diff
+        elif kind == OP_RESET:
+            state[targets[0]] = 0
+        elif kind == OP_MEASURE:
+            clbits[targets[1]] = state[targets[0]]
+
+
+def simulate(
+    qc: QuantumCircuit, initial: Union[None, Dict[int, Sequence[int]]] = None, lanes=1
+) -> np.ndarray:
+    """Execute circuit on classical bits.
+
+    Args:
+        qc (QuantumCircuit): Circuit to execute.
+        initial (Union[None, Dict[int, Sequence[int]]], optional): Initial value of qubits by qubit index, one value per lane. Other qubits start in 0. Defaults to None.
+        lanes (int, optional): Number of independent executions. Defaults to 1.
+
+    Returns:
+        np.ndarray: Measured classical bits, one row per clbit, one column per lane.
+    """
+    words = get_words_count(lanes)
+    state = np.zeros((qc.num_qubits, words), dtype=np.uint64)
+    clbits = np.zeros((qc.num_clbits, words), dtype=np.uint64)
+
+    if initial:
+        for qubit, values in initial.items():
+            state[qubit] = pack_values(values, 1)[0]
+
+    run_ops(flatten_circuit(qc), state, clbits)
+
+    res = np.zeros((qc.num_clbits, lanes), dtype=np.uint8)
+    for i in range(qc.num_clbits):
+        res[i] = unpack_values(clbits[i : i + 1], lanes)
+    return res
+
+
+def split_inputs(
+    inputs: Union[None, np.ndarray, Dict[str, Sequence[int]]],
+    widths: Dict[str, int],
+    start: int = 0,
+    stop: int = 0,
+) -> Dict[str, np.ndarray]:
+    """Get the values of every argument from batched inputs.
+
+    Args:
+        inputs (Union[None, np.ndarray, Dict[str, Sequence[int]]]): Inputs in one of the formats accepted by `evaluate`.
+        widths (Dict[str, int]): Size of every argument.
+        start (int, optional): First input to take. Defaults to 0.
+        stop (int, optional): Input after the last one to take. Defaults to 0.
+
+    Raises:
+        ValueError: Inputs don't match the arguments.
+
+    Returns:
+        Dict[str, np.ndarray]: Values of every argument.
+    """
+    if inputs is None:
+        index = np.arange(start, stop, dtype=np.uint64)
+    elif isinstance(inputs, dict):
+        if set(inputs) != set(widths):
+            raise ValueError(f"Expected inputs for arguments {list(widths)}")
+        return {name: np.asarray(inputs[name])[start:stop] for name in widths}
+    else:
+        inputs = np.asarray(inputs)
+        if inputs.ndim == 2:
+            if inputs.shape[1] != len(widths):
+                raise ValueError(f"Expected {len(widths)} columns in inputs")
+            return {name: inputs[start:stop, i] for i, name in enumerate(widths)}
+        index = inputs[start:stop]
+        if index.dtype.kind == "i":
+            index = index.astype(np.uint64)
+
+    values = {}
+    offset = 0
+    for name, width in widths.items():
+        if index.dtype.kind == "u":
+            values[name] = (index >> np.uint64(offset)) & np.uint64(2**width - 1)
+        else:
+            values[name] = (index >> offset) & (2**width - 1)
+        offset += width
+    return values
+
+
+def evaluate(
+    qc: Union[QuantumCircuit, ir.Circuit],
+    arguments: Dict[str, Union[QuantumRegister, Sequence[int]]],
+    ret: Union[QuantumRegister, Sequence[int]],
+    inputs: Union[None, np.ndarray, Dict[str, Sequence[int]]] = None,
+    chunk_size: int = 2**20,
+) -> np.ndarray:
+    """Evaluate a compiled function over many inputs at once.
+
+    When `inputs` is None the function is evaluated over every assignment of
+    its arguments, so the result is its full truth table. One-dimensional
+    inputs are indices in that table: the first argument occupies the lowest
+    bits of the index, the next argument the bits above it and so on.
+    Two-dimensional inputs hold one column per argument and a dict maps
+    argument names to their values.
+
+    Args:
+        qc (Union[QuantumCircuit, ir.Circuit]): Reversible circuit of the function.
+        arguments (Dict[str, Union[QuantumRegister, Sequence[int]]]): Registers of the function arguments. Qubit ids for `ir.Circuit`.
+        ret (Union[QuantumRegister, Sequence[int]]): Register with the function result. Qubit ids for `ir.Circuit`.
+        inputs (Union[None, np.ndarray, Dict[str, Sequence[int]]], optional): Inputs to evaluate. Defaults to None.
+        chunk_size (int, optional): Maximum number of inputs simulated in one pass. Defaults to 2**20.
+
+    Raises:
+        ValueError: Inputs don't match the arguments.
+
+    Returns:
+        np.ndarray: The function result for every input.
+    """
+    widths = {name: len(reg) for name, reg in arguments.items()}
+
+    if inputs is None:
+        count = 2 ** sum(widths.values())
+    elif isinstance(inputs, dict):
+        count = len(next(iter(inputs.values()))) if inputs else 1
+    else:
+        count = len(inputs)
+
+    ops = flatten_circuit(qc)
+    if isinstance(qc, ir.Circuit):
+        num_clbits = 0
+        arg_indices = {name: list(reg) for name, reg in arguments.items()}
+        ret_indices = list(ret)
+    else:
+        num_clbits = qc.num_clbits
+        qubit_indices = {bit: i for i, bit in enumerate(qc.qubits)}
+        arg_indices = {
+            name: [qubit_indices[bit] for bit in reg] for name, reg in arguments.items()
+        }
+        ret_indices = [qubit_indices[bit] for bit in ret]
+
+    results = []
+    for start in range(0, count, chunk_size):
+        stop = min(start + chunk_size, count)
+        lanes = stop - start
+        words = get_words_count(lanes)
+
+        state = np.zeros((qc.num_qubits, words), dtype=np.uint64)
+        clbits = np.zeros((num_clbits, words), dtype=np.uint64)
+
+        values = split_inputs(inputs, widths, start, stop)
+        for name, indices in arg_indices.items():
+            state[indices] = pack_values(values[name], len(indices))
+
+        run_ops(ops, state, clbits)
+
+        results.append(unpack_values(state[ret_indices], lanes))
+
+    if not results:
+        return unpack_values(np.zeros((len(ret_indices), 1), dtype=np.uint64), 0)
+    return np.concatenate(results)
+
+
+def format_counts_key(qc: QuantumCircuit, clbits: Sequence[int]) -> str:
+    """Format measured classical bits the same way as qiskit counts.
+
+    Args:
+        qc (QuantumCircuit): Executed circuit.
+        clbits (Sequence[int]): Value of every classical bit.
+
+    Returns:
+        str: Registers in reverse order separated by spaces, most significant bit first.
+    """
+    clbit_indices = {bit: i for i, bit in enumerate(qc.clbits)}
+
+    parts = []
+    for creg in reversed(qc.cregs):
+        parts.append("".join(str(clbits[clbit_indices[bit]]) for bit in creg[::-1]))
+    return " ".join(parts)
+
+
+class ReversibleSimulator:
+    """Backend executing reversible circuits on classical bits.
+
+    The time of the simulation is linear in the number of gates and does not
+    depend exponentially on the number of qubits.
+    """
+
+    name = "reversible_simulator"
+
+    def run(
+        self, circuits: Union[QuantumCircuit, List[QuantumCircuit]], shots: int = 1
+    ) -> List[Dict[str, int]]:
+        """Execute circuits and return their counts.
+
+        Args:
+            circuits (Union[QuantumCircuit, List[QuantumCircuit]]): Circuits to execute.
+            shots (int, optional): Number of shots. All shots give the same result. Defaults to 1.
+
+        Returns:
+            List[Dict[str, int]]: Counts of every circuit in the qiskit format.
+        """
+        if isinstance(circuits, QuantumCircuit):
+            circuits = [circuits]
+
+        counts = []
+        for qc in circuits:
+            clbits = simulate(qc)[:, 0]
+            counts.append({format_counts_key(qc, clbits): shots})
+        return counts
@@ -4,12 +4,13 @@ Some useful utilites.
 
 from typing import List, Dict, Union, Callable
 
-from math import log2, ceil
+import numpy as np
 
-from qiskit import BasicAer, execute
-from qiskit.circuit import QuantumCircuit, ClassicalRegister
+from qiskit import BasicAer, QuantumRegister, execute
+from qiskit.circuit import QuantumCircuit
 
-from . import compiler
+from . import cache
+from .simulator import ReversibleSimulator, is_reversible, evaluate
 
 
 def int_to_bits(number: int, bits=None) -> List[bool]:
@@ -61,6 +62,23 @@ def get_uint_len(number: int) -> int:
     return number.bit_length()
 
 
+def gray_to_uint(code: int) -> int:
+    """Get the position of the value in the binary reflected Gray code.
+
+    Args:
+        code (int): Gray code value.
+
+    Returns:
+        int: Index i such that i ^ (i >> 1) == code.
+    """
+    res = code
+    code >>= 1
+    while code:
+        res ^= code
+        code >>= 1
+    return res
+
+
 def bits_to_int(bitlist: List[bool]) -> int:
     res = 0
 
@@ -73,6 +91,42 @@ def bits_to_int(bitlist: List[bool]) -> int:
         return res
 
 
+_qasm_simulator = None
+
+
+def get_qasm_simulator():
+    """Get the shared BasicAer qasm_simulator backend.
+
+    Returns:
+        BasicAer qasm_simulator backend.
+    """
+    global _qasm_simulator
+    if _qasm_simulator is None:
+        _qasm_simulator = BasicAer.get_backend("qasm_simulator")
+    return _qasm_simulator
+
+
+def run_once(qc: QuantumCircuit) -> str:
+    """Execute circuit with one shot and return the measured bits.
+
+    Reversible circuits are executed by the `ReversibleSimulator`, all other
+    circuits by the BasicAer qasm_simulator.
+
+    Args:
+        qc (QuantumCircuit): Circuit with measurements.
+
+    Returns:
+        str: Measured bits in the qiskit counts format.
+    """
+    if is_reversible(qc):
+        answer = ReversibleSimulator().run(qc)[0]
+    else:
+        result = execute(qc, backend=get_qasm_simulator(), shots=1).result()
+        answer = result.get_counts()
+
+    return list(answer.keys())[0]
+
+
 def execute_qc_once(qc: QuantumCircuit, measure=True) -> List[bool]:
     """Execute circuit once and return result.
 
@@ -87,28 +141,122 @@ def execute_qc_once(qc: QuantumCircuit, measure=True) -> List[bool]:
     if measure:
         m_qc.measure_all()
 
-    qasm_sim = BasicAer.get_backend("qasm_simulator")
-    result = execute(m_qc, backend=qasm_sim, shots=1).result()
+    return run_once(m_qc)
 
-    answer = result.get_counts()
-    bits = list(answer.keys())[0]
 
-    return bits
+def get_arg_value(value: int, size: int) -> int:
+    """Convert argument value to the unsigned value of its register.
 
+    Negative values are stored in two's complement.
+
+    Args:
+        value (int): Argument value.
+        size (int): Argument register size.
+
+    Raises:
+        ValueError: Value doesn't fit into the register.
+
+    Returns:
+        int: Unsigned register value.
+    """
+    if value >= 2**size or value < -(2 ** (size - 1)):
+        raise ValueError(f"Value {value} doesn't fit into {size} qubits")
+    return value & (2**size - 1)
 
-def compile_execute(func: Callable, args: Dict[str, int] = {}) -> Union[None, int]:
-    comp = compiler.Compiler()
-    comp.assemble(func)
 
-    qc = comp.get_qc()
-    ret = comp.get_ret()
-    ret_cl = ClassicalRegister(len(ret))
+def bind_arguments(
+    qc: QuantumCircuit, arguments: Dict[str, QuantumRegister], args: Dict[str, int]
+) -> QuantumCircuit:
+    """Prepare argument registers in given values before the circuit.
+
+    Args:
+        qc (QuantumCircuit): Circuit of the compiled function.
+        arguments (Dict[str, QuantumRegister]): Registers of the function arguments.
+        args (Dict[str, int]): Value of every argument. Missing arguments are 0.
 
-    qc.add_register(ret_cl)
-    qc.measure(ret, ret_cl)
+    Raises:
+        ValueError: Unknown argument or value doesn't fit into its register.
 
-    qasm_sim = BasicAer.get_backend("qasm_simulator")
-    result = execute(qc, backend=qasm_sim, shots=1).result()
-    answer = list(result.get_counts().keys())[0]
+    Returns:
+        QuantumCircuit: New circuit with argument preparation.
+    """
+    for name in args:
+        if name not in arguments:
+            raise ValueError(f"Unknown argument: {name}")
+
+    bound_qc = QuantumCircuit(*qc.qregs, *qc.cregs, name=qc.name)
+    for name, reg in arguments.items():
+        value = get_arg_value(args.get(name, 0), len(reg))
+        for i in range(len(reg)):
+            if (value >> i) & 1:
+                bound_qc.x(reg[i])
+
+    bound_qc.compose(qc, inplace=True)
+    return bound_qc
+
+
+def compile_execute(func: Callable, args: Dict[str, int] = {}) -> Union[None, str]:
+    """Compile function and execute it with given arguments.
+
+    Args:
+        func (Callable): Function to compile.
+        args (Dict[str, int], optional): Value of every argument. Missing arguments are 0. Defaults to {}.
+
+    Returns:
+        Union[None, str]: Bits of the result, most significant first. None if the function returns nothing.
+    """
+    return compile_execute_many(func, [args])[0]
+
+
+def compile_execute_many(
+    func: Callable, args_list: List[Dict[str, int]]
+) -> List[Union[None, str]]:
+    """Compile function once and execute it with every set of arguments.
+
+    All sets of arguments are evaluated in one bit-parallel pass of the
+    reversible simulator over the compiled circuit.
+
+    Args:
+        func (Callable): Function to compile.
+        args_list (List[Dict[str, int]]): Sets of argument values. Missing arguments are 0.
+
+    Raises:
+        ValueError: Unknown argument or value doesn't fit into its register.
+
+    Returns:
+        List[Union[None, str]]: Bits of the result for every set of arguments, most significant first.
+    """
+    compiled = cache.compile_cached(func)
+
+    if compiled.ret is None:
+        return [None] * len(args_list)
+
+    inputs = {name: [] for name in compiled.arguments}
+    for args in args_list:
+        for name in args:
+            if name not in compiled.arguments:
+                raise ValueError(f"Unknown argument: {name}")
+        for name, reg in compiled.arguments.items():
+            inputs[name].append(get_arg_value(args.get(name, 0), len(reg)))
+
+    values = evaluate(compiled.circuit, compiled.arguments, compiled.ret, inputs)
+    return [format(int(value), f"0{len(compiled.ret)}b") for value in values]
+
+
+def compile_truth_table(
+    func: Callable, inputs: Union[None, np.ndarray, Dict[str, List[int]]] = None
+) -> np.ndarray:
+    """Compile function and evaluate it over many inputs in one batched pass.
+
+    See `quantpiler.simulator.evaluate` for the format of inputs.
+
+    Args:
+        func (Callable): Function to compile.
+        inputs (Union[None, np.ndarray, Dict[str, List[int]]], optional): Inputs to evaluate. Defaults to every possible input.
+
+    Returns:
+        np.ndarray: The function result for every input.
+    """
+    compiled = cache.compile_cached(func)
 
-    return answer
+    return evaluate(compiled.circuit, compiled.arguments, compiled.ret, inputs)
@@ -1,8 +1,11 @@
-from quantpiler.adder import new_adder
+import pytest
+
+from quantpiler.adder import new_adder, new_inplace_adder
 
 from qiskit import QuantumRegister, AncillaRegister
 from qiskit.circuit import QuantumCircuit
 
+from quantpiler.simulator import evaluate
 from quantpiler.utils import execute_qc_once
 
 
@@ -23,3 +26,55 @@ def test_adder():
 
     result = execute_qc_once(qc)
     assert result == "110010010110011100"
+
+
+@pytest.mark.parametrize("controlled", [False, True])
+@pytest.mark.parametrize("carry_out", [False, True])
+def test_inplace_adder(controlled, carry_out):
+    size = 3
+    qc = new_inplace_adder(size, controlled=controlled, carry_out=carry_out)
+    regs = {qreg.name: qreg for qreg in qc.qregs}
+    assert qc.num_qubits == 2 * size + 1 + controlled + carry_out
+
+    arguments = {"a": regs["a"], "b": regs["b"]}
+    if controlled:
+        arguments["ctrl"] = regs["ctrl"]
+
+    mask = 2**size - 1
+    results = {name: evaluate(qc, arguments, regs[name]) for name in regs}
+    for index in range(2 ** len(qc.qubits[: 2 * size + controlled])):
+        a, b = index & mask, (index >> size) & mask
+        enabled = not controlled or (index >> (2 * size)) & 1
+        total = a + b if enabled else b
+
+        assert results["b"][index] == total & mask
+        assert results["a"][index] == a
+        assert results["anc"][index] == 0
+        if carry_out:
+            assert results["cout"][index] == total >> size
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 8])
+def test_lookahead_adder(size):
+    qc = new_adder(size, method="lookahead")
+    regs = {qreg.name: qreg for qreg in qc.qregs}
+    arguments = {"a": regs["a"], "b": regs["b"]}
+
+    mask = 2**size - 1
+    table = evaluate(qc, arguments, regs["sum"])
+    assert list(table) == [((i & mask) + (i >> size)) & mask for i in range(4**size)]
+    if "anc" in regs:
+        assert not evaluate(qc, arguments, regs["anc"]).any()
+
+    assert qc.metadata["method"] == "lookahead"
+    assert qc.metadata["qubits"] == qc.num_qubits
+
+
+def test_lookahead_adder_depth():
+    ripple = new_adder(64).metadata
+    lookahead = new_adder(64, method="lookahead").metadata
+    assert lookahead["depth"] * 3 < ripple["depth"]
+    assert lookahead["qubits"] == 3 * 64 + lookahead["ancillas"]
+
+    with pytest.raises(ValueError):
+        new_adder(4, method="unknown")
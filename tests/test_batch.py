@@ -0,0 +1,41 @@
+import pytest
+
+from quantpiler import batch, compiler
+from quantpiler.simulator import evaluate
+
+
+def xor_func(a: 2, b: 2) -> 2:
+    return a ^ b
+
+
+def and_source(shift: int) -> str:
+    return f"def func(a: 3, b: 3) -> 3:\n    return (a >> {shift}) & b\n"
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_compile_many(max_workers):
+    funcs = [xor_func, and_source(0), "def broken(a: 2) -> 2:\n    assert a\n"]
+    funcs += [and_source(shift) for shift in range(1, 3)]
+
+    results = batch.compile_many(funcs, max_workers=max_workers, add_barriers=False)
+    assert len(results) == len(funcs)
+    assert isinstance(results[2], NotImplementedError)
+
+    compiled = results[0]
+    assert isinstance(compiled, compiler.CompiledFunction)
+    table = evaluate(compiled.get_qc(), compiled.get_arguments(), compiled.get_ret())
+    assert list(table) == [(i & 3) ^ (i >> 2) for i in range(16)]
+
+    for shift, compiled in zip([0, 1, 2], [results[1], results[3], results[4]]):
+        comp = compiler.Compiler(add_barriers=False)
+        comp.assemble_source(and_source(shift))
+        assert list(compiled.get_circuit()) == list(comp.get_circuit())
+        assert compiled.arguments == {
+            name: list(reg) for name, reg in comp.arguments.items()
+        }
+
+
+def test_compile_many_no_source():
+    results = batch.compile_many([len, xor_func], max_workers=1)
+    assert isinstance(results[0], TypeError)
+    assert isinstance(results[1], compiler.CompiledFunction)
@@ -0,0 +1,35 @@
+from quantpiler import cache
+from quantpiler.simulator import evaluate
+
+
+def xor_func(a: 2, b: 2) -> 2:
+    c = a ^ b
+    return c
+
+
+def test_compile_cached():
+    comp_cache = cache.CompileCache(maxsize=1)
+
+    first = cache.compile_cached(xor_func, cache=comp_cache)
+    first.get_qc().x(0)
+    second = cache.compile_cached(xor_func, cache=comp_cache)
+    assert second.get_qc() != first.get_qc()
+    assert len(comp_cache) == 1
+
+    table = evaluate(second.get_qc(), second.get_arguments(), second.get_ret())
+    assert list(table) == [(i & 3) ^ (i >> 2) for i in range(16)]
+
+    cache.compile_cached(xor_func, cache=comp_cache, add_barriers=False)
+    assert len(comp_cache) == 1
+
+
+def test_cache_dir(tmp_path):
+    comp_cache = cache.CompileCache(cache_dir=str(tmp_path))
+    compiled = comp_cache.compile(xor_func)
+    assert len(list(tmp_path.glob("*.pickle"))) == 1
+
+    disk_cache = cache.CompileCache(cache_dir=str(tmp_path))
+    loaded = disk_cache.compile(xor_func)
+    assert loaded.get_qc() == compiled.get_qc()
+    assert loaded.ret == compiled.ret
+    assert loaded.arguments == compiled.arguments
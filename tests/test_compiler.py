@@ -1,13 +1,14 @@
 from quantpiler import compiler
-from quantpiler.qreg import QReg
+from quantpiler import ir
 from quantpiler import utils
+from quantpiler.simulator import evaluate
 
-from qiskit.circuit.quantumregister import Qubit, AncillaQubit
 from qiskit import ClassicalRegister
-from qiskit.circuit import QuantumCircuit
 
 import ast
 
+import pytest
+
 
 def test_get_args_vars():
     def some_func(a: 1, b: 3, c: 8, d: 5):
@@ -25,26 +26,461 @@ def test_get_used_vars():
 
 
 def test_assemble_xor():
-    a = QReg(4)
+    comp = compiler.Compiler()
+    comp.set_circuit(ir.Circuit())
+
+    a = comp.create_reg(4)
     a.tmp = True
-    b = QReg(5)
-    c_cl = ClassicalRegister(5)
-    qc = QuantumCircuit(a, b, c_cl)
+    b = comp.create_reg(5)
 
-    qc.x(a[1])
+    comp.x(a[1])
 
-    qc.x(b[2])
+    comp.x(b[2])
 
-    qc.x(a[3])
-    qc.x(b[3])
+    comp.x(a[3])
+    comp.x(b[3])
 
-    qc.x(b[4])
+    comp.x(b[4])
 
-    comp = compiler.Compiler()
-    comp.set_qc(qc)
     c = comp.assemble_xor([a, b])
 
-    qc.measure(c, c_cl)
+    qc = comp.get_qc()
+    c_cl = ClassicalRegister(5)
+    qc.add_register(c_cl)
+    qc.measure([qc.qubits[i] for i in c], c_cl)
 
     res = utils.execute_qc_once(qc)
     assert res[-5:] == "10110"
+
+
+def test_compiled_function():
+    def inv(a: 3) -> 3:
+        b = ~a
+        return b
+
+    comp = compiler.Compiler()
+    comp.assemble(inv)
+
+    qc = comp.get_qc()
+    assert [reg.name for reg in qc.qregs] == ["a", "q"]
+    assert qc.count_ops()["cx"] == 3
+    assert len(comp.get_ret()) == 3
+
+    compiled = comp.get_compiled()
+    assert compiled.get_qc().count_ops() == qc.count_ops()
+    assert list(compiled.get_arguments()["a"]) == list(qc.qregs[0])
+
+
+def test_get_live_vars():
+    st = ast.parse(
+        "c = a ^ b\nd = c & a\nif d:\n    e = d\nelse:\n    e = b\nreturn e"
+    ).body
+    live = compiler.get_live_vars(st, set())
+    assert live == [{"a", "b", "c", "e"}, {"b", "d", "e"}, {"e"}, set()]
+
+    # The old value of c is kept if the branch isn't taken
+    body = ast.parse("c = a\nc = a >> 1").body
+    assert compiler.get_live_vars(body, {"c"}) == [{"a"}, {"c"}]
+    assert compiler.get_live_vars(body, {"c"}, conditional=True) == [
+        {"a", "c"},
+        {"c"},
+    ]
+
+
+def test_free_dead_variables():
+    def chain(a: 4, b: 4) -> 4:
+        c = a ^ b
+        d = c & a
+        e = d | b
+        f = ~e
+        g = f
+        return g
+
+    tables = []
+    qubits = []
+    for free_dead_variables in (False, True):
+        comp = compiler.Compiler(free_dead_variables=free_dead_variables)
+        comp.assemble(chain)
+        compiled = comp.get_compiled()
+
+        qubits.append(compiled.circuit.num_qubits)
+        tables.append(
+            list(evaluate(compiled.circuit, compiled.arguments, compiled.ret))
+        )
+
+    expected = []
+    for i in range(256):
+        a, b = i & 15, i >> 4
+        expected.append(~(((a ^ b) & a) | b) & 15)
+
+    assert tables[0] == expected
+    assert tables[1] == expected
+    assert qubits[1] < qubits[0]
+
+
+def test_reassign_from_consumed_value():
+    # The shift drops the lowest qubit of the old value, which must not be
+    # dropped again when the variable is reassigned
+    def func(a: 3, b: 3):
+        v = int(4) + (b << 1)
+        v = v >> 1
+        return v + a
+
+    comp = compiler.Compiler()
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    mask = 2 ** len(compiled.ret) - 1
+    expected = []
+    for i in range(64):
+        a, b = i & 7, i >> 3
+        expected.append((((4 + (b << 1)) >> 1) + a) & mask)
+
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
+
+    bit = comp.get_bit()
+    comp.drop_bit(bit)
+    with pytest.raises(ValueError):
+        comp.drop_bit(bit)
+
+
+def test_clean_ancillas():
+    def func(a: 3, b: 3) -> 3:
+        c = a ^ b
+        d = c & a
+        if b:
+            d = d | a
+        else:
+            d = ~d
+        c = d ^ (b >> 1)
+        return c
+
+    comp = compiler.Compiler(clean_ancillas=True)
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    expected = []
+    for i in range(64):
+        a, b = i & 7, i >> 3
+        d = (a ^ b) & a
+        d = d | a if b else ~d & 7
+        expected.append(d ^ (b >> 1))
+
+    assert list(evaluate(compiled.circuit, compiled.arguments, compiled.ret)) == (
+        expected
+    )
+    assert "reset" not in compiled.circuit.count_ops()
+
+    arguments = [q for arg in compiled.arguments.values() for q in arg]
+    ancillas = [
+        q
+        for q in range(compiled.circuit.num_qubits)
+        if q not in arguments and q not in compiled.ret
+    ]
+    assert set(evaluate(compiled.circuit, compiled.arguments, ancillas)) == {0}
+    assert list(evaluate(compiled.circuit, compiled.arguments, arguments)) == list(
+        range(64)
+    )
+
+
+def test_get_expr_key():
+    versions = {"a": 1}
+    key1 = compiler.get_expr_key(ast.parse("(a ^ b) & c").body[0].value, versions)
+    key2 = compiler.get_expr_key(ast.parse("c & (b ^ a)").body[0].value, versions)
+    assert key1 == key2
+    assert key1 != compiler.get_expr_key(ast.parse("(a ^ b) & c").body[0].value, {})
+
+    st = ast.parse("x = (a ^ b) & c\ny = (a ^ b) | c\nz = (a ^ b) & c").body
+    uses = compiler.count_expr_uses(st, {})
+    assert uses[compiler.get_expr_key(st[0].value, {})] == 2
+    assert uses[compiler.get_expr_key(st[0].value.left, {})] == 2
+
+
+def test_eliminate_common_subexpressions():
+    def func(a: 3, b: 3, c: 3) -> 3:
+        x = (a ^ b) & c
+        if a ^ b:
+            x = ~(a ^ b)
+        y = (b ^ a) | c
+        return x ^ y ^ (a ^ b)
+
+    expected = []
+    for i in range(512):
+        a, b, c = i & 7, (i >> 3) & 7, i >> 6
+        x = (a ^ b) & c
+        if a ^ b:
+            x = ~(a ^ b) & 7
+        expected.append(x ^ ((a ^ b) | c) ^ (a ^ b))
+
+    sizes = []
+    for eliminate in (False, True):
+        comp = compiler.Compiler(eliminate_common_subexpressions=eliminate)
+        comp.assemble(func)
+        compiled = comp.get_compiled()
+
+        sizes.append(len(compiled.circuit))
+        res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+        assert list(res) == expected
+
+    assert sizes[1] < sizes[0]
+    assert not comp.expressions
+
+
+def test_get_const():
+    op = ast.parse("(int(5) | int(8)) ^ ~int(3) ^ (int(1) << 2)").body[0].value
+    assert compiler.get_const(op) == ((5 | 8) ^ 0 ^ 4, 4)
+    assert compiler.get_const(ast.parse("int(6) & a").body[0].value) is None
+
+
+def test_fold_constants():
+    def func(a: 4, b: 4) -> 4:
+        c = (a ^ b) & int(10)
+        d = (a | int(5)) ^ int(3) ^ (int(1) << 3)
+        e = (c | d) ^ (b & a & int(6))
+        if int(1) & int(2):
+            e = ~e
+        return e
+
+    comp = compiler.Compiler()
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    expected = []
+    for i in range(256):
+        a, b = i & 15, i >> 4
+        c = (a ^ b) & 10
+        d = (a | 5) ^ 3 ^ 8
+        expected.append((c | d) ^ (b & a & 6))
+
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
+
+    counts = compiled.circuit.count_ops()
+    assert "mcx" not in counts
+    assert counts["ccx"] == 6
+
+
+def test_folded_constant_size():
+    # Folded constants keep the size of the expression
+    comp = compiler.Compiler()
+    comp.assemble_source("def func(a: 2):\n    v = ~int(12)\n    return ~v\n")
+    compiled = comp.get_compiled()
+    assert len(compiled.ret) == 4
+    assert (
+        list(evaluate(compiled.circuit, compiled.arguments, compiled.ret)) == [12] * 4
+    )
+
+    comp = compiler.Compiler()
+    comp.assemble_source(
+        "def func(a: 2):\n    b = int(4) & int(3)\n    return (b + a) ^ b\n"
+    )
+    compiled = comp.get_compiled()
+    assert len(compiled.ret) == 3
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == [0, 1, 2, 3]
+
+
+def test_bit_or_different_sizes():
+    def func(a: 4, b: 4) -> 5:
+        c = (a << 1) | (b >> 1)
+        return c | (a ^ b)
+
+    comp = compiler.Compiler()
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    expected = []
+    for i in range(256):
+        a, b = i & 15, i >> 4
+        expected.append(((a << 1) | (b >> 1)) | (a ^ b))
+
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
+
+
+@pytest.mark.parametrize("clean_ancillas", [False, True])
+def test_add_sub(clean_ancillas):
+    def func(a: 4, b: 3) -> 5:
+        c = (a ^ b) + (a & b) + b
+        d: 4 = a - b + int(3)
+        if a & int(1):
+            d = d + b
+        else:
+            d = d - int(1)
+        return c ^ d
+
+    comp = compiler.Compiler(clean_ancillas=clean_ancillas)
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    expected = []
+    for i in range(128):
+        a, b = i & 15, i >> 4
+        c = (a ^ b) + (a & b) + b
+        d = (a - b + 3) & 15
+        # The else branch sees d widened by the addition
+        d = d + b if a & 1 else (d - 1) & 31
+        expected.append((c ^ d) & (2 ** len(compiled.ret) - 1))
+
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
+
+
+def test_add_width():
+    comp = compiler.Compiler()
+    comp.assemble_source("def func(a: 3, b: 2):\n    return a + b\n")
+    assert len(comp.ret) == 4
+
+    comp = compiler.Compiler()
+    comp.assemble_source("def func(a: 3, b: 3):\n    c: 3 = a + b\n    return c\n")
+    assert len(comp.ret) == 3
+    assert compiler.get_const(ast.parse("int(3) - int(5)").body[0].value) == (6, 3)
+
+
+@pytest.mark.parametrize("clean_ancillas", [False, True])
+def test_compare(clean_ancillas):
+    def func(a: 3, b: 2) -> 6:
+        return (
+            (a == b)
+            | ((a != int(5)) << 1)
+            | ((a < b) << 2)
+            | ((int(6) <= a) << 3)
+            | ((a > int(2)) << 4)
+            | ((b >= a) << 5)
+        )
+
+    comp = compiler.Compiler(clean_ancillas=clean_ancillas)
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    expected = []
+    for i in range(32):
+        a, b = i & 7, i >> 3
+        flags = [a == b, a != 5, a < b, 6 <= a, a > 2, b >= a]
+        expected.append(sum(int(flag) << bit for bit, flag in enumerate(flags)))
+
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
+
+
+def test_compare_const_folding():
+    compare = ast.parse("int(3) < int(5)").body[0].value
+    assert compiler.get_const(compare) == (1, 1)
+
+    comp = compiler.Compiler()
+    comp.assemble_source("def func(a: 3):\n    return a < int(8)\n")
+    assert comp.get_resources().toffoli == 0
+
+    # Less than a power of 2 only checks the high bits
+    comp = compiler.Compiler()
+    comp.assemble_source("def func(a: 8):\n    return a < int(16)\n")
+    assert comp.get_resources().gates[("x", 4)] == 1
+    assert ("x", 2) not in comp.get_resources().gates
+
+
+@pytest.mark.parametrize("clean_ancillas", [False, True])
+def test_nested_if(clean_ancillas):
+    def func(a: 2, b: 2, c: 2) -> 2:
+        d = c ^ int(0)
+        if a:
+            if b == int(2):
+                d = d ^ int(3)
+            else:
+                d = d ^ int(1)
+        return d
+
+    comp = compiler.Compiler(clean_ancillas=clean_ancillas)
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    expected = []
+    for i in range(64):
+        a, b, c = i & 3, (i >> 2) & 3, i >> 4
+        if a:
+            c ^= 3 if b == 2 else 1
+        expected.append(c)
+
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
+
+
+@pytest.mark.parametrize("eliminate_common_subexpressions", [False, True])
+@pytest.mark.parametrize(
+    "expr, func",
+    [
+        ("(a ^ b) & (a ^ b)", lambda a, b: a ^ b),
+        ("(a & b) | (a & b)", lambda a, b: a & b),
+        ("(~a) | (~a)", lambda a, b: ~a),
+        ("(a & b) ^ (a & b) ^ b", lambda a, b: b),
+        ("(a | b) ^ (a | b)", lambda a, b: 0),
+        ("a | a", lambda a, b: a),
+        ("c | c", lambda a, b: ~b),
+        ("(a & b) ^ ~(a & b)", lambda a, b: 3),
+        ("(a ^ b) | (c & (a ^ b))", lambda a, b: (a ^ b) | (~b & (a ^ b))),
+    ],
+)
+def test_repeated_operands(expr, func, eliminate_common_subexpressions):
+    source = f"def func(a: 2, b: 2) -> 2:\n    c = ~b\n    return {expr}\n"
+    comp = compiler.Compiler(
+        eliminate_common_subexpressions=eliminate_common_subexpressions
+    )
+    comp.assemble_source(source)
+    compiled = comp.get_compiled()
+
+    expected = [func(i & 3, i >> 2) & 3 for i in range(16)]
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
+
+
+@pytest.mark.parametrize("eliminate_common_subexpressions", [False, True])
+def test_reassign_from_compare(eliminate_common_subexpressions):
+    # The old values are read by the comparisons and freed only once
+    def func(a: 3, b: 3) -> 7:
+        v = a ^ int(0)
+        v = v == b
+        w = b ^ int(2)
+        w = w < w
+        x = a ^ int(1)
+        x = (x <= b) + x
+        return v | (w << 1) | (x << 2)
+
+    comp = compiler.Compiler(
+        eliminate_common_subexpressions=eliminate_common_subexpressions
+    )
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    expected = []
+    for i in range(64):
+        a, b = i & 7, i >> 3
+        x = a ^ 1
+        expected.append(int(a == b) | ((int(x <= b) + x) << 2))
+
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
+
+
+@pytest.mark.parametrize("free_dead_variables", [False, True])
+def test_clean_ancillas_conditional_reassign(free_dead_variables):
+    # The value from before the If is selected when the condition is false
+    def func(a: 2, b: 2):
+        c = b ^ a
+        if a:
+            c = a
+            c = a >> 1
+        return c
+
+    comp = compiler.Compiler(
+        clean_ancillas=True, free_dead_variables=free_dead_variables
+    )
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    expected = []
+    for i in range(16):
+        a, b = i & 3, i >> 2
+        expected.append(a >> 1 if a else b)
+
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
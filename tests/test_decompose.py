@@ -0,0 +1,54 @@
+import pytest
+
+from quantpiler import compiler, decompose, ir
+from quantpiler.simulator import evaluate
+
+
+@pytest.mark.parametrize("mode", ["v-chain", "log-depth", "dirty"])
+def test_decompose_mcx(mode):
+    for size in range(3, 7):
+        circuit = ir.Circuit(num_qubits=size + 1)
+        controls = list(range(size))
+        controls[1] = ~1
+        circuit.x(size, controls)
+        if size > 3:
+            circuit.swap(0, size, [2, ~3] + list(range(4, size)))
+
+        if mode == "dirty":
+            # Borrowed qubits in any state
+            circuit.add_qubits(size - 2)
+        inputs = list(range(circuit.num_qubits))
+
+        res = decompose.decompose_mcx(circuit, mode, inputs)
+        assert max(len(gate.controls) for gate in res) == 2
+
+        registers = {"q": inputs}
+        assert list(evaluate(res, registers, inputs)) == list(
+            evaluate(circuit, registers, inputs)
+        )
+
+        ancillas = list(range(circuit.num_qubits, res.num_qubits))
+        if mode == "dirty":
+            assert not ancillas
+        else:
+            assert set(evaluate(res, registers, ancillas)) == {0}
+
+
+def test_mcx_mode():
+    def wide_and(a: 4, b: 4, c: 4, d: 4) -> 4:
+        return a & b & c & d
+
+    tables = []
+    for mcx_mode in (None, "v-chain"):
+        comp = compiler.Compiler(mcx_mode=mcx_mode)
+        comp.assemble(wide_and)
+        compiled = comp.get_compiled()
+        tables.append(
+            list(evaluate(compiled.circuit, compiled.arguments, compiled.ret))
+        )
+
+    assert tables[0] == tables[1]
+    assert "mcx" not in compiled.circuit.count_ops()
+
+    with pytest.raises(ValueError):
+        decompose.decompose_mcx(compiled.circuit, "unknown")
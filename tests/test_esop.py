@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from quantpiler import esop
+
+
+@pytest.mark.parametrize("count", [1, 4, 7])
+def test_minimize_esop(count):
+    rng = np.random.default_rng(count)
+    for _ in range(5):
+        table = rng.random(2**count) < 0.5
+        cubes = esop.minimize_esop(table)
+        assert (esop.evaluate_esop(cubes, count) == table).all()
+        assert len(cubes) <= max(1, table.sum())
+
+        care = rng.random(2**count) < 0.6
+        cubes = esop.minimize_esop(table, care)
+        assert (esop.evaluate_esop(cubes, count)[care] == table[care]).all()
+
+
+def test_minimize_esop_structured():
+    inputs = np.arange(2**8)
+    table = ((inputs >> 3) & 1 == 1) ^ ((inputs & 0b10000100) == 0b10000000)
+    cubes = esop.minimize_esop(table)
+    assert len(cubes) == 2
+    assert (esop.evaluate_esop(cubes, 8) == table).all()
+
+    # Only the zero entry is cared
+    care = inputs == 0
+    assert esop.minimize_esop(~care, care) == []
+
+
+def test_exorlink():
+    assert esop.exorlink([(0b1, 0b1), (0b1, 0b0)]) == [(0, 0)]
+    assert esop.exorlink([(0b11, 0b11), (0b10, 0b10)]) == [(0b11, 0b10)]
+    assert esop.exorlink([(0b1, 0b1), (0b1, 0b1)]) == []
+
+
+def test_reed_muller_size():
+    with pytest.raises(ValueError):
+        esop.get_reed_muller(np.zeros(3, dtype=bool))
@@ -0,0 +1,73 @@
+import pytest
+
+from quantpiler import compiler, hooks
+
+
+SOURCE = """def func(a: 4, b: 4) -> 4:
+    c = a ^ b
+    if c & a:
+        c = c | b
+    return c
+"""
+
+
+class RecordingHook(hooks.Hook):
+    def __init__(self):
+        self.events = []
+
+    def on_enter(self, phase, node):
+        self.events.append(("enter", phase))
+
+    def on_exit(self, phase, node, elapsed, counters):
+        assert elapsed >= 0
+        self.events.append(("exit", phase))
+
+
+def test_hooks_nesting():
+    hook = RecordingHook()
+    comp = compiler.Compiler(hooks=[hook], optimize=True)
+    comp.assemble_source(SOURCE)
+    comp.get_qc()
+
+    depth = 0
+    for event, _ in hook.events:
+        depth += 1 if event == "enter" else -1
+        assert depth >= 0
+    assert depth == 0
+
+    phases = [phase for event, phase in hook.events if event == "enter"]
+    assert phases[:3] == ["parse", "function", "instruction"]
+    assert phases.count("instruction") == 4
+    assert phases[-2:] == ["optimize", "lower"]
+
+
+def test_timing_collector():
+    collector = hooks.TimingCollector()
+    phases = []
+    callback = hooks.CallbackHook(lambda phase, *args: phases.append(phase))
+
+    comp = compiler.Compiler(hooks=[collector, callback])
+    comp.assemble_source(SOURCE)
+
+    stats = collector.get_stats()
+    assert stats["instruction:Assign"]["calls"] == 2
+    assert stats["instruction:If"]["calls"] == 1
+    assert stats["expression:BinOp.BitXor"]["qubits"] == 4
+    assert stats["function"]["gates"] == len(comp.get_circuit())
+    assert stats["function"]["time"] >= stats["instruction:If"]["time"]
+    assert len(phases) == sum(item["calls"] for item in stats.values())
+
+    table = collector.format().splitlines()
+    assert table[0].split()[0] == "phase"
+    assert len(table) == len(stats) + 1
+
+    collector.reset()
+    assert collector.get_stats() == {}
+
+
+def test_hooks_on_error():
+    hook = RecordingHook()
+    comp = compiler.Compiler(hooks=[hook])
+    with pytest.raises(NotImplementedError):
+        comp.assemble_source("def func(a: 4) -> 4:\n    assert a\n")
+    assert hook.events[-1] == ("exit", "function")
@@ -0,0 +1,58 @@
+import pytest
+
+from quantpiler import ir
+from quantpiler.simulator import evaluate
+
+
+def test_append():
+    circuit = ir.Circuit()
+    a, b, c, d = circuit.add_qubits(4)
+
+    circuit.x([a, b])
+    circuit.x(c, [a, b])
+    circuit.swap(c, d, [a])
+    circuit.reset(a)
+    circuit.barrier()
+
+    assert len(circuit) == 6
+    assert circuit[2] == ir.Gate(ir.X, (a, b), (c,))
+    assert circuit[3] == ir.Gate(ir.SWAP, (a,), (c, d))
+    assert list(circuit)[-1] == ir.Gate(ir.BARRIER, (), ())
+    assert circuit.count_ops() == {
+        "x": 2,
+        "ccx": 1,
+        "cswap": 1,
+        "reset": 1,
+        "barrier": 1,
+    }
+
+    copy = circuit.copy()
+    copy.x(d)
+    assert len(circuit) == 6
+
+    with pytest.raises(ValueError):
+        circuit.x(c, [a, a])
+    with pytest.raises(ValueError):
+        circuit.x(a, [ir.negate(a)])
+    with pytest.raises(ValueError):
+        circuit.swap(c, c)
+    assert len(circuit) == 6
+
+
+def test_to_qiskit():
+    circuit = ir.Circuit("test")
+    a = circuit.add_qubits(2)
+    b = circuit.add_qubits(2)
+    anc = circuit.add_qubits(2)
+
+    for i in range(2):
+        circuit.x(anc[i], [a[i], b[i]])
+        circuit.x(anc[i], [a[i]])
+    circuit.x(anc[0], a + b)
+
+    qc = circuit.to_qiskit({"a": a, "b": b})
+    assert [reg.name for reg in qc.qregs] == ["a", "b", "q"]
+    assert qc.count_ops() == {"ccx": 2, "cx": 2, "mcx": 1}
+
+    table = evaluate(qc, {"a": qc.qregs[0], "b": qc.qregs[1]}, qc.qregs[2])
+    assert list(table) == list(evaluate(circuit, {"a": a, "b": b}, anc))
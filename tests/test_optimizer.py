@@ -0,0 +1,91 @@
+from quantpiler import compiler, ir, optimizer
+from quantpiler.simulator import evaluate
+
+
+def test_cancel_inverses():
+    circuit = ir.Circuit(num_qubits=3)
+    circuit.x(2, [0, 1])
+    circuit.x(1, [0])
+    circuit.x(1, [0])
+    circuit.x(2, [1, 0])
+    circuit.swap(0, 1)
+    circuit.x(2, [0])
+    circuit.swap(1, 0)
+
+    res = optimizer.cancel_inverses(circuit)
+    assert list(res) == [
+        ir.Gate(ir.SWAP, (), (0, 1)),
+        ir.Gate(ir.X, (0,), (2,)),
+        ir.Gate(ir.SWAP, (), (1, 0)),
+    ]
+
+
+def test_merge_x_controls():
+    circuit = ir.Circuit(num_qubits=3)
+    circuit.x([0, 1])
+    circuit.x(2, [0, 1])
+    circuit.x([0, 1])
+    circuit.x(0)
+
+    res = optimizer.merge_x_controls(circuit)
+    assert list(res) == [
+        ir.Gate(ir.X, (~0, ~1), (2,)),
+        ir.Gate(ir.X, (), (0,)),
+    ]
+
+    registers = {"a": [0, 1]}
+    assert list(evaluate(res, registers, [0, 1, 2])) == list(
+        evaluate(circuit, registers, [0, 1, 2])
+    )
+
+    qc = res.to_qiskit(registers)
+    assert qc.data[0].operation.ctrl_state == 0
+
+
+def test_optimize():
+    def func(a: 4, b: 4) -> 4:
+        c = a | b
+        d = ~c
+        if d:
+            c = d ^ a
+        return c
+
+    tables = []
+    sizes = []
+    for optimize in (False, True):
+        comp = compiler.Compiler(optimize=optimize)
+        comp.assemble(func)
+        compiled = comp.get_compiled()
+
+        sizes.append(len(compiled.circuit))
+        tables.append(
+            list(evaluate(compiled.circuit, compiled.arguments, compiled.ret))
+        )
+
+    assert tables[0] == tables[1]
+    assert sizes[1] < sizes[0]
+    assert "barrier" not in compiled.circuit.count_ops()
+
+
+def test_propagate_constants():
+    circuit = ir.Circuit(num_qubits=4)
+    circuit.x(1)
+    circuit.x(2, [0, 1])
+    circuit.x(3, [0, ~1])
+    circuit.reset(3)
+    circuit.swap(1, 3)
+    circuit.swap(0, 2, [1])
+    circuit.swap(2, 3, [0])
+
+    res = optimizer.propagate_constants(circuit, [0])
+    assert list(res) == [
+        ir.Gate(ir.X, (), (1,)),
+        ir.Gate(ir.X, (0,), (2,)),
+        ir.Gate(ir.SWAP, (), (1, 3)),
+        ir.Gate(ir.SWAP, (0,), (2, 3)),
+    ]
+
+    registers = {"a": [0]}
+    assert list(evaluate(res, registers, [0, 1, 2, 3])) == list(
+        evaluate(circuit, registers, [0, 1, 2, 3])
+    )
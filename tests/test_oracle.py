@@ -0,0 +1,54 @@
+import pytest
+
+import random
+
+import numpy as np
+from qiskit.quantum_info import Statevector
+
+from quantpiler.oracle import new_multi_oracle_checker, new_oracle_checker
+
+
+def get_phases(qc, size):
+    phases = []
+    for data in range(2**size):
+        # The result qubit is |1>, so the marked data get phase -1
+        index = data | (1 << size)
+        state = Statevector.from_int(index, 2**qc.num_qubits).evolve(qc)
+        amplitude = state.data[index]
+        assert abs(abs(amplitude) - 1) < 1e-9
+        phases.append(int(round(amplitude.real)))
+    return phases
+
+
+def test_oracle_checker():
+    expected = [True, False, True]
+    phases = get_phases(new_oracle_checker(expected), 3)
+    assert phases == [-1 if data == 0b101 else 1 for data in range(8)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 5, 12, 16])
+def test_multi_oracle_checker(count):
+    rng = random.Random(count)
+    values = rng.sample(range(16), count)
+    patterns = [[bool((value >> i) & 1) for i in range(4)] for value in values]
+
+    qc = new_multi_oracle_checker(patterns)
+    phases = get_phases(qc, 4)
+    assert phases == [-1 if data in values else 1 for data in range(16)]
+
+    assert new_multi_oracle_checker(np.array(patterns)) == qc
+    assert new_multi_oracle_checker(set(map(tuple, patterns))) == qc
+
+
+def test_multi_oracle_checker_sharing():
+    # All 4 patterns share the prefix and make a complete subtree
+    patterns = [[True, False, bool(i & 1), bool(i & 2)] for i in range(4)]
+    qc = new_multi_oracle_checker(patterns)
+    assert len(qc.data) == 3
+    assert qc.data[1].operation.num_ctrl_qubits == 2
+    assert qc.num_qubits == 5
+
+    with pytest.raises(ValueError):
+        new_multi_oracle_checker([])
+    with pytest.raises(ValueError):
+        new_multi_oracle_checker([[True], [True, False]])
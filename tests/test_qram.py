@@ -1,8 +1,11 @@
+import random
+
 from quantpiler import qram
 
 from qiskit import QuantumRegister, ClassicalRegister
 from qiskit.circuit import QuantumCircuit
 
+from quantpiler.simulator import evaluate
 from quantpiler.utils import uint_to_bits, execute_qc_once
 
 
@@ -52,3 +55,45 @@ def test_qram_list():
         data = values[addr]
 
         check_qram(ram, addr, data)
+
+
+def test_gray_qram():
+    rng = random.Random(0)
+    values = {key: rng.randrange(8) for key in rng.sample(range(16), 12)}
+    values[3] = 7
+    ram = qram.new_gray_qram(4, 3, values)
+    ref = qram.new_qram(4, 3, values)
+
+    address, data, anc = ram.qregs
+    arguments = {"address": address}
+    assert "barrier" not in ram.count_ops()
+    assert list(evaluate(ram, arguments, data)) == list(
+        evaluate(ref, {"address": ref.qregs[0]}, ref.qregs[1])
+    )
+    assert not evaluate(ram, arguments, anc).any()
+
+
+def test_gray_qram_gates():
+    rng = random.Random(8)
+    values = [rng.randrange(256) for _ in range(2**8)]
+    gray = qram.new_gray_qram(8, 8, values).count_ops()
+    plain = qram.new_qram(8, 8, values).count_ops()
+    assert gray["x"] * 4 < plain["x"]
+    assert gray["mcx_gray"] < plain["mcx_gray"]
+
+
+def test_qram_minimize():
+    values = [(address * 3) & 7 for address in range(4)]
+    ram = qram.new_qram(2, 3, values, minimize=True)
+    plain = qram.new_qram(2, 3, values).count_ops()
+    del plain["barrier"]
+    assert sum(ram.count_ops().values()) * 2 < sum(plain.values())
+    for addr in range(len(values)):
+        check_qram(ram, addr, values[addr])
+
+    # Missing addresses are don't cares
+    values = {0: 5, 3: 5}
+    ram = qram.new_qram(2, 3, values, minimize=True)
+    assert dict(ram.count_ops()) == {"x": 2}
+    for addr in values:
+        check_qram(ram, addr, values[addr])
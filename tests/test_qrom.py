@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from quantpiler import qrom
+from quantpiler.simulator import evaluate
+
+
+def check_qrom(compiled, values, address_count):
+    table = evaluate(compiled.get_circuit(), compiled.arguments, compiled.ret)
+    expected = list(values) + [0] * (2**address_count - len(values))
+    assert list(table) == expected
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 4, 32])
+def test_qrom(block_size):
+    rng = np.random.default_rng(block_size)
+    values = rng.integers(0, 2**4, size=29)
+    compiled = qrom.new_qrom(5, 4, values, block_size=block_size, chunk_size=7)
+    check_qrom(compiled, values, 5)
+    assert compiled.get_circuit().num_qubits == 5 + 4 * block_size + 5 - (
+        block_size.bit_length() - 1
+    )
+
+
+def test_qrom_sources(tmp_path):
+    values = [(i * 37) % 64 for i in range(50)]
+
+    check_qrom(qrom.new_qrom(6, 6, iter(values), chunk_size=8), values, 6)
+
+    path = tmp_path / "table.npy"
+    np.save(path, np.array(values, dtype=np.uint8))
+    check_qrom(qrom.new_qrom(6, 6, str(path), block_size=4), values, 6)
+
+
+def test_qrom_toffoli_count():
+    values = np.arange(256) % 8
+    gates = qrom.new_qrom(8, 3, values).get_circuit().count_ops()
+    assert gates["ccx"] <= 2 * 256
+
+    gates = qrom.new_qrom(8, 3, values, block_size=8).get_circuit().count_ops()
+    assert gates["ccx"] <= 2 * 256 // 8
+    assert gates["cswap"] == 7 * 3
+
+
+def test_qrom_errors():
+    with pytest.raises(ValueError, match=r"Value 4 out of range \[0, 3\]"):
+        qrom.new_qrom(2, 2, [0, 1, 2, 4])
+    with pytest.raises(ValueError, match=r"Value -1 out of range \[0, 3\]"):
+        qrom.new_qrom(2, 2, [0, -1])
+    with pytest.raises(ValueError):
+        qrom.new_qrom(2, 2, range(5))
+    with pytest.raises(ValueError):
+        qrom.new_qrom(2, 2, [0], block_size=3)
+    with pytest.raises(ValueError):
+        qrom.new_qrom(2, 2, np.zeros((2, 2), dtype=int))
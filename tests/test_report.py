@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from quantpiler import compiler, ir, optimizer, report
+
+
+SOURCE = """def func(a: 4, b: 4) -> 4:
+    c = a ^ b
+    d: 4 = (c &
+            a)
+    return d | b
+"""
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"dry_run": True},
+        {"optimize": True, "mcx_mode": "v-chain", "schedule": True},
+    ],
+)
+def test_line_report(options):
+    comp = compiler.Compiler(**options)
+    comp.assemble_source(SOURCE)
+    lines = comp.get_line_report()
+
+    assert [item.line for item in lines] == [1, 2, 3, 5]
+    assert lines[0].source == "def func(a: 4, b: 4) -> 4:"
+    assert lines[0].qubits == 8
+    assert lines[1].source == "c = a ^ b"
+    assert lines[1].gates == 8
+    assert lines[2].source == "d: 4 = (c &"
+    assert all(item.time >= 0 for item in lines)
+
+    circuit = comp.get_circuit()
+    assert sum(item.qubits for item in lines) == circuit.num_qubits
+    gates = sum(1 for op in circuit.ops if op != ir.BARRIER)
+    assert sum(item.gates for item in lines) == gates
+
+
+def test_format_line_report():
+    comp = compiler.Compiler()
+    comp.assemble_source(SOURCE)
+    lines = comp.get_line_report()
+
+    table = report.format_line_report(lines).splitlines()
+    assert table[0].split() == ["line", "qubits", "gates", "time,", "ms", "source"]
+    assert table[2].split()[:3] == ["2", "4", "8"]
+    assert table[2].endswith("c = a ^ b")
+    assert table[-1].split()[:3] == [
+        "total",
+        str(sum(item.qubits for item in lines)),
+        str(sum(item.gates for item in lines)),
+    ]
+
+    data = json.loads(report.line_report_to_json(lines))
+    assert [report.LineResources(**item) for item in data] == lines
+
+
+def test_passes_keep_lines():
+    circuit = ir.Circuit(num_qubits=3)
+    circuit.line = 1
+    circuit.x(0)
+    circuit.line = 2
+    circuit.x(2, [0, 1])
+    circuit.line = 3
+    circuit.x(0)
+    circuit.x(1)
+    circuit.line = 4
+    circuit.x(2, [1])
+
+    res = optimizer.optimize(circuit)
+    assert list(res) == [
+        ir.Gate(ir.X, (ir.negate(0), 1), (2,), 2),
+        ir.Gate(ir.X, (ir.negate(1),), (2,), 4),
+        ir.Gate(ir.X, (), (1,), 3),
+    ]
@@ -0,0 +1,47 @@
+import pytest
+
+from quantpiler import compiler, resources
+
+
+def func(a: 8, b: 8, c: 8) -> 8:
+    d = (a ^ b) & c
+    e = (d | a) ^ (b >> 3)
+    if c:
+        e = ~e & (c << 2)
+    return e ^ d
+
+
+@pytest.mark.parametrize("clean_ancillas", [False, True])
+def test_dry_run(clean_ancillas):
+    comp = compiler.Compiler(clean_ancillas=clean_ancillas)
+    comp.assemble(func)
+    expected = comp.get_resources()
+
+    dry = compiler.Compiler(clean_ancillas=clean_ancillas, dry_run=True)
+    dry.assemble(func)
+    assert dry.get_resources() == expected
+    assert dry.circuit.count_ops() == comp.circuit.count_ops()
+
+    with pytest.raises(ValueError):
+        dry.get_qc()
+    with pytest.raises(ValueError):
+        dry.get_compiled()
+
+    assert expected.num_qubits == comp.circuit.num_qubits
+    assert expected.peak_qubits <= expected.num_qubits
+    assert sum(expected.gates.values()) == len(comp.circuit)
+    assert expected.resets == comp.circuit.count_ops().get("reset", 0)
+
+
+def test_estimate_resources():
+    def wide_and(a: 4, b: 4, c: 4, d: 4) -> 4:
+        return a & b & c & d
+
+    res = resources.estimate_resources(wide_and)
+    assert res.gates[("x", 4)] == 4
+    assert res.toffoli == 4 * 5
+    assert res.t_count == 7 * res.toffoli
+
+    comp = compiler.Compiler(mcx_mode="v-chain")
+    comp.assemble(wide_and)
+    assert comp.get_resources().toffoli == res.toffoli
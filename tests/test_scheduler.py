@@ -0,0 +1,59 @@
+import random
+
+from quantpiler import compiler, ir, scheduler
+from quantpiler.simulator import evaluate
+
+
+def test_get_layers():
+    circuit = ir.Circuit(num_qubits=4)
+    circuit.x(1, [2])
+    circuit.x(0, [1])
+    circuit.x(0, [3])
+
+    layers = scheduler.get_layers(circuit)
+    assert layers == [
+        [ir.Gate(ir.X, (2,), (1,)), ir.Gate(ir.X, (3,), (0,))],
+        [ir.Gate(ir.X, (1,), (0,))],
+    ]
+    assert scheduler.get_depth(circuit) == 2
+    assert circuit.to_qiskit().depth() == 3
+
+
+def test_schedule_random():
+    random.seed(0)
+    registers = {"q": list(range(5))}
+
+    for _ in range(100):
+        circuit = ir.Circuit(num_qubits=5)
+        for _ in range(25):
+            kind = random.random()
+            qubits = random.sample(range(5), 3)
+            controls = [q if random.random() < 0.5 else ~q for q in qubits[1:]]
+            if kind < 0.6:
+                circuit.x(qubits[0], controls[: random.randint(0, 2)])
+            elif kind < 0.9:
+                circuit.swap(qubits[0], qubits[1], controls[1:])
+            else:
+                circuit.barrier()
+
+        res = scheduler.schedule(circuit)
+        assert list(evaluate(res, registers, registers["q"])) == list(
+            evaluate(circuit, registers, registers["q"])
+        )
+        assert scheduler.get_depth(circuit) <= circuit.to_qiskit().depth()
+
+
+def test_compiler_schedule():
+    def func(a: 4, b: 4) -> 4:
+        c = a ^ b
+        d = ~a & b
+        return c | d
+
+    comp = compiler.Compiler(add_barriers=False, schedule=True)
+    comp.assemble(func)
+    compiled = comp.get_compiled()
+
+    expected = [(i & 15) ^ (i >> 4) | (~i & (i >> 4) & 15) for i in range(256)]
+    res = evaluate(compiled.circuit, compiled.arguments, compiled.ret)
+    assert list(res) == expected
+    assert compiled.get_qc().depth() == scheduler.get_depth(compiled.circuit)
@@ -0,0 +1,99 @@
+import random
+
+from qiskit import BasicAer, QuantumRegister, ClassicalRegister, execute
+from qiskit.circuit import QuantumCircuit
+from qiskit.circuit.library import MCXGate
+
+from quantpiler import simulator
+from quantpiler.qram import new_qram
+from quantpiler.utils import execute_qc_once
+
+
+def test_pack_values():
+    values = [0, 5, 3, 2**40 + 7]
+    packed = simulator.pack_values(values, 41)
+    assert packed.shape == (41, 1)
+    assert list(simulator.unpack_values(packed, len(values))) == values
+
+
+def test_random_circuits():
+    rnd = random.Random(1)
+    qasm_sim = BasicAer.get_backend("qasm_simulator")
+
+    for _ in range(20):
+        qc = QuantumCircuit(
+            QuantumRegister(5), ClassicalRegister(3), ClassicalRegister(2)
+        )
+        for _ in range(15):
+            qubits = rnd.sample(range(5), 4)
+            gate = rnd.choice(["x", "cx", "ccx", "mcx", "swap", "cswap", "reset"])
+            if gate == "x":
+                qc.x(qubits[0])
+            elif gate == "cx":
+                qc.cx(qubits[0], qubits[1], ctrl_state=rnd.randint(0, 1))
+            elif gate == "ccx":
+                qc.ccx(*qubits[:3])
+            elif gate == "mcx":
+                qc.append(MCXGate(3, ctrl_state=rnd.randint(0, 7)), qubits)
+            elif gate == "swap":
+                qc.swap(qubits[0], qubits[1])
+            elif gate == "cswap":
+                qc.cswap(*qubits[:3])
+            else:
+                qc.reset(qubits[0])
+        qc.measure(range(5), range(5))
+
+        expected = execute(qc, backend=qasm_sim, shots=1).result().get_counts()
+        assert simulator.ReversibleSimulator().run(qc) == [expected]
+
+
+def test_is_reversible():
+    qc = QuantumCircuit(2)
+    qc.cx(0, 1)
+    assert simulator.is_reversible(qc)
+
+    qc.h(0)
+    assert not simulator.is_reversible(qc)
+
+
+def test_wide_circuit():
+    qc = QuantumCircuit(40)
+    qc.x(0)
+    for i in range(39):
+        qc.cx(i, i + 1)
+    qc.mcx(list(range(1, 39)), 0)
+
+    assert execute_qc_once(qc) == "1" * 39 + "0"
+
+
+def test_lanes():
+    ram = new_qram(2, 3, [1, 3, 6, 7])
+    qc = QuantumCircuit(5, 3)
+    qc.compose(ram, inplace=True)
+    qc.measure([2, 3, 4], [0, 1, 2])
+
+    initial = {0: [0, 1, 0, 1], 1: [0, 0, 1, 1]}
+    res = simulator.simulate(qc, initial, lanes=4)
+    values = [sum(int(res[i][lane]) << i for i in range(3)) for lane in range(4)]
+    assert values == [4, 3, 6, 7]
+
+
+def test_evaluate():
+    qc = QuantumCircuit(6)
+    a = QuantumRegister(bits=qc.qubits[0:2])
+    b = QuantumRegister(bits=qc.qubits[2:4])
+    ret = QuantumRegister(bits=qc.qubits[4:6])
+    for i in range(2):
+        qc.cx(a[i], ret[i])
+        qc.cx(b[i], ret[i])
+
+    table = simulator.evaluate(qc, {"a": a, "b": b}, ret)
+    assert list(table) == [(i & 3) ^ (i >> 2) for i in range(16)]
+
+    table = simulator.evaluate(qc, {"a": a, "b": b}, ret, {"a": [1, 2], "b": [3, 3]})
+    assert list(table) == [2, 1]
+
+    table = simulator.evaluate(
+        qc, {"a": a, "b": b}, ret, [[1, 3], [2, 3]], chunk_size=1
+    )
+    assert list(table) == [2, 1]
@@ -1,5 +1,8 @@
+from quantpiler import compiler
 from quantpiler import utils
 
+from qiskit import ClassicalRegister
+
 
 def test_int_to_bits():
     bl = utils.int_to_bits(17, bits=7)
@@ -18,3 +21,47 @@ def test_bits_to_int():
     assert utils.bits_to_int([1, 1, 1, 1]) == -1
     assert utils.bits_to_int([1, 1, 1, 0]) == -2
     assert utils.bits_to_int([1, 0, 1, 1]) == -5
+
+
+def test_compile_truth_table():
+    def xor_and(a: 3, b: 3) -> 3:
+        c = (a ^ b) & a
+        return c
+
+    table = utils.compile_truth_table(xor_and)
+    assert list(table) == [((i & 7) ^ (i >> 3)) & (i & 7) for i in range(64)]
+
+
+def test_compile_execute():
+    def xor_and(a: 3, b: 3) -> 3:
+        c = (a ^ b) & a
+        return c
+
+    assert utils.compile_execute(xor_and, {"a": 6, "b": 3}) == "100"
+
+    args_list = [{"a": a, "b": b} for a in range(8) for b in range(8)]
+    results = utils.compile_execute_many(xor_and, args_list)
+    assert results == [format((a ^ b) & a, "03b") for a in range(8) for b in range(8)]
+
+
+def test_bind_arguments():
+    def inv(a: 4) -> 4:
+        b = ~a
+        return b
+
+    comp = compiler.Compiler()
+    comp.assemble(inv)
+
+    qc = utils.bind_arguments(comp.get_qc(), comp.arguments, {"a": -3})
+    ret_cl = ClassicalRegister(4)
+    qc.add_register(ret_cl)
+    qc.measure(comp.get_ret(), ret_cl)
+    qc.h(comp.arguments["a"][0])
+    qc.h(comp.arguments["a"][0])
+
+    assert utils.run_once(qc) == "0010"
+
+
+def test_gray_to_uint():
+    for i in range(64):
+        assert utils.gray_to_uint(i ^ (i >> 1)) == i